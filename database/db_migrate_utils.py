@@ -1,6 +1,11 @@
 
-import os, sys, time
+import os, re, sys, time
+import mmap
+import json
+import shutil
+import tempfile
 import collections
+import multiprocessing
 
 #-------------------------------------Configuration Begin--------------------------------------------#
 #
@@ -24,6 +29,36 @@ importDir        = exportDir
 #
 dtypeCvrt        = None
 #
+# Processes transforming the export file in parallel, None or 1 for one
+workers          = None
+#
+# Merge consecutive inserts into a table into multi row inserts of at most
+# batchBytes, below the max_allowed_packet of the MySQL server. None writes
+# one insert per row. batchTransactions batches are committed together (0 for
+# no transaction statements) and batchDisableChecks, True or a list of table
+# names, turns unique and foreign key checks off while loading those tables.
+batchBytes         = None
+batchTransactions  = 0
+batchDisableChecks = None
+#
+# Direct copy from database to database, see pg_mysql_direct_migration.
+# SQLAlchemy URLs of the PostgreSQL source and the MySQL target, the tables
+# are the ones in exportDDLFile. copyWorkers tables are copied at a time,
+# copyChunksize rows per read and insert, and progress is kept in
+# checkpointFile in importDir so a failed run resumes where it stopped.
+sourceURL          = None
+targetURL          = None
+sourceSchema       = None
+copyWorkers        = 4
+copyChunksize      = 50000
+checkpointFile     = 'direct_migration.ckpt'
+#
+# pg_db_migration checkpoints its progress into importFile + '.ckpt' every
+# checkpointStatements statements or checkpointSeconds seconds, and a rerun
+# after a failure continues from there. Both None for no checkpoints.
+checkpointStatements = 100000
+checkpointSeconds    = 30
+#
 # Example of a dtypeCvrt (Data type convert mapping dictionary) 
 # Replace dtypeCvrt from None to a dictionary similar to below to give more 
 # specific data type converting.
@@ -128,16 +163,6 @@ def _set_fk_checks(ck_fk, outFile):
     return outFile
 
 
-def _strip_cast_stmts(line):
-    """doc string"""
-    
-    # In Work:
-    newLine    = line.replace(", cast(",", ")
-    newLine    = newLine.replace(" as BLOB)","")
-    newLine    = newLine.replace(" as CLOB)","")
-    return newLine
-
-
 def _verify_values(from_db, col_index, dtype, dtype_map, values):
     """doc string"""
     
@@ -149,88 +174,1011 @@ def _verify_values(from_db, col_index, dtype, dtype_map, values):
     return
 
 
-def x_form_insert(inputFile, outFile, ddlDict, oldDBName, newDBName, dtype_map,
-                              strip_cast_stmts=False, fk_cks_off=True, multiVal=False, upCaseTN=False):
+class DumpText(collections.namedtuple('DumpText', ['text', 'start', 'end'])):
+    """Anything in a dump that is not an INSERT statement"""
+    
+    __slots__ = ()
+
+
+class InsertStatement(collections.namedtuple('InsertStatement', 
+                                             ['table', 'columns', 'values', 'text', 'start', 'end',
+                                                                          'backslash_escapes'])):
+    """
+    INSERT ... VALUES statement of a dump. table is the tuple of the parts
+    of the qualified table name and columns the column names (None when 
+    the statement has no column list), both unquoted. values is the text 
+    after VALUES up to the ;, split into value tuples by rows(). start and
+    end are the byte offsets of text in the input.
+    """
+    
+    __slots__ = ()
+    
+    def rows(self):
+        """
+        List of tuples of the value literals as they appear in the statement,
+        raises ValueError when values is not a plain list of rows.
+        """
+        
+        return _split_rows(self.values, self.backslash_escapes)
+        
+        
+_WS            = re.compile(r'\s*')
+_IDENT         = re.compile(r'"[^"]*(?:""[^"]*)*"|`[^`]*(?:``[^`]*)*`|[^\s."`(),;]+')
+_INSERT_PREFIX = re.compile(r'\s*INSERT\s+INTO\s+((?:{0})(?:\s*\.\s*(?:{0}))*)\s*'
+                            r'(?:\(\s*((?:{0})(?:\s*,\s*(?:{0}))*)\s*\)\s*)?VALUES\s*(?=\()'
+                            .format(_IDENT.pattern), re.I)
+_SPECIAL       = re.compile(r"""[;'"`$]|--|/\*""")
+_DOLLAR_TAG    = re.compile(r'\$(?:[A-Za-z_][A-Za-z_0-9]*)?\$')
+_E_STRING      = r"[Ee]'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'"
+_CAST_VALUE    = re.compile(r'cast\((.*) as (?:BLOB|CLOB)\)\Z', re.I | re.S)
+_CAST_SEARCH   = re.compile(r'cast\(', re.I)
+_E_SEARCH      = re.compile(r"(?<![\w'])[Ee]'")
+_NOT_ROWS      = re.compile(r'\)\s*(?:ON|RETURNING)\s', re.I)
+_RANGE_BOUNDARY = re.compile(r';\r?\n(?=INSERT INTO )')
+
+_PATTERNS = {}
+
+
+def _patterns(backslash_escapes):
+    """Compiled string patterns for dumps with or without backslash escapes"""
+    
+    patterns = _PATTERNS.get(backslash_escapes)
+    if patterns is not None:
+        return patterns
+    
+    if backslash_escapes:
+        string = r"'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'"
+        run_string = r"'[^'\\]*(?:\\.[^'\\]*)*'"
+    else:
+        string = r"'[^']*(?:''[^']*)*'"
+        run_string = r"(?<![Ee])'[^']*'"
+    # Text up to the next ;, quoted identifier, $, comment or E'' string. A ''
+    # inside a string is matched as two strings, which keeps the quotes paired
+    # and the match free of backtracking.
+    run = re.compile(r"""[^;'"`$/-]*(?:(?:%s|-(?!-)|/(?!\*))[^;'"`$/-]*)*"""%run_string, re.S)
+    # Strings closing the quote found by _SPECIAL
+    closing = {"'": re.compile(string[1:], re.S), 
+               "E'": re.compile(_E_STRING[5:], re.S),
+               '"': re.compile(r'[^"]*(?:""[^"]*)*"'), 
+               '`': re.compile(r'[^`]*(?:``[^`]*)*`')}
+    # One value token: a string, a quoted identifier, a parenthesis or comma,
+    # or a run of anything else
+    token = re.compile(r"""%s|%s|"[^"]*(?:""[^"]*)*"|[(),]|(?:[^'"(),Ee]|[Ee](?!'))+"""
+                       %(_E_STRING, string), re.S)
+    # A row of values without parentheses, most rows of a dump, is matched at
+    # once and split with one findall on "values,"
+    value = r"""%s|%s|[^'"(),\s]*(?:\s+[^'"(),\s]+)*"""%(_E_STRING, string)
+    simple_row = re.compile(r"""\(((?:\s*(?:%s)\s*,)*\s*(?:%s)\s*)\)\s*"""%(value, value), re.S)
+    row_values = re.compile(r"""\s*(%s)\s*,"""%value, re.S)
+    
+    patterns = _PATTERNS[backslash_escapes] = {'run': run, 'closing': closing, 'token': token, 
+                                               'simple_row': simple_row, 'row_values': row_values}
+    return patterns
+    
+
+def _unquote(ident):
     """doc string"""
     
-    # TODO: Add a database name old to new mapping dictionary
+    if ident[:1] in ('"', '`'):
+        return ident[1:-1].replace(ident[0] * 2, ident[0])
+    return ident
+
+
+def _split_rows(values, backslash_escapes=False):
+    """Value tuples of the text after VALUES of an INSERT statement"""
     
-    count = 0
-    castWarn = False
-    newLineStmt = False
-    INS = 'INSERT INTO '
-    print "\nParsing export file to generate new insert statements..."
-    print "Old Database Name: %s will be replaced with %s"%(oldDBName, newDBName) 
+    patterns = _patterns(backslash_escapes)
+    simple_row = patterns['simple_row']
+    row_values = patterns['row_values']
+    token = patterns['token']
     
-    for line in inputFile:
-        count += 1
+    rows = []
+    pos = 0
+    n = len(values)
+    while True:
+        if not values.startswith('(', pos):
+            raise ValueError("Expected a row of values at '%s'"%values[pos:pos + 50])
         
-        if not multiVal and not line.startswith(INS + oldDBName.strip()):
-            outFile.write(line)
-            continue
-            
-        if count == 1:
-            if fk_cks_off:
-                outFile = _set_fk_checks(ck_fk=False, outFile=outFile)
-                # Make sure there is a space between alter and insert statements
-                outFile.write("\n\n")
-                           
-        #try:
-        newLine    = line.replace(INS + oldDBName.strip(), INS + newDBName.strip())
-        insertList = newLine.split('VALUES (')
+        r = simple_row.match(values, pos)
+        if r is not None:
+            row = row_values.findall(r.group(1) + ',')
+            pos = r.end()
+        else:
+            # Values with parentheses
+            pos += 1
+            depth = 0
+            row = []
+            vstart = pos
+            while True:
+                t = token.match(values, pos)
+                if t is None:
+                    raise ValueError("Unterminated row of values at '%s'"%values[vstart:vstart + 50])
+                tok = t.group()
+                if tok == '(':
+                    depth += 1
+                elif tok == ')':
+                    if depth == 0:
+                        row.append(values[vstart:t.start()].strip())
+                        break
+                    depth -= 1
+                elif tok == ',' and depth == 0:
+                    row.append(values[vstart:t.start()].strip())
+                    vstart = t.end()
+                pos = t.end()
+            pos = _WS.match(values, t.end()).end()
             
-        bStmtList  = insertList[0].split('(')
-        tableName  = bStmtList[0].split('.')[1].strip().strip('"')
+        rows.append(tuple(row) if row != [''] else ())
+        if pos >= n:
+            return rows
+        if values[pos] != ',':
+            raise ValueError("Expected , or the end of the rows at '%s'"%values[pos:pos + 50])
+        pos = _WS.match(values, pos + 1).end()
 
-        # IN WORK:
-        """
-        for i, dtype in enumerate(ddlDict[oldDBName]['tables'][tableName]['dtypes']):
-            if dtype_map == pg_mysql_dtype_map():
-                values = _verify_values(from_db='pg', dtype, dtype_map, insertList[1])
 
-            elif dtype_map == derby_mysql_dtype_map():
-                values = _verify_values(from_db='derby', dtype, dtype_map, insertList[1])
+class SQLDumpTokenizer(object):
+    """
+    Single pass tokenizer of SQL dump files. Iterating yields, in file 
+    order, an InsertStatement for every INSERT ... VALUES statement and a 
+    DumpText for everything else (other statements, comments and the 
+    whitespace between statements). Joining the text of all events gives
+    back the input.
+    
+    The file is read buffer_size bytes at a time and memory is bounded by
+    the largest statement. Quoted strings, quoted identifiers, comments and
+    PostgreSQL dollar quoting are skipped when looking for the ; ending a
+    statement, so literals holding VALUES (, commas, semicolons or newlines
+    do not split it. Strings escape quotes by doubling them, and with 
+    backslash_escapes (MySQL dumps) or an E'' prefix also with backslashes.
+    
+    offset is the input offset of the first byte of fileobj. complete is
+    False once iterating ended inside a statement, string or comment.
+    """
+    
+    def __init__(self, fileobj, buffer_size=1 << 20, backslash_escapes=False, offset=0):
+        self.fileobj = fileobj
+        self.buffer_size = buffer_size
+        self.backslash_escapes = backslash_escapes
+        self.offset = offset
+        self.complete = True
+        self._run = _patterns(backslash_escapes)['run']
+        self._closing = _patterns(backslash_escapes)['closing']
+        self._head = None
+        self._parsed_head = None
+        
+    def __iter__(self):
+        buf = ''
+        base = self.offset  # input offset of buf[0]
+        eof = False
+        mark = pos = 0      # start of the pending event and the scan position
+        in_stmt = False
+        
+        while True:
+            need = False
+            
+            if not in_stmt:
+                pos = _WS.match(buf, pos).end()
+                if len(buf) - pos < 2 and not eof:
+                    need = True
+                elif pos >= len(buf):
+                    if mark < pos:
+                        yield DumpText(buf[mark:pos], base + mark, base + pos)
+                    return
+                elif buf.startswith('--', pos) or buf.startswith('/*', pos):
+                    end = self._comment_end(buf, pos)
+                    if end is None and not eof:
+                        need = True
+                    elif end is None:
+                        pos = len(buf)
+                        self.complete = False
+                    else:
+                        pos = end
+                else:
+                    if mark < pos:
+                        yield DumpText(buf[mark:pos], base + mark, base + pos)
+                        mark = pos
+                    in_stmt = True
+                    
+            else:
+                pos = self._run.match(buf, pos).end()
+                m = _SPECIAL.match(buf, pos)
+                if m is None:
+                    if eof:
+                        # Last statement without a ;
+                        self.complete = False
+                        yield DumpText(buf[mark:], base + mark, base + len(buf))
+                        mark = pos = len(buf)
+                        in_stmt = False
+                    else:
+                        # A - or / at the end may start a -- or /* 
+                        if buf[pos - 1] in '-/':
+                            pos -= 1
+                        need = True
+                else:
+                    end = self._skip(buf, m, eof)
+                    if end is None:
+                        pos = m.start()
+                        need = True
+                    elif m.group() == ';':
+                        yield self._statement(buf, mark, end, base)
+                        mark = pos = end
+                        in_stmt = False
+                    else:
+                        pos = end
+                        
+            if need:
+                chunk = self.fileobj.read(self.buffer_size)
+                if chunk:
+                    buf = buf[mark:] + chunk
+                    base += mark
+                    pos -= mark
+                    mark = 0
+                else:
+                    eof = True
+                    
+    def _statement(self, buf, start, end, base):
+        """The event of the statement buf[start:end], end after its ;"""
+        
+        m = _INSERT_PREFIX.match(buf, start, end)
+        if m is None:
+            return DumpText(buf[start:end], base + start, base + end)
+            
+        # Dumps write the inserts of a table one after the other, with the
+        # same table name and columns
+        head = m.group(1, 2)
+        if head != self._head:
+            table = tuple(_unquote(ident) for ident in _IDENT.findall(head[0]))
+            columns = None
+            if head[1] is not None:
+                columns = tuple(_unquote(ident) for ident in _IDENT.findall(head[1]))
+            self._head = head
+            self._parsed_head = table, columns
+        table, columns = self._parsed_head
+        
+        return InsertStatement(table, columns, buf[m.end():end - 1].rstrip(), buf[start:end], 
+                               base + start, base + end, self.backslash_escapes)
+        
+    def _comment_end(self, buf, pos):
+        """End of the comment starting at pos, None when it is not in buf"""
+        
+        if buf.startswith('--', pos):
+            end = buf.find('\n', pos)
+            return None if end == -1 else end + 1
+        end = buf.find('*/', pos + 2)
+        return None if end == -1 else end + 2
+        
+    def _skip(self, buf, m, eof):
+        """
+        End of the special token m, a quoted run, comment or ;, None when it
+        is cut by the end of buf
         """
+        
+        tok = m.group()
+        start = m.start()
+        if tok == ';':
+            return m.end()
+        
+        if tok in ('--', '/*'):
+            end = self._comment_end(buf, start)
+        elif tok == '$':
+            tag = _DOLLAR_TAG.match(buf, start)
+            if tag is None:
+                # A $ that is not, or not yet, a dollar quote tag
+                if not eof and re.match(r'\$[A-Za-z_0-9]*\Z', buf[start:start + 64]):
+                    return None
+                return start + 1
+            end = buf.find(tag.group(), tag.end())
+            end = None if end == -1 else end + len(tag.group())
+        else:
+            if (tok == "'" and start > 0 and buf[start - 1] in 'Ee' and 
+                    (start < 2 or not (buf[start - 2].isalnum() or buf[start - 2] == '_'))):
+                tok = "E'"
+            c = self._closing[tok].match(buf, m.end())
+            end = None if c is None else c.end()
+            
+        if end is None and eof:
+            # Unterminated at the end of the input, the rest belongs to the statement
+            return len(buf)
+        return end
+        
 
-        try:
-            colsLine   = bStmtList[1].strip().rstrip(')')
-        except:
-            print "\nLine: " + newLine
-            print "\nInsert List: " + str(insertList)
-            print "\nbStmtList: " + str(bStmtList)
-            print "Count: " + str(count)
+class DumpWriter(object):
+    """
+    Pass through writer of transform_dump and base class of the pluggable
+    writers. text() gets every DumpText, insert() every InsertStatement and
+    close() is called once at the end, returning the output file.
+    """
+    
+    def __init__(self, outFile):
+        self.outFile = outFile
+        self.statements = 0
+        
+    def text(self, event):
+        self.outFile.write(event.text)
+        
+    def insert(self, stmt):
+        self.statements += 1
+        self.outFile.write(stmt.text)
+        
+    def close(self):
+        return self.outFile
+        
+    def state(self):
+        """Counters to restore() when resuming from a DumpCheckpoint"""
+        
+        return {'statements': self.statements}
+        
+    def restore(self, state):
+        self.statements = state['statements']
+        
+    def resume_point(self, offset):
+        """
+        Checkpoint state after the events up to the input offset: the input
+        offset and output position to continue from and the writer state.
+        """
+        
+        return {'input_offset': offset, 'output_position': self.outFile.tell(),
+                'statements': self.statements, 'writer': self.state()}
+        
+        
+class MySQLInsertWriter(DumpWriter):
+    """
+    Rewrites INSERT statements for a MySQL import: the oldDBName qualifier 
+    replaced with newDBName, identifier quotes dropped from the table name
+    and backticks around the columns, and E'' strings become plain strings.
+    With strip_cast_stmts CAST(x AS BLOB) and CAST(x AS CLOB) values become
+    x, and with upCaseTN table names are upper cased. Without multiVal only
+    inserts into oldDBName are rewritten and the others written as they are.
+    verbose prints the first statements and the CAST stripping notice.
+    """
+    
+    def __init__(self, outFile, oldDBName, newDBName, strip_cast_stmts=False, multiVal=False, 
+                                                                 upCaseTN=False, verbose=True):
+        super(MySQLInsertWriter, self).__init__(outFile)
+        self.verbose = verbose
+        self.oldDBName = oldDBName.strip()
+        self.newDBName = newDBName.strip()
+        self.strip_cast_stmts = strip_cast_stmts
+        self.multiVal = multiVal
+        self.upCaseTN = upCaseTN
+        self.castWarn = False
+        self._prefixKey = None
+        self._prefix = None
+        
+    def table_name(self, stmt):
+        """doc string"""
+        
+        table = list(stmt.table)
+        if table[0] == self.oldDBName and len(table) > 1:
+            table[0] = self.newDBName
+        if self.upCaseTN:
+            table[-1] = table[-1].upper()
+        return '.'.join(table)
+        
+    def row(self, row):
+        """doc string"""
+        
+        # MySQL reads backslash escapes in any string, it has no E'' strings
+        row = [value[1:] if value[:2] in ("E'", "e'") else value for value in row]
+        if self.strip_cast_stmts:
+            stripped = []
+            for value in row:
+                m = _CAST_VALUE.match(value)
+                if m is not None:
+                    if not self.castWarn and self.verbose:
+                        self.castWarn = True
+                        print "Nested SQL Syntax 'CAST' found in insert statement"
+                        print "Stripping CAST statements from file..."
+                    value = m.group(1)
+                stripped.append(value)
+            row = stripped
+        return '(' + ', '.join(row) + ')'
+        
+    def columns(self, stmt):
+        """doc string"""
+        
+        if stmt.columns is None:
+            return ''
+        return ' (' + ','.join('`' + col + '`' for col in stmt.columns) + ')'
+        
+    def values(self, stmt):
+        """
+        The rewritten text after VALUES. Rows are only split when a value may
+        have to change, otherwise the text of the statement is kept.
+        """
+        
+        values = stmt.values
+        if _E_SEARCH.search(values) or (self.strip_cast_stmts and _CAST_SEARCH.search(values)):
+            try:
+                rows = stmt.rows()
+            except ValueError:
+                # Not a plain list of rows (ON DUPLICATE KEY ...), keep it
+                return values
+            values = ','.join(self.row(row) for row in rows)
+        return values
+        
+    def prefix(self, stmt):
+        """The rewritten statement text up to the values"""
+        
+        key = (stmt.table, stmt.columns)
+        if key != self._prefixKey:
+            self._prefixKey = key
+            self._prefix = 'INSERT INTO %s%s VALUES'%(self.table_name(stmt), self.columns(stmt))
+        return self._prefix
+        
+    def render(self, stmt):
+        """The rewritten statement text"""
+        
+        return self.prefix(stmt) + self.values(stmt) + ';'
+        
+    def state(self):
+        state = super(MySQLInsertWriter, self).state()
+        state['castWarn'] = self.castWarn
+        return state
+        
+    def restore(self, state):
+        super(MySQLInsertWriter, self).restore(state)
+        self.castWarn = state['castWarn']
+        
+    def rewrites(self, stmt):
+        """True when stmt is rewritten, False when it is written as it is"""
+        
+        return self.multiVal or (len(stmt.table) > 1 and stmt.table[0] == self.oldDBName)
+        
+    def insert(self, stmt):
+        if not self.rewrites(stmt):
+            self.outFile.write(stmt.text)
+            return
+            
+        self.statements += 1
+        insertLine = self.render(stmt)
+        self.outFile.write(insertLine)
+        
+        if self.statements <= 2 and self.verbose:
+            print "Sample: %s"%insertLine[:150]
+        
+        
+class BatchInsertWriter(MySQLInsertWriter):
+    """
+    MySQLInsertWriter grouping consecutive inserts into the same table and
+    columns into multi row INSERT ... VALUES (...),(...) statements, which
+    MySQL imports many times faster than one statement per row. Whitespace
+    between grouped inserts is dropped and anything else ends the batch.
+    
+    Parameters
+    ----------
+    max_batch_bytes : int, default 1 MB
+        Largest batch statement, keep it below the max_allowed_packet of the
+        server (4 MB by default before MySQL 8.0). A single insert larger
+        than this is written on its own.
+    transaction_batches : int, default 0
+        Batches of a table written in one START TRANSACTION ... COMMIT, 0
+        writes no transaction statements.
+    disable_checks : boolean or collection of table names, default None
+        Tables, all of them with True, whose inserts are written with 
+        UNIQUE_CHECKS and FOREIGN_KEY_CHECKS off. The values before are kept
+        in @OLD_UC and @OLD_FK, mysqldump style, and restored after the last
+        batch of the table, so checks turned off for the whole file stay off.
+    kwargs : passed on to MySQLInsertWriter
+    """
+    
+    def __init__(self, outFile, oldDBName, newDBName, max_batch_bytes=1 << 20, transaction_batches=0,
+                                                                   disable_checks=None, **kwargs):
+        super(BatchInsertWriter, self).__init__(outFile, oldDBName, newDBName, **kwargs)
+        self.max_batch_bytes = max_batch_bytes
+        self.transaction_batches = transaction_batches
+        self.disable_checks = disable_checks
+        self.batches = 0
+        
+        self._batch = []            # values of the pending batch
+        self._batchPrefix = None
+        self._batchBytes = 0
+        self._tail = ''             # whitespace after the last insert of the batch
+        self._table = None          # table the transaction and checks are open for
+        self._checksOff = False
+        self._transBatches = 0      # batches written in the open transaction
+        self._batchResume = None    # resume point at the start of the pending batch
+        
+    def _checks_disabled(self, table):
+        if self.disable_checks is True:
+            return True
+        return bool(self.disable_checks) and table[-1] in self.disable_checks
+        
+    def text(self, event):
+        if not event.text.strip():
+            if self._batch:
+                self._tail = event.text
+            else:
+                self.outFile.write(event.text)
+            return
+        
+        self.end_table()
+        self.outFile.write(event.text)
+        
+    def insert(self, stmt):
+        if not self.rewrites(stmt) or _NOT_ROWS.search(stmt.values):
+            # Not a plain list of rows, it can not be merged
+            if self.rewrites(stmt) and stmt.table == self._table:
+                self.flush()
+            else:
+                self.end_table()
+            super(BatchInsertWriter, self).insert(stmt)
+            return
+        
+        prefix = self.prefix(stmt)
+        values = self.values(stmt)
+        if self._batch and (prefix != self._batchPrefix or 
+                            self._batchBytes + len(values) + 1 > self.max_batch_bytes):
+            self.flush()
+        if stmt.table != self._table:
+            self.end_table()
+            self._table = stmt.table
+            if self._checks_disabled(stmt.table):
+                self._checksOff = True
+                self.outFile.write("SET @OLD_UC=@@UNIQUE_CHECKS, UNIQUE_CHECKS=0;\n"
+                                   "SET @OLD_FK=@@FOREIGN_KEY_CHECKS, FOREIGN_KEY_CHECKS=0;\n")
+        
+        if not self._batch:
+            self._batchPrefix = prefix
+            self._batchBytes = len(prefix) + 1
+            self._batchResume = super(BatchInsertWriter, self).resume_point(stmt.start)
+        self._batch.append(values)
+        self._batchBytes += len(values) + 1
+        self._tail = ''
+        self.statements += 1
+        
+    def flush(self):
+        """Write the pending batch"""
+        
+        if not self._batch:
+            return
+        
+        if self.transaction_batches and not self._transBatches:
+            self.outFile.write("START TRANSACTION;\n")
+        batchStmt = self._batchPrefix + ','.join(self._batch) + ';'
+        self.outFile.write(batchStmt)
+        self.outFile.write(self._tail if '\n' in self._tail else self._tail + '\n')
+        self.batches += 1
+        
+        if self.batches <= 2 and self.verbose:
+            print "Sample: %s"%batchStmt[:150]
+        
+        if self.transaction_batches:
+            self._transBatches += 1
+            if self._transBatches >= self.transaction_batches:
+                self.outFile.write("COMMIT;\n")
+                self._transBatches = 0
             
-        columns    = ['`'+col.strip().strip('"')+'`' for col in colsLine.split(',')]
+        self._batch = []
+        self._tail = ''
+        
+    def end_table(self):
+        """Write the pending batch, commit and restore the checks"""
+        
+        self.flush()
+        if self._transBatches:
+            self.outFile.write("COMMIT;\n")
+            self._transBatches = 0
+        if self._checksOff:
+            self.outFile.write("SET UNIQUE_CHECKS=@OLD_UC, FOREIGN_KEY_CHECKS=@OLD_FK;\n")
+            self._checksOff = False
+        self._table = None
+        
+    def close(self):
+        self.end_table()
+        return self.outFile
+        
+    def state(self):
+        state = super(BatchInsertWriter, self).state()
+        state.update(batches=self.batches, table=self._table, checksOff=self._checksOff,
+                     transBatches=self._transBatches)
+        return state
+        
+    def restore(self, state):
+        super(BatchInsertWriter, self).restore(state)
+        self.batches = state['batches']
+        self._table = tuple(state['table']) if state['table'] is not None else None
+        self._checksOff = state['checksOff']
+        self._transBatches = state['transBatches']
+        
+    def resume_point(self, offset):
+        # The pending batch is not written yet, resume from its first insert
+        if self._batch:
+            return self._batchResume
+        return super(BatchInsertWriter, self).resume_point(offset)
+        
+        
+class DumpCheckpoint(object):
+    """
+    State file of a resumable transform of inputPath into outputPath. It
+    records the input byte offset to continue from, the statement count and
+    the output position up to which the output is final, and the writer
+    state. A run resuming from it truncates the output to that position,
+    restores the writer and continues from that offset, so the final output
+    is the one of an uninterrupted run.
+    
+    save() fsyncs the output before it writes the state to a temporary file
+    that is fsynced and renamed over path, so the state file is always whole
+    and never points past output that is not on disk.
+    
+    Parameters
+    ----------
+    path : string
+        State file, loaded if it exists. A state written for another input 
+        file or input size, or an output shorter than its position, raises
+        ValueError.
+    inputPath, outputPath : string
+    every_statements : int, default 100000
+        Statements between checkpoints, None for no statement limit.
+    every_seconds : float, default 30
+        Seconds between checkpoints, None for no time limit.
+    """
+    
+    def __init__(self, path, inputPath, outputPath, every_statements=100000, every_seconds=30):
+        self.path = path
+        self.inputPath = os.path.abspath(inputPath)
+        self.outputPath = os.path.abspath(outputPath)
+        self.inputSize = os.path.getsize(inputPath)
+        self.every_statements = every_statements
+        self.every_seconds = every_seconds
+        self.state = None
+        self._lastStatements = 0
+        self._lastTime = time.time()
+        
+        if os.path.exists(path):
+            with open(path, 'r') as stateFile:
+                state = json.load(stateFile)
+            if state['input_path'] != self.inputPath or state['input_size'] != self.inputSize:
+                raise ValueError("Checkpoint %s is for %s of %s bytes, not %s"
+                                 %(path, state['input_path'], state['input_size'], self.inputPath))
+            if (state['output_path'] != self.outputPath or not os.path.exists(outputPath) or 
+                    os.path.getsize(outputPath) < state['output_position']):
+                raise ValueError("Checkpoint %s needs the first %s bytes of the output %s"
+                                 %(path, state['output_position'], state['output_path']))
+            self.state = state
+            self._lastStatements = state['statements']
             
-        #except Exception as e:
-            #print e
-            #print "\nPlease check file for format inconsistencies"
-            #raise e
+    @property
+    def resuming(self):
+        return self.state is not None
+        
+    def due(self, statements):
+        """True when a checkpoint is due with statements written"""
+        
+        if self.every_statements and statements - self._lastStatements >= self.every_statements:
+            return True
+        return bool(self.every_seconds) and time.time() - self._lastTime >= self.every_seconds
+        
+    def save(self, state, outFile, statements=None):
+        """
+        Make the output durable, then write state as the checkpoint. The
+        next one is due every_statements after statements, the count 
+        written so far, which is ahead of state['statements'] when the 
+        state resumes from a pending batch.
+        """
+        
+        outFile.flush()
+        os.fsync(outFile.fileno())
+        
+        state = dict(state, input_path=self.inputPath, input_size=self.inputSize, 
+                     output_path=self.outputPath)
+        tmpPath = self.path + '.tmp'
+        with open(tmpPath, 'w') as stateFile:
+            json.dump(state, stateFile)
+            stateFile.flush()
+            os.fsync(stateFile.fileno())
+        os.rename(tmpPath, self.path)
+        
+        self._lastStatements = statements if statements is not None else state['statements']
+        self._lastTime = time.time()
+        
+    def _truncate(self, outFile):
+        outFile.seek(self.state['output_position'])
+        outFile.truncate()
+        
+    def resume(self, inputFile, writer):
+        """
+        Seek inputFile to the checkpoint, truncate the output of writer to it
+        and restore the writer. Returns the input offset.
+        """
+        
+        if self.state.get('ranges') is not None:
+            raise ValueError("Checkpoint %s was written by a parallel run, resume it with "
+                             "workers above 1"%self.path)
+        inputFile.seek(self.state['input_offset'])
+        self._truncate(writer.outFile)
+        writer.restore(self.state['writer'])
+        return self.state['input_offset']
+        
+    def resume_parallel(self, outFile):
+        """
+        Truncate outFile to the checkpoint of a parallel run. Returns the
+        byte ranges of that run, the input offset and the statement count.
+        """
+        
+        if self.state.get('ranges') is None:
+            raise ValueError("Checkpoint %s was written by a run in one process, resume it "
+                             "without workers"%self.path)
+        self._truncate(outFile)
+        return ([tuple(r) for r in self.state['ranges']], self.state['input_offset'],
+                self.state['statements'])
+        
+    def clear(self):
+        """Remove the state file once the output is complete"""
+        
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.state = None
+        
+        
+def _feed(tokenizer, writer, checkpoint=None):
+    """doc string"""
+    
+    for event in tokenizer:
+        if type(event) is InsertStatement:
+            writer.insert(event)
+            if checkpoint is not None and checkpoint.due(writer.statements):
+                checkpoint.save(writer.resume_point(event.end), writer.outFile, 
+                                writer.statements)
+        else:
+            writer.text(event)
             
-        bStmtList[0] = bStmtList[0].replace('"','')
+    return writer.close()
+    
+
+def transform_dump(inputFile, writer, buffer_size=1 << 20, backslash_escapes=False, 
+                                                                   checkpoint=None):
+    """
+    Stream the SQLDumpTokenizer events of inputFile to writer, a DumpWriter.
+    Returns what writer.close() returns. With a DumpCheckpoint the progress
+    is checkpointed, and a checkpoint it loaded is resumed from.
+    """
+    
+    offset = 0
+    if checkpoint is not None and checkpoint.resuming:
+        offset = checkpoint.resume(inputFile, writer)
+    return _feed(SQLDumpTokenizer(inputFile, buffer_size=buffer_size, 
+                                  backslash_escapes=backslash_escapes, offset=offset), 
+                 writer, checkpoint)
+
+
+class _RangeFile(object):
+    """Read only file object over bytes start to end of fileobj"""
+    
+    def __init__(self, fileobj, start, end):
+        fileobj.seek(start)
+        self.fileobj = fileobj
+        self.remaining = end - start
         
-        if upCaseTN:
-            bStmtList[0] = bStmtList[0].replace(tableName, tableName.upper())
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fileobj.read(size)
+        self.remaining -= len(data)
+        return data
         
-        insertLine = bStmtList[0] + '(' + ','.join(columns) + ')' + ' VALUES(' + insertList[1]
         
-        if strip_cast_stmts:
-            castStmtLoc = insertLine.find(', cast(')
-            if castStmtLoc != -1:
-                if not castWarn:
-                    castWarn = True
-                    print "Nested SQL Syntax 'CAST' found in insert statement"
-                    
-                if count == 1:
-                    print "Stripping CAST statements from file..."
-                insertLine = _strip_cast_stmts(insertLine)
+def dump_ranges(inputPath, parts):
+    """
+    Split the dump inputPath into up to parts (start, end) byte ranges of
+    about the same size. A range ends after a ; closing a line that is 
+    followed by an INSERT statement, found by searching a memory map of the
+    file from each split point. The ranges cover the whole file.
+    """
+    
+    size = os.path.getsize(inputPath)
+    if size == 0 or parts < 2:
+        return [(0, size)]
+    
+    bounds = [0]
+    with open(inputPath, 'rb') as inputFile:
+        mm = mmap.mmap(inputFile.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for i in xrange(1, parts):
+                m = _RANGE_BOUNDARY.search(mm, max(size * i // parts, bounds[-1]))
+                if m is None:
+                    break
+                if m.end() > bounds[-1]:
+                    bounds.append(m.end())
+        finally:
+            mm.close()
+    bounds.append(size)
+    
+    return zip(bounds[:-1], bounds[1:])
+    
+
+def _transform_range(task):
+    """Process pool worker of transform_dump_parallel, one byte range to a part file"""
+    
+    inputPath, start, end, partPath, writer_class, writer_kwargs, buffer_size, backslash_escapes = task
+    
+    with open(inputPath, 'rb') as inputFile:
+        with open(partPath, 'wb') as partFile:
+            tokenizer = SQLDumpTokenizer(_RangeFile(inputFile, start, end), buffer_size=buffer_size,
+                                                      backslash_escapes=backslash_escapes, offset=start)
+            writer = writer_class(partFile, **writer_kwargs)
+            _feed(tokenizer, writer)
             
-        outFile.write(insertLine)
+    return partPath, tokenizer.complete, writer.statements
+    
+
+def _transform_span(inputPath, start, stops, writer, buffer_size, backslash_escapes):
+    """
+    Transform inputPath from start up to the first offset of stops that a
+    statement starts at, or to the end of the file. Returns that offset.
+    """
+    
+    stops = set(stops)
+    size = os.path.getsize(inputPath)
+    with open(inputPath, 'rb') as inputFile:
+        for event in SQLDumpTokenizer(_RangeFile(inputFile, start, size), buffer_size=buffer_size,
+                                      backslash_escapes=backslash_escapes, offset=start):
+            if event.start in stops:
+                writer.close()
+                return event.start
+            if type(event) is InsertStatement:
+                writer.insert(event)
+            else:
+                writer.text(event)
+    writer.close()
+    
+    return size
+    
+
+def transform_dump_parallel(inputPath, outFile, writer_class, writer_kwargs=None, workers=None,
+                            buffer_size=1 << 20, backslash_escapes=False, min_range=64 << 20,
+                                                                             checkpoint=None):
+    """
+    transform_dump of the file inputPath with a process pool. The dump is 
+    split with dump_ranges, every range is transformed by a worker with 
+    its own writer_class(partFile, **writer_kwargs) into a part file, and 
+    the parts are appended to outFile in order as they complete.
+    
+    Every range but the last has to end outside of any statement, string or
+    comment, which by induction from the start of the file means each worker
+    tokenized its range as the serial run would. When one does not, as when
+    a string holds a line starting with INSERT INTO, the file is transformed
+    here from the start of that range up to the first later range start
+    found on a statement boundary, and the parts of the ranges in between
+    are dropped. The output is always that of the serial run, for writers
+    whose output for an event does not depend on the events before it.
+    
+    Parameters
+    ----------
+    inputPath : string
+    outFile : file object
+        Opened for writing at the position the output goes, part files are
+        written next to it.
+    writer_class : DumpWriter subclass
+        Instantiated in every worker, so writer_kwargs must be picklable.
+    workers : int, default None
+        Processes of the pool, default the CPU count.
+    min_range : int, default 64 MB
+        Smallest byte range given to a worker.
+    checkpoint : DumpCheckpoint, default None
+        Checkpointed when due after a range is appended, with the ranges, so
+        a resumed run transforms the rest of the same ranges.
+    """
+    
+    writer_kwargs = writer_kwargs or {}
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    
+    size = os.path.getsize(inputPath)
+    # Several ranges per worker, so a slow range does not leave the others idle
+    parts = min(workers * 4, size // max(1, min_range))
+    if workers < 2 or parts < 2:
+        with open(inputPath, 'rb') as inputFile:
+            return transform_dump(inputFile, writer_class(outFile, **writer_kwargs),
+                                  buffer_size=buffer_size, backslash_escapes=backslash_escapes,
+                                  checkpoint=checkpoint)
+    
+    resume = 0      # input offset the output has been written up to
+    statements = 0
+    if checkpoint is not None and checkpoint.resuming:
+        ranges, resume, statements = checkpoint.resume_parallel(outFile)
+    else:
+        ranges = dump_ranges(inputPath, parts)
+    partDir = None
+    if getattr(outFile, 'name', None) and os.path.exists(outFile.name):
+        partDir = os.path.dirname(os.path.abspath(outFile.name))
+    tmpDir = tempfile.mkdtemp(prefix='x_form_', dir=partDir)
+    tasks = [(inputPath, start, end, os.path.join(tmpDir, 'range_%06d.part'%i), writer_class, 
+              writer_kwargs, buffer_size, backslash_escapes) for i, (start, end) in enumerate(ranges)]
+    
+    starts = [start for start, end in ranges]
+    todo = [i for i, start in enumerate(starts) if start >= resume]
+    
+    pool = multiprocessing.Pool(max(1, min(workers, len(todo))))
+    try:
+        results = pool.imap(_transform_range, [tasks[i] for i in todo])
+        for i, (partPath, rangeComplete, rangeStatements) in zip(todo, results):
+            if starts[i] < resume:
+                # Already transformed here after a range that was not complete
+                os.remove(partPath)
+                continue
+            if not rangeComplete and i < len(tasks) - 1:
+                os.remove(partPath)
+                writer = writer_class(outFile, **writer_kwargs)
+                resume = _transform_span(inputPath, starts[i], starts[i + 1:], writer, 
+                                         buffer_size, backslash_escapes)
+                statements += writer.statements
+                print "Range %s of %s did not end on a statement boundary, transformed "\
+                      "bytes %s to %s in one process"%(i, inputPath, starts[i], resume)
+            else:
+                with open(partPath, 'rb') as partFile:
+                    shutil.copyfileobj(partFile, outFile, 1 << 20)
+                os.remove(partPath)
+                resume = ranges[i][1]
+                statements += rangeStatements
+            if checkpoint is not None and checkpoint.due(statements):
+                checkpoint.save({'input_offset': resume, 'output_position': outFile.tell(),
+                                 'statements': statements, 'writer': None, 'ranges': ranges},
+                                outFile)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        shutil.rmtree(tmpDir, ignore_errors=True)
         
-        if count <= 2:
-            print "Sample: %s"%insertLine[:150]
+    return outFile
 
 
+def x_form_insert(inputFile, outFile, ddlDict, oldDBName, newDBName, dtype_map,
+                              strip_cast_stmts=False, fk_cks_off=True, multiVal=False, upCaseTN=False,
+                          writer=None, buffer_size=1 << 20, backslash_escapes=False, workers=None,
+                                      batch_bytes=None, batch_transactions=0, batch_disable_checks=None,
+                                                                                    checkpoint=None):
+    """
+    Rewrite the INSERT statements of inputFile for MySQL into outFile with a
+    MySQLInsertWriter, or with writer when given. The file is tokenized in 
+    one streaming pass, see SQLDumpTokenizer, so statements may span lines.
+    With workers above 1 and no writer, the file is transformed by that many
+    processes, see transform_dump_parallel.
+    
+    With batch_bytes, consecutive inserts into a table are merged into multi 
+    row inserts of at most batch_bytes by a BatchInsertWriter, which takes
+    batch_transactions and batch_disable_checks as transaction_batches and 
+    disable_checks. Batches end at the range boundaries of a parallel run.
+    
+    With a DumpCheckpoint for inputFile and outFile the progress is 
+    checkpointed, and when it loaded a checkpoint outFile, opened for 
+    update, is truncated to it and the transform continues from there. The
+    statements written before the inserts are then not written again.
+    """
+    
+    # TODO: Add a database name old to new mapping dictionary
+    # IN WORK: Verify values against the ddlDict dtypes, see _verify_values
+    
+    print "\nParsing export file to generate new insert statements..."
+    print "Old Database Name: %s will be replaced with %s"%(oldDBName, newDBName) 
+    
+    if fk_cks_off and not (checkpoint is not None and checkpoint.resuming):
+        outFile = _set_fk_checks(ck_fk=False, outFile=outFile)
+        # Make sure there is a space between alter and insert statements
+        outFile.write("\n\n")
+        
+    writer_class = MySQLInsertWriter
+    writer_kwargs = dict(oldDBName=oldDBName, newDBName=newDBName, strip_cast_stmts=strip_cast_stmts,
+                                                             multiVal=multiVal, upCaseTN=upCaseTN)
+    if batch_bytes:
+        writer_class = BatchInsertWriter
+        writer_kwargs.update(max_batch_bytes=batch_bytes, transaction_batches=batch_transactions, 
+                             disable_checks=batch_disable_checks)
+    
+    if workers and workers > 1 and writer is None and os.path.isfile(getattr(inputFile, 'name', '')):
+        print "Transforming with %s processes"%workers
+        writer_kwargs['verbose'] = False
+        transform_dump_parallel(inputFile.name, outFile, writer_class, writer_kwargs, 
+                                workers=workers, buffer_size=buffer_size, 
+                                backslash_escapes=backslash_escapes, checkpoint=checkpoint)
+    else:
+        if writer is None:
+            writer = writer_class(outFile, **writer_kwargs)
+        transform_dump(inputFile, writer, buffer_size=buffer_size, 
+                       backslash_escapes=backslash_escapes, checkpoint=checkpoint)
+
     if fk_cks_off:
         outFile = _set_fk_checks(ck_fk=True, outFile=outFile)
     
@@ -568,6 +1516,63 @@ def alt_table_import(altFile, ddlDict, dtype_map):
             altFile.write('\n\n\n')
     
     return altFile
+
+
+def _mysql_dtype(from_dtype, dtype_map):
+    """MySQL type of a pg_ddl_parser column type, length or precision kept"""
+    
+    base, paren, args = from_dtype.strip().lower().partition('(')
+    if base.endswith('[]'):
+        base, paren = 'array', ''
+    mapping = dict((key.strip(), value) for key, value in dtype_map.items())
+    to_dtype = mapping.get(base)
+    if to_dtype is None:
+        # pg_ddl_parser keeps the first word of multi word types
+        names = [key for key in mapping if key.split()[0] == base]
+        if len(names) != 1:
+            raise ValueError("No MySQL type mapped for PostgreSQL type %s"%from_dtype)
+        to_dtype = mapping[names[0]]
+    
+    if paren and '(' not in to_dtype:
+        to_dtype = to_dtype + '(' + args
+    elif to_dtype == 'VARCHAR':
+        # A MySQL VARCHAR needs a length
+        to_dtype = 'LONGTEXT'
+    return to_dtype
+
+
+def mysql_create_table(table, tableDict, dtype_map, dbName=None):
+    """
+    CREATE TABLE statement for MySQL of a pg_ddl_parser table definition,
+    with the column types mapped through dtype_map (pg_mysql_dtype_map).
+    Only columns, NOT NULL, AUTO_INCREMENT and the primary key are kept,
+    defaults and foreign keys are not.
+    """
+    
+    colDefs = []
+    pkCols  = []
+    for i, col in enumerate(tableDict['columns']):
+        col = '`' + col + '`'
+        dtype = _mysql_dtype(tableDict['dtypes'][i], dtype_map)
+        if tableDict['pk'][i]:
+            pkCols.append(col)
+            dtype = dtype.replace(' UNIQUE', '')
+        if tableDict['auto_incr'][i] and dtype.find('AUTO_INCREMENT') == -1:
+            dtype = dtype + ' NOT NULL AUTO_INCREMENT'
+            if not tableDict['pk'][i]:
+                dtype = dtype + ' UNIQUE'
+        if not tableDict['nullable'][i] and dtype.find('NOT NULL') == -1:
+            dtype = dtype + ' NOT NULL'
+        colDefs.append('%s %s'%(col, dtype))
+    
+    if pkCols:
+        colDefs.append('PRIMARY KEY (%s)'%', '.join(pkCols))
+    
+    if dbName is not None:
+        table = '`%s`.`%s`'%(dbName, table)
+    else:
+        table = '`%s`'%table
+    return 'CREATE TABLE %s (\n    %s\n)'%(table, ',\n    '.join(colDefs))
     
 
 #
@@ -582,18 +1587,39 @@ def pg_db_migration():
         ddlDict = pg_ddl_parser(ddlFile)
 
     #
-    with open(os.path.join(importDir, importFile), 'w') as altFile:
-        altFile = _set_fk_checks(ck_fk=False, outFile=altFile)
-        altFile = alt_table_import(altFile=altFile, ddlDict=ddlDict, 
-                                   dtype_map=pg_mysql_dtype_map())
+    inputPath  = os.path.join(exportDir, exportDataFile)
+    outputPath = os.path.join(importDir, importFile)
+    checkpoint = None
+    if checkpointStatements or checkpointSeconds:
+        checkpoint = DumpCheckpoint(outputPath + '.ckpt', inputPath, outputPath,
+                                    every_statements=checkpointStatements, 
+                                    every_seconds=checkpointSeconds)
+    
+    if checkpoint is not None and checkpoint.resuming:
+        print "\nResuming from checkpoint %s at input byte %s, %s statements written"%(
+              checkpoint.path, checkpoint.state['input_offset'], checkpoint.state['statements'])
+        altFile = open(outputPath, 'r+')
+    else:
+        altFile = open(outputPath, 'w')
+        
+    with altFile:
+        if checkpoint is None or not checkpoint.resuming:
+            altFile = _set_fk_checks(ck_fk=False, outFile=altFile)
+            altFile = alt_table_import(altFile=altFile, ddlDict=ddlDict, 
+                                       dtype_map=pg_mysql_dtype_map())
 
-        with open(os.path.join(exportDir, exportDataFile), 'r') as inputFile:
+        with open(inputPath, 'r') as inputFile:
             altFile = x_form_insert(inputFile=inputFile, outFile=altFile, ddlDict=ddlDict, oldDBName=oldDBName,
                                     newDBName=newDBName, dtype_map=pg_mysql_dtype_map(), strip_cast_stmts=False, 
-                                    fk_cks_off=False)
+                                    fk_cks_off=False, workers=workers, batch_bytes=batchBytes,
+                                    batch_transactions=batchTransactions,
+                                    batch_disable_checks=batchDisableChecks, checkpoint=checkpoint)
         
         altFile = _set_fk_checks(ck_fk=True, outFile=altFile)
     
+    if checkpoint is not None:
+        checkpoint.clear()
+    
     return
 
 
@@ -618,7 +1644,9 @@ def dirby_db_migration():
             with open(os.path.join(exportDir, _file), 'r') as inputFile:
                 altFile = x_form_insert(inputFile=inputFile, outFile=altFile, ddlDict=None, oldDBName=oldDBName,
                                         newDBName=newDBName, dtype_map=None, strip_cast_stmts=True, 
-                                        fk_cks_off=False)
+                                        fk_cks_off=False, workers=workers, batch_bytes=batchBytes,
+                                        batch_transactions=batchTransactions,
+                                        batch_disable_checks=batchDisableChecks)
 
             altFile = _set_fk_checks(ck_fk=True, outFile=altFile)
         
@@ -645,17 +1673,50 @@ def pg_mysql_db_migration():
             with open(os.path.join(exportDir, exportDataFile), 'r') as inputFile:
                 altFile = x_form_insert(inputFile=inputFile, outFile=altFile, ddlDict=None, oldDBName=oldDBName,
                                         newDBName=newDBName, dtype_map=None, strip_cast_stmts=False, 
-                                        fk_cks_off=False, upCaseTN=True)
+                                        fk_cks_off=False, upCaseTN=True, workers=workers,
+                                        batch_bytes=batchBytes, 
+                                        batch_transactions=batchTransactions,
+                                        batch_disable_checks=batchDisableChecks)
 
             altFile = _set_fk_checks(ck_fk=True, outFile=altFile)
     
     return
 
+
+def pg_mysql_direct_migration():
+    """
+    Copy the tables of exportDDLFile from sourceURL into newDBName at
+    targetURL without export and import files, see sqlmigrate.
+    Running it again after a failure resumes from checkpointFile.
+    """
+    
+    import sqlmigrate
+    
+    with open(os.path.join(exportDir, exportDDLFile), 'r') as ddlFile:
+        ddlDict = pg_ddl_parser(ddlFile)
+    
+    migration = sqlmigrate.DirectMigration(sourceURL, targetURL, ddlDict, 
+                                           dtype_map=pg_mysql_dtype_map(), 
+                                           source_schema=sourceSchema, 
+                                           target_schema=newDBName,
+                                           checkpoint_path=os.path.join(importDir, checkpointFile),
+                                           chunksize=copyChunksize, workers=copyWorkers)
+    try:
+        stats = migration.run()
+    finally:
+        migration.close()
+    
+    for table, tableStats in stats.items():
+        print "%s: %s rows in %.1f seconds"%(table, tableStats['rows'], tableStats['seconds'])
+    
+    return stats
+
     
-beginTime = time.time()     
-dirby_db_migration1()
-endTime = time.time()
+if __name__ == '__main__':
+    beginTime = time.time()     
+    dirby_db_migration()
+    endTime = time.time()
 
-#print "\nOutput file written to: " + outputPath
-#print "\nNumber of lines transformed: " + str(count)
-print "\nThis operation took "+str(float(endTime - beginTime))+" seconds to complete"
+    #print "\nOutput file written to: " + outputPath
+    #print "\nNumber of lines transformed: " + str(count)
+    print "\nThis operation took "+str(float(endTime - beginTime))+" seconds to complete"
@@ -3,15 +3,24 @@
 # Pandas SQL extention lib for writing dataframes in bulk vs single insert.
 # A few other utility type methods as well
 
+import os
 import re
+import Queue
+import decimal
+import shutil
+import itertools
 import warnings
+import tempfile
+import threading
 import traceback
+from timeit import default_timer
+from contextlib import contextmanager
 from datetime import datetime, date
 
 import numpy as np
 import pandas.lib as lib
 import pandas.core.common as com
-from pandas.compat import map, zip, string_types
+from pandas.compat import map, zip, string_types, OrderedDict
 from pandas.core.api import DataFrame, Series
 from pandas.core.common import isnull
 from pandas.core.base import PandasObject
@@ -20,9 +29,21 @@ from pandas.tseries.tools import to_datetime
 from sqlalchemy import exc
 from sqlalchemy.schema import MetaData
 
+try:
+    # Standard library on Python 3, the futures package on Python 2
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
 
 #------------------------------------------------------------------------------
 
+# DBAPI paramstyle to the positional marker used by SQLTable's positional
+# insert path. psycopg2/pymysql (pyformat) take %s, cx_Oracle (named) :1
+_POSITIONAL_MARKERS = {'qmark': '?', 'format': '%s', 'pyformat': '%s', 
+                       'numeric': ':%d', 'named': ':%d'}
+
+
 def _convert_params(sql, params):
     """convert sql and params args to DBAPI2.0 compliant format"""
     args = [sql]
@@ -78,6 +99,12 @@ def _wrap_result(data, columns, index_col=None, coerce_float=True,
     frame = DataFrame.from_records(data, columns=columns,
                                    coerce_float=coerce_float)
 
+    return _finish_frame(frame, index_col=index_col, parse_dates=parse_dates)
+
+
+def _finish_frame(frame, index_col=None, parse_dates=None):
+    """Parse the date columns and set the index of a query result frame"""
+    
     _parse_date_columns(frame, parse_dates)
 
     if index_col is not None:
@@ -86,6 +113,633 @@ def _wrap_result(data, columns, index_col=None, coerce_float=True,
     return frame
 
 
+# Rows fetched per fetchmany by the columnar read path
+_COLUMNAR_FETCH_SIZE = 10000
+
+_BUFFER_DTYPES = {'i': np.int64, 'f': np.float64, 'b': np.bool_, 
+                  'M': 'M8[us]', 'O': object}
+
+# numpy dtype.kind of a finished buffer back to its buffer kind
+_BUFFER_KINDS = {'i': 'i', 'f': 'f', 'b': 'b', 'M': 'M'}
+
+# Python types a buffer kind holds as from_records would type them, NULL 
+# included. numpy casts anything else it can unsafely (a float truncated
+# into an int buffer, an int into a bool buffer). Plain dates stay objects,
+# from_records does not convert them
+_NONE_TYPE = type(None)
+_BUFFER_TYPES = {'i': frozenset([int, long]),
+                 'f': frozenset([float, int, long, decimal.Decimal, _NONE_TYPE]),
+                 'b': frozenset([bool]),
+                 'M': frozenset([datetime, _NONE_TYPE])}
+
+
+class _ColumnBuffer(object):
+    """
+    Growable typed buffer for one result column. It starts with the numpy 
+    type expected for the column and widens when a batch does not fit,
+    int to float when NULLs, floats or Decimals show up (as from_records 
+    would) and anything else to object.
+    """
+    
+    def __init__(self, kind, capacity):
+        self.kind = kind
+        self.values = np.empty(max(capacity, 1), dtype=_BUFFER_DTYPES[kind])
+        self.size = 0
+
+    def _reserve(self, n):
+        needed = self.size + n
+        if needed > len(self.values):
+            values = np.empty(max(needed, 2 * len(self.values)), dtype=self.values.dtype)
+            values[:self.size] = self.values[:self.size]
+            self.values = values
+
+    def _widen(self, kind):
+        values = np.empty(len(self.values), dtype=_BUFFER_DTYPES[kind])
+        values[:self.size] = self.values[:self.size].astype(values.dtype)
+        self.values = values
+        self.kind = kind
+
+    def _fits(self, values):
+        """The kind values need, the buffer kind when they fit in it"""
+        
+        if self.kind == 'O':
+            return 'O'
+        types = set(map(type, values))
+        if types <= _BUFFER_TYPES[self.kind]:
+            if self.kind == 'M' and any(getattr(v, 'tzinfo', None) is not None for v in values):
+                return 'O'
+            return self.kind
+        if self.kind == 'i' and types <= _BUFFER_TYPES['f']:
+            return 'f'
+        return 'O'
+        
+    def extend(self, values):
+        n = len(values)
+        self._reserve(n)
+        kind = self._fits(values)
+        if kind != self.kind:
+            self._widen(kind)
+        try:
+            self.values[self.size:self.size + n] = values
+        except (TypeError, ValueError, OverflowError):
+            self._widen('O')
+            self.values[self.size:self.size + n] = values
+        self.size += n
+
+    def finish(self):
+        return self.values[:self.size]
+
+
+def _value_kind(value, coerce_float=True):
+    """Buffer kind for a python value returned by the driver"""
+    
+    if isinstance(value, bool):
+        return 'b'
+    if isinstance(value, (int, long)):
+        return 'i'
+    if isinstance(value, float):
+        return 'f'
+    if isinstance(value, decimal.Decimal):
+        return 'f' if coerce_float else 'O'
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return 'M'
+    return 'O'
+
+
+def _columnar_frame(result, columns, kinds=None, coerce_float=True, limit=None):
+    """
+    Fetch up to limit rows (all when None) of the result straight into 
+    typed column buffers and return them as a DataFrame, or None when the
+    result is exhausted. Only one fetchmany batch of row tuples is alive at
+    any time. kinds gives the buffer kind per column, None entries are 
+    inferred from the first non NULL value of the first batch.
+    """
+    
+    if len(set(columns)) != len(columns):
+        # Duplicate labels can not be built from a dict of columns
+        data = result.fetchall() if limit is None else result.fetchmany(limit)
+        if not data:
+            return None
+        return DataFrame.from_records(data, columns=columns, coerce_float=coerce_float)
+    
+    fetch_size = _COLUMNAR_FETCH_SIZE if limit is None else min(limit, _COLUMNAR_FETCH_SIZE)
+    buffers = None
+    fetched = 0
+    
+    while limit is None or fetched < limit:
+        rows = result.fetchmany(fetch_size if limit is None 
+                                else min(fetch_size, limit - fetched))
+        if not rows:
+            break
+        
+        if buffers is None:
+            kinds = list(kinds) if kinds is not None else [None] * len(columns)
+            for i, kind in enumerate(kinds):
+                if kind is None:
+                    first = next((row[i] for row in rows if row[i] is not None), None)
+                    kinds[i] = 'O' if first is None else _value_kind(first, coerce_float)
+            buffers = [_ColumnBuffer(kind, limit or fetch_size) for kind in kinds]
+
+        for buf, values in zip(buffers, zip(*rows)):
+            buf.extend(values)
+        fetched += len(rows)
+
+    if buffers is None:
+        return None
+
+    return DataFrame(OrderedDict(zip(columns, [buf.finish() for buf in buffers])), 
+                     columns=columns)
+
+
+def _driver_columnar_frame(result):
+    """
+    Use the drivers own columnar fetch when it has one (turbodbc offers 
+    Arrow and NumPy fetches), otherwise None.
+    """
+    
+    cursor = getattr(result, 'cursor', None)
+    if hasattr(cursor, 'fetchallarrow'):
+        return cursor.fetchallarrow().to_pandas()
+    if hasattr(cursor, 'fetchallnumpy'):
+        return DataFrame(OrderedDict(cursor.fetchallnumpy()))
+    return None
+
+
+def _read_columnar(result, columns, kinds=None, coerce_float=True):
+    """Whole result set read through the columnar path"""
+    
+    frame = _driver_columnar_frame(result)
+    if frame is None:
+        frame = _columnar_frame(result, columns, kinds=kinds, coerce_float=coerce_float)
+    if frame is None:
+        frame = DataFrame.from_records([], columns=columns, coerce_float=coerce_float)
+        
+    return frame
+
+
+
+def _csv_quote(value):
+    """Quoted utf-8 CSV field"""
+    
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    elif not isinstance(value, str):
+        value = str(value)
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _csv_fields(column, null):
+    """
+    CSV fields of a Series. Every non null value is quoted, so only the 
+    unquoted null sentinel loads as NULL and text equal to the sentinel
+    round trips as text. Floats are written with repr to keep full precision.
+    """
+    
+    mask = isnull(column.values)
+    if com.is_float_dtype(column):
+        return [null if m else repr(float(v)) for v, m in zip(column.values, mask)]
+    
+    return [null if m else _csv_quote(v) for v, m in zip(column.astype(object).values, mask)]
+
+
+
+class _FrameCSVStream(object):
+    """
+    File like object that renders a DataFrame to CSV lazily, chunksize 
+    rows at a time, so a driver can consume the whole frame through a 
+    single COPY without the full CSV text ever being held in memory.
+    Null values are written as the unquoted null sentinel and every
+    other value quoted, see _csv_fields.
+    """
+    
+    def __init__(self, frame, chunksize, null):
+        self.frame = frame
+        self.chunksize = chunksize
+        self.null = null
+        self.nrows = len(frame)
+        self._start = 0
+        self._buffer = ''
+        self._pos = 0
+
+    def _render_next(self):
+        end = min(self._start + self.chunksize, self.nrows)
+        chunk = self.frame.iloc[self._start:end]
+        fields = [_csv_fields(chunk.iloc[:, i], self.null) for i in range(chunk.shape[1])]
+        self._start = end
+        return ''.join([','.join(row) + '\n' for row in zip(*fields)])
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            parts = [self._buffer[self._pos:]]
+            while self._start < self.nrows:
+                parts.append(self._render_next())
+            self._buffer, self._pos = '', 0
+            return ''.join(parts)
+
+        if self._pos >= len(self._buffer):
+            if self._start >= self.nrows:
+                return ''
+            self._buffer, self._pos = self._render_next(), 0
+
+        data = self._buffer[self._pos:self._pos + size]
+        self._pos += len(data)
+        return data
+        
+
+
+# Last converged adaptive chunksize per (engine url, table, insert method) so
+# repeated inserts start from a size already tuned for that dialect/table
+_ADAPTIVE_CHUNKSIZES = {}
+_ADAPTIVE_CHUNKSIZES_LOCK = threading.Lock()
+
+
+# Compiled INSERT statements keyed by (engine url, schema, table, kind,
+# columns, rows), least recently used dropped first. Chunks of a shape seen
+# before skip SQLAlchemy's compile, whose cost grows with the row count
+_STATEMENT_CACHE = OrderedDict()
+_STATEMENT_CACHE_SIZE = 512
+# Server side prepared statements kept per DBAPI connection, least recently
+# used ones are DEALLOCATEd past it
+_PREPARED_STATEMENTS_SIZE = 64
+_STATEMENT_CACHE_LOCK = threading.Lock()
+# Bumped per engine url and per table name by _clear_statement_cache. Server side
+# prepared statements live on the DBAPI connections, out of reach of a clear,
+# so they carry the generation they were prepared at and are redone when stale
+_STATEMENT_GENERATIONS = {}
+
+
+def _cached_statement(key, build):
+    """Statement for key from the cache, calling build() on a miss"""
+
+    with _STATEMENT_CACHE_LOCK:
+        stmt = _STATEMENT_CACHE.pop(key, None)
+        if stmt is not None:
+            _STATEMENT_CACHE[key] = stmt
+            return stmt
+
+    stmt = build()
+    with _STATEMENT_CACHE_LOCK:
+        _STATEMENT_CACHE[key] = stmt
+        while len(_STATEMENT_CACHE) > _STATEMENT_CACHE_SIZE:
+            _STATEMENT_CACHE.popitem(last=False)
+    return stmt
+
+
+def _clear_statement_cache(engine, table_name=None, schema=None, any_schema=False):
+    """
+    Drop the cached statements of a table that was created or dropped, or
+    with table_name None of every table of the engine. With any_schema the
+    statements of table_name in every schema are dropped, table_name 
+    matched case insensitively.
+    """
+
+    url = str(engine.url)
+    if table_name is None:
+        match = lambda k: k[0] == url
+        generation = (url,)
+    else:
+        if any_schema:
+            match = lambda k: k[0] == url and k[2].lower() == table_name.lower()
+        else:
+            match = lambda k: k[:3] == (url, schema, table_name)
+        generation = (url, table_name.lower())
+    with _STATEMENT_CACHE_LOCK:
+        for key in [k for k in _STATEMENT_CACHE if match(k)]:
+            del _STATEMENT_CACHE[key]
+        _STATEMENT_GENERATIONS[generation] = _STATEMENT_GENERATIONS.get(generation, 0) + 1
+
+
+def _statement_generation(key):
+    """Engine and table generation of a statement key, see _STATEMENT_GENERATIONS"""
+
+    with _STATEMENT_CACHE_LOCK:
+        return (_STATEMENT_GENERATIONS.get(key[:1], 0), 
+                _STATEMENT_GENERATIONS.get((key[0], key[2].lower()), 0))
+
+
+def _split_last_chunk(ranges):
+    """
+    Split a partial last chunk into power of two sized pieces, so every
+    statement has the full chunk size or one of a few sizes the statement 
+    cache keeps seeing, instead of a new size per insert.
+    """
+
+    if len(ranges) < 2:
+        return ranges
+
+    start_i, end_i = ranges[-1]
+    remainder = end_i - start_i
+    if remainder >= ranges[0][1] - ranges[0][0]:
+        return ranges
+
+    pieces = []
+    size = 1 << (remainder.bit_length() - 1)
+    while size:
+        if remainder & size:
+            pieces.append((start_i, start_i + size))
+            start_i += size
+        size >>= 1
+
+    return ranges[:-1] + pieces
+
+
+class _TableSchemaCache(object):
+    """
+    Process wide cache of reflected tables keyed by (engine url, schema, 
+    table). Saves the catalog round trips SQLAlchemy makes every time a 
+    SQLDatabase or SQLTable is built for a table that was already seen.
+    
+    Each entry holds a detached copy of the reflected Table (None when only 
+    existence is known), whether the table exists, and a dict of plans 
+    other code may hang off the reflected table. Only tables found to 
+    exist are kept, so a table created anywhere is seen at once. Entries 
+    expire after ttl seconds and are invalidated when the table is created
+    or dropped through this module, when DDL runs through 
+    SQLDatabase.execute, and when a read or insert fails on columns the 
+    cached table may lack. DDL through SQLDatabase.execute drops the 
+    tables it names, or every table of the engine when it names none that
+    can be parsed, see ddl_tables. Other DDL run elsewhere is only picked 
+    up once the ttl expires, so set ttl=0 to disable caching.
+    """
+    
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        
+    @staticmethod
+    def key(engine, table_name, schema=None):
+        return (str(engine.url), schema, table_name)
+        
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if default_timer() - entry['time'] > self.ttl:
+                del self._entries[key]
+                return None
+            return entry
+            
+    def put(self, key, table=None, exists=True):
+        if table is not None:
+            # Detach from the caller's MetaData so later reflection,
+            # clear() or create() on that MetaData cannot change the entry
+            table = table.tometadata(MetaData())
+        entry = {'table': table, 'exists': exists, 
+                 'time': default_timer(), 'plans': {}}
+        if self.ttl > 0 and exists:
+            with self._lock:
+                self._entries[key] = entry
+        return entry
+        
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            
+    def invalidate_name(self, engine, table_name):
+        """Drop the entries of table_name in every schema, matched case insensitively"""
+        
+        url, name = str(engine.url), table_name.lower()
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == url and k[2].lower() == name]:
+                del self._entries[key]
+            
+    def clear(self, engine=None):
+        with self._lock:
+            if engine is None:
+                self._entries.clear()
+            else:
+                url = str(engine.url)
+                for key in [k for k in self._entries if k[0] == url]:
+                    del self._entries[key]
+
+
+_SCHEMA_CACHE = _TableSchemaCache()
+
+
+def clear_schema_cache(engine=None, ttl=None):
+    """
+    Drop cached table reflections, for all engines or only engine. Call 
+    after DDL run outside of this module. A ttl in seconds replaces the 
+    cache lifetime, 0 disables caching.
+    """
+    _SCHEMA_CACHE.clear(engine)
+    if ttl is not None:
+        _SCHEMA_CACHE.ttl = ttl
+
+
+_DDL_STATEMENT = re.compile(r'\s*(?:CREATE|ALTER|DROP|RENAME|TRUNCATE|COMMENT)\b', re.I)
+_SQL_IDENT     = r'(?:"[^"]+"|`[^`]+`|\[[^\]]+\]|[\w$#@]+)'
+_SQL_NAME      = re.compile(r'%s(?:\s*\.\s*%s)*'%(_SQL_IDENT, _SQL_IDENT))
+_SQL_NAMES     = r'(?P<names>{0}(?:\s*,\s*{0})*)'.format(_SQL_NAME.pattern)
+_DDL_TABLES    = [re.compile(pattern.format(names=_SQL_NAMES, name=_SQL_NAME.pattern), re.I | re.S)
+                  for pattern in (
+    r'\s*(?:CREATE|DROP|ALTER)\s+(?:OR\s+REPLACE\s+)?(?:(?:GLOBAL|LOCAL|TEMP|TEMPORARY|'
+    r'UNLOGGED|MATERIALIZED|FOREIGN)\s+)*(?:TABLE|VIEW)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?'
+    r'(?:ONLY\s+)?{names}',
+    r'\s*TRUNCATE\s+(?:TABLE\s+)?(?:ONLY\s+)?{names}',
+    r'\s*RENAME\s+TABLES?\s+(?P<names>{name}\s+TO\s+{name}(?:\s*,\s*{name}\s+TO\s+{name})*)',
+    r'\s*(?:CREATE|DROP)\s+(?:UNIQUE\s+)?INDEX\b.*?\bON\s+(?:ONLY\s+)?(?P<names>{name})',
+    r'\s*COMMENT\s+ON\s+(?:TABLE|VIEW)\s+(?P<names>{name})',
+    r'\s*COMMENT\s+ON\s+COLUMN\s+(?P<column>{name})')]
+
+# Statements that only read, and the table DML statements write
+_READ_STATEMENT = re.compile(r'\s*(?:SELECT|SHOW|DESCRIBE|DESC|EXPLAIN)\b', re.I)
+_DML_TABLE     = re.compile(r'\s*(?:INSERT\s+(?:(?:IGNORE|LOW_PRIORITY|DELAYED|HIGH_PRIORITY)\s+)*'
+                            r'INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM|MERGE\s+INTO)\s+'
+                            r'(?:ONLY\s+)?(?P<name>%s)'%_SQL_NAME.pattern, re.I | re.S)
+
+
+def _unquote_name(name):
+    """Unquoted parts of a qualified SQL name"""
+    
+    return [part[1:-1] if part[0] in '"`[' else part 
+            for part in re.findall(_SQL_IDENT, name)]
+
+
+def ddl_tables(statement):
+    """
+    Names of the tables the DDL statement, a string or SQLAlchemy construct,
+    creates, alters or drops. None when it is not DDL, and an empty list 
+    for DDL naming no table that can be parsed.
+    """
+    
+    from sqlalchemy import Table, Index
+    from sqlalchemy.schema import DDLElement, DDL
+    
+    if isinstance(statement, DDLElement) and not isinstance(statement, DDL):
+        element = getattr(statement, 'element', None)
+        if isinstance(element, Index):
+            element = element.table
+        return [element.name] if isinstance(element, Table) else []
+    
+    if isinstance(statement, DDL):
+        statement = statement.statement
+    elif not isinstance(statement, string_types):
+        # text() constructs
+        statement = getattr(statement, 'text', None)
+    if not isinstance(statement, string_types) or not _DDL_STATEMENT.match(statement):
+        return None
+    
+    for pattern in _DDL_TABLES:
+        m = pattern.match(statement)
+        if m is None:
+            continue
+        if 'column' in m.groupdict():
+            parts = _unquote_name(m.group('column'))
+            return parts[-2:-1]
+        return [_unquote_name(name)[-1] for name in _SQL_NAME.findall(m.group('names'))
+                if name.upper() != 'TO']
+    return []
+
+
+def clear_schema_cache_on_ddl(engine, statement):
+    """
+    Drop the cached table reflections and statements of the tables the
+    DDL statement names, or of every table of engine when it names none
+    that can be parsed. Returns ddl_tables(statement).
+    """
+    
+    tables = ddl_tables(statement)
+    if tables:
+        for table_name in tables:
+            _SCHEMA_CACHE.invalidate_name(engine, table_name)
+            _clear_statement_cache(engine, table_name, any_schema=True)
+    elif tables is not None:
+        _SCHEMA_CACHE.clear(engine)
+        _clear_statement_cache(engine)
+    return tables
+
+
+# Database errors for a missing column or table: PostgreSQL SQLSTATE, MySQL
+# error numbers and the messages of the drivers without either
+_STALE_SCHEMA_CODES = frozenset(['42703', '42P01', 1054, 1146])
+_STALE_SCHEMA_MESSAGE = re.compile(r"no such (?:column|table)|has no column named|"
+                                   r"(?:column|relation) .* does not exist|unknown column|"
+                                   r"table .* doesn't exist|invalid (?:column|object) name", re.I)
+
+
+def _stale_schema_error(e):
+    """True when the DBAPIError e says a column or table is missing"""
+    
+    orig = getattr(e, 'orig', None)
+    code = getattr(orig, 'pgcode', None)
+    if code is None and getattr(orig, 'args', None):
+        code = orig.args[0]
+    if isinstance(code, (int, long, string_types)) and code in _STALE_SCHEMA_CODES:
+        return True
+    return _STALE_SCHEMA_MESSAGE.search(str(orig if orig is not None else e)) is not None
+
+
+def _reflect_table(meta, table_name, schema=None):
+    """
+    Return table_name as a Table in meta, from meta itself, the schema cache, 
+    or by reflecting it. None when the table does not exist.
+    """
+    
+    schema = schema or meta.schema
+    if schema:
+        table = meta.tables.get('.'.join([schema, table_name]))
+    else:
+        table = meta.tables.get(table_name)
+    if table is not None:
+        return table
+        
+    if meta.bind is None:
+        # Nothing to key the cache on, reflect raises as it always has
+        meta.reflect(only=[table_name], schema=schema)
+        
+    key = _SCHEMA_CACHE.key(meta.bind, table_name, schema)
+    entry = _SCHEMA_CACHE.get(key)
+    if entry is not None:
+        if not entry['exists']:
+            return None
+        if entry['table'] is not None:
+            return entry['table'].tometadata(meta)
+    
+    try:
+        meta.reflect(only=[table_name], schema=schema)
+    except exc.InvalidRequestError:
+        return None
+        
+    if schema:
+        table = meta.tables.get('.'.join([schema, table_name]))
+    else:
+        table = meta.tables.get(table_name)
+    _SCHEMA_CACHE.put(key, table)
+    return table
+
+
+class _AdaptiveChunker(object):
+    """
+    Iterable of (start, end) chunk ranges whose size is steered toward
+    target_time seconds per statement from the measured chunk latency.
+    Sizes are capped by the SQL parameter limit (multi-row VALUES only) and
+    by the servers packet limit using the estimated bytes per row.
+    """
+    
+    def __init__(self, nrows, ncols, row_bytes, sql_para_max, bulk=True, max_bytes=None, 
+                          target_time=0.5, initial=None, growth=2.0, max_rows=None):
+        self.nrows = nrows
+        self.row_bytes = max(row_bytes, 1)
+        self.target_time = target_time
+        self.growth = growth
+        
+        # Stay strictly below the parameter limit, same as the fixed chunking
+        para_rows = max(1, int((sql_para_max - 1) / ncols))
+        if bulk:
+            self.max_rows = para_rows
+        else:
+            self.max_rows = max_rows or para_rows * 100
+        if max_bytes is not None:
+            # Leave room for the statement text and protocol overhead
+            self.max_rows = min(self.max_rows, max(1, int(max_bytes * 0.8 / self.row_bytes)))
+            
+        self.size = min(initial or para_rows, self.max_rows)
+        self.sizes = []
+        self.seconds = []
+        self.bytes = []
+
+    def __iter__(self):
+        start = 0
+        while start < self.nrows:
+            end = min(start + self.size, self.nrows)
+            yield start, end
+            start = end
+
+    def record(self, rows, elapsed):
+        """Record a finished chunk and resize toward the target time"""
+        
+        self.sizes.append(rows)
+        self.seconds.append(elapsed)
+        self.bytes.append(int(rows * self.row_bytes))
+        
+        if rows < self.size or elapsed <= 0:
+            # Last partial chunk or timer resolution, nothing to learn
+            return
+        ideal = rows * self.target_time / elapsed
+        # Damp the step so one slow statement does not collapse the size
+        ideal = min(max(ideal, self.size / self.growth), self.size * self.growth)
+        self.size = int(min(max(ideal, 1), self.max_rows))
+
+
+def _estimate_row_bytes(frame, sample=1000):
+    """Approximate bytes per row sent to the server for the frame"""
+    
+    row_bytes = 0
+    for col_name in frame.columns:
+        df_col = frame[col_name]
+        if df_col.dtype == object:
+            values = df_col.values[:sample]
+            lengths = [len(v) if isinstance(v, string_types) else 8 
+                       for v in values if v is not None]
+            row_bytes += (sum(lengths) / float(len(lengths)) if lengths else 0) + 4
+        else:
+            row_bytes += df_col.dtype.itemsize
+            
+    return row_bytes
+
 
 def execute(sql, engine, params=None):
     """
@@ -114,7 +768,7 @@ def execute(sql, engine, params=None):
 
 def read_sql_table(table_name, engine, schema=None, meta=None, index_col=None,
                             coerce_float=True, parse_dates=None, columns=None,
-                            chunksize=None):
+                            chunksize=None, columnar=False, stream=False):
     """Read SQL database table into a DataFrame.
 
     Given a table name and an SQLAlchemy engine, returns a DataFrame.
@@ -152,6 +806,14 @@ def read_sql_table(table_name, engine, schema=None, meta=None, index_col=None,
     chunksize : int, default None
         If specified, return an iterator where `chunksize` is the number of
         rows to include in each chunk.
+    columnar : boolean, default False
+        Fetch in batches straight into typed NumPy column buffers (or the
+        drivers Arrow/NumPy fetch) instead of building every row as a tuple
+        first.
+    stream : boolean, default False
+        With chunksize, run the query on a dedicated connection with a
+        server side cursor (stream_results) held until the iterator is 
+        exhausted or closed, so memory stays bounded by chunksize.
 
     Returns
     -------
@@ -166,16 +828,14 @@ def read_sql_table(table_name, engine, schema=None, meta=None, index_col=None,
     if meta is None:
         meta = MetaData(engine, schema=schema)
  
-    try:
-        meta.reflect(only=[table_name])
-        
-    except exc.InvalidRequestError:
+    if _reflect_table(meta, table_name) is None:
         raise ValueError("Table %s not found" % table_name)
 
     pandas_sql = SQLDatabase(engine, meta=meta)
     
     table = pandas_sql.read_table(table_name, index_col=index_col, coerce_float=coerce_float,
-                                parse_dates=parse_dates, columns=columns, chunksize=chunksize)
+                                parse_dates=parse_dates, columns=columns, chunksize=chunksize,
+                                columnar=columnar, stream=stream)
 
     if table is not None:
         return table
@@ -184,7 +844,7 @@ def read_sql_table(table_name, engine, schema=None, meta=None, index_col=None,
 
 
 def read_sql_query(sql, engine, index_col=None, coerce_float=True, params=None,
-                   parse_dates=None, chunksize=None):
+                   parse_dates=None, chunksize=None, columnar=False, stream=False):
     """Read SQL query into a DataFrame.
 
     Returns a DataFrame corresponding to the result set of the query
@@ -222,6 +882,14 @@ def read_sql_query(sql, engine, index_col=None, coerce_float=True, params=None,
     chunksize : int, default None
         If specified, return an iterator where `chunksize` is the number of
         rows to include in each chunk.
+    columnar : boolean, default False
+        Fetch in batches straight into typed NumPy column buffers (or the
+        drivers Arrow/NumPy fetch) instead of building every row as a tuple
+        first.
+    stream : boolean, default False
+        With chunksize, run the query on a dedicated connection with a
+        server side cursor (stream_results) held until the iterator is 
+        exhausted or closed, so memory stays bounded by chunksize.
 
     Returns
     -------
@@ -237,7 +905,7 @@ def read_sql_query(sql, engine, index_col=None, coerce_float=True, params=None,
     
     return pandas_sql.read_query(sql, index_col=index_col, params=params, 
                                   coerce_float=coerce_float, parse_dates=parse_dates, 
-                                  chunksize=chunksize)
+                                  chunksize=chunksize, columnar=columnar, stream=stream)
                                   
                                   
 def has_table(table_name, engine, schema=None):
@@ -279,10 +947,7 @@ def add_metadata(table_names, meta, not_found='ignore'):
         table_names = [table_names]
         
     for table_name in table_names:   
-        try:
-            meta.reflect(only=[table_name])
-            
-        except exc.InvalidRequestError:
+        if _reflect_table(meta, table_name) is None:
             if not_found == 'ignore':
                 pass
             elif not_found == 'fail':
@@ -322,17 +987,24 @@ class SQLTable(PandasObject):
     # TODO: support for multiIndex
     def __init__(self, name, class_method, frame=None, table_setup=False, 
                 index=False, index_label=None, if_exists='fail', prefix='pandas', 
-                                schema=None, table_keys=None, sql_para_max=2100):
+                                schema=None, table_keys=None, sql_para_max=2100, 
+                                copy_chunksize=50000, dtype=None, infer_types=False):
                   
         self.name = name
         self.pd_sql = class_method
         self.prefix = prefix
+        # Chunks the last insert executed, see SQLDatabase._with_fresh_schema
+        self.executed_chunks = 0
         self.frame = frame
         self.index = self._index_name(index, index_label)
         self.schema = schema
         self.if_exists = if_exists
         self.keys = table_keys
         self.sql_para_max = sql_para_max
+        self.copy_chunksize = copy_chunksize
+        self.dtype = dtype
+        self.infer_types = infer_types
+        self._plans = None
 
   
         if table_setup:
@@ -361,6 +1033,9 @@ class SQLTable(PandasObject):
         # Inserting table into database, add to MetaData object
         self.table = self.table.tometadata(self.pd_sql.meta)
         self.table.create()
+        _SCHEMA_CACHE.invalidate(_SCHEMA_CACHE.key(self.pd_sql.engine, self.name, 
+                                                   self.table.schema))
+        _clear_statement_cache(self.pd_sql.engine, self.name, self.table.schema)
 
     def create(self):
         if self.exists():
@@ -378,23 +1053,35 @@ class SQLTable(PandasObject):
             self._execute_create()
 
 
-    def insert_data(self, copy=True):
+    def _prepare_frame(self, copy=True):
         """doc string"""
     
+        if self.index is None:
+            # Nothing is reset so the frame is never modified, no copy needed
+            return self.frame
+
         if copy:
             temp = self.frame.copy()
         else:
             temp = self.frame
             
-        if self.index is not None: 
-            temp_index = self.frame.index
-            temp.index.names = self.index
-            try:
-                temp.reset_index(inplace=True)
-            except ValueError as err:
-                raise ValueError(
-                    "duplicate name in index/columns: {0}".format(err))
-     
+        temp.index.names = self.index
+        try:
+            temp.reset_index(inplace=True)
+        except ValueError as err:
+            raise ValueError(
+                "duplicate name in index/columns: {0}".format(err))
+                    
+        return temp
+
+    def insert_data(self, copy=True, prepared=None):
+        """doc string"""
+    
+        if prepared is None:
+            temp = self._prepare_frame(copy)
+        else:
+            # Frame already had the index reset by _prepare_frame
+            temp = prepared
 
         column_names = list(map(str, temp.columns))
         ncols = len(column_names)
@@ -407,6 +1094,12 @@ class SQLTable(PandasObject):
                 # convert to microsecond resolution so this yields
                 # datetime.datetime
                 d = b.values.astype('M8[us]').astype(object)
+            elif b.is_numeric and not (b._can_hold_na and isnull(b.values).any()):
+                # Typed block without missing values, tolist yields python
+                # scalars the drivers accept without an object array copy
+                for col_loc, col in zip(b.mgr_locs, b.values):
+                    data_list[col_loc] = col.tolist()
+                continue
             else:
                 d = np.array(b.values, dtype=object)
 
@@ -420,49 +1113,377 @@ class SQLTable(PandasObject):
 
         return column_names, ncols, data_list
 
-    def _execute_many_insert(self, conn, keys, data_iter):
+    def _statement_key(self, conn, kind, keys, nrows):
+        """doc string"""
+        
+        return (str(conn.engine.url), self.table.schema, self.table.name, 
+                kind, tuple(keys), nrows)
+
+    def _execute_many_insert(self, conn, keys, data_iter, cache=True):
         """doc string"""
         
         data = [dict((k, v) for k, v in zip(keys, row)) for row in data_iter]
-        result = conn.execute(self.table.insert(), data)
+        if cache:
+            stmt = _cached_statement(self._statement_key(conn, 'many', keys, 1),
+                        lambda: self.table.insert().compile(dialect=conn.dialect, 
+                                                            column_keys=keys))
+        else:
+            stmt = self.table.insert()
+        result = conn.execute(stmt, data)
+        result.close()
+        
+    def _positional_insert_stmt(self, conn, keys, nrows):
+        """
+        Textual INSERT with nrows VALUES groups of positional markers in
+        the drivers paramstyle. Named paramstyle drivers all accept the 
+        numeric form.
+        """
+
+        #Sub Function#
+        def build():
+            table_name, columns = self._quoted_names(conn, keys)
+            ncols = len(keys)
+            marker = _POSITIONAL_MARKERS[conn.dialect.paramstyle]
+            if marker == ':%d':
+                groups = ['(' + ', '.join([marker%(r*ncols + c + 1) for c in xrange(ncols)]) + ')'
+                          for r in xrange(nrows)]
+            else:
+                group = '(' + ', '.join([marker] * ncols) + ')'
+                groups = [group] * nrows
+                
+            return "INSERT INTO %s (%s) VALUES %s"%(table_name, columns, ', '.join(groups))
+
+        #Start Method#
+        
+        return _cached_statement(self._statement_key(conn, 'positional', keys, nrows), build)
+
+    def _prepared_insert_stmt(self, conn, keys, nrows):
+        """
+        EXECUTE of a server side prepared multi VALUES INSERT on PostgreSQL.
+        The statement is PREPAREd the first time the connection sees this
+        shape and remembered in the pooled connection's info, which lives 
+        as long as the DBAPI connection. The server then plans the INSERT 
+        once per connection instead of once per chunk. Once the statement
+        cache of the table has been cleared, see _clear_statement_cache,
+        the statement is DEALLOCATEd and prepared again on next use. Past
+        _PREPARED_STATEMENTS_SIZE statements on a connection the least 
+        recently used one is DEALLOCATEd.
+        """
+
+        info = conn.connection.info
+        prepared = info.get('pandas_sql_prepared')
+        if prepared is None:
+            prepared = info['pandas_sql_prepared'] = OrderedDict()
+            info['pandas_sql_prepared_names'] = itertools.count()
+        key = self._statement_key(conn, 'prepared', keys, nrows)
+        generation = _statement_generation(key)
+        name, execute_stmt, prepared_generation = prepared.pop(key, (None, None, None))
+
+        if execute_stmt is not None and prepared_generation != generation:
+            # The table was created, dropped or altered since it was prepared
+            conn.execute("DEALLOCATE %s"%name).close()
+            execute_stmt = None
+        
+        if execute_stmt is None:
+            while len(prepared) >= _PREPARED_STATEMENTS_SIZE:
+                conn.execute("DEALLOCATE %s"%prepared.popitem(last=False)[1][0]).close()
+            table_name, columns = self._quoted_names(conn, keys)
+            ncols = len(keys)
+            groups = ['(' + ', '.join(['$%d'%(r*ncols + c + 1) for c in xrange(ncols)]) + ')'
+                      for r in xrange(nrows)]
+            name = 'pandas_sql_ins_%d'%next(info['pandas_sql_prepared_names'])
+            conn.execute("PREPARE %s AS INSERT INTO %s (%s) VALUES %s"%(
+                                   name, table_name, columns, ', '.join(groups))).close()
+            execute_stmt = "EXECUTE %s (%s)"%(name, ', '.join(['%s'] * (nrows*ncols)))
+            
+        # Most recently used last
+        prepared[key] = (name, execute_stmt, generation)
+        return execute_stmt
+
+    def _execute_positional_insert(self, conn, keys, data_iter, bulk, cache=True):
+        """
+        Bind the row tuples positionally, skipping the per row dict. This
+        goes straight to the driver so SQLAlchemy type processors are not
+        applied to the values. With cache on psycopg2 the bulk statement 
+        is a server side prepared statement, see _prepared_insert_stmt.
+        """
+
+        rows = list(data_iter)
+        if bulk:
+            params = tuple(v for row in rows for v in row)
+            if cache and conn.dialect.driver == 'psycopg2':
+                stmt = self._prepared_insert_stmt(conn, keys, len(rows))
+            else:
+                stmt = self._positional_insert_stmt(conn, keys, len(rows))
+            result = conn.execute(stmt, params)
+        else:
+            result = conn.execute(self._positional_insert_stmt(conn, keys, 1), rows)
         result.close()
+
+    def _compiled_bulk_insert(self, conn, keys, nrows):
+        """
+        Compiled multi VALUES INSERT of nrows rows with one named bind per
+        value, and the bind names in row order. Binds keep the column types
+        so SQLAlchemy type processors still apply.
+        """
+
+        from sqlalchemy import bindparam
+
+        ncols = len(keys)
+        names = ['r%dc%d'%(r, c) for r in xrange(nrows) for c in xrange(ncols)]
+        col_types = [self.table.c[k].type for k in keys]
+        values = [dict((k, bindparam(names[r*ncols + c], type_=col_types[c])) 
+                       for c, k in enumerate(keys)) for r in xrange(nrows)]
+        
+        return self.table.insert().values(values).compile(dialect=conn.dialect), names
         
-    def _execute_bulk_insert(self, conn, keys, data_iter):
+    def _execute_bulk_insert(self, conn, keys, data_iter, cache=True):
         """doc string"""
     
-        #data = [item for item in data_iter]
-        data = [dict((k, v) for k, v in zip(keys, row)) for row in data_iter]
-        result = conn.execute(self.table.insert().values(data))
+        if cache:
+            rows = list(data_iter)
+            compiled, names = _cached_statement(
+                                    self._statement_key(conn, 'bulk', keys, len(rows)),
+                                    lambda: self._compiled_bulk_insert(conn, keys, len(rows)))
+            result = conn.execute(compiled, dict(zip(names, [v for row in rows for v in row])))
+        else:
+            #data = [item for item in data_iter]
+            data = [dict((k, v) for k, v in zip(keys, row)) for row in data_iter]
+            result = conn.execute(self.table.insert().values(data))
         result.close()
+
+    def _key_names(self):
+        """table_keys as a list of column names"""
         
-    def insert(self, conn, bulk, chunksize=None, auto_adjust=True, copy=True):
-        """doc string"""
+        if isinstance(self.keys, string_types):
+            return [self.keys]
+        return list(self.keys)
+
+    def _conflict_keys(self):
+        """Columns an upsert matches existing rows on, table_keys or the primary key"""
+
+        if self.keys is not None:
+            return self._key_names()
+
+        # A table set up from the frame only has a primary key when table_keys
+        # was given, an existing table has to be looked at
+        table = self.pd_sql.get_table(self.name, self.schema)
+        if table is None:
+            table = self.table
+        conflict_keys = [sql_col.name for sql_col in table.primary_key.columns]
+        if not conflict_keys:
+            raise ValueError("on_conflict requires table_keys or a primary key "
+                             "on table '%s'"%self.name)
+        return conflict_keys
+
+    def _dedupe_conflict_rows(self, columns_names, data_list, nrows, on_conflict):
+        """
+        Keep one row per conflict key, the last for on_conflict 'update' and
+        the first for 'ignore', as upserting the rows one by one would.
+        PostgreSQL and SQLite refuse a statement that updates a row twice
+        and MERGE a source with duplicate keys, so duplicates can not be 
+        left for the database to resolve. Returns data_list and nrows.
+        """
+
+        conflict_keys = self._conflict_keys()
+        if not all(key in columns_names for key in conflict_keys):
+            # Keys the frame does not write can not conflict within it
+            return data_list, nrows
+
+        key_columns = [data_list[columns_names.index(key)] for key in conflict_keys]
+        positions = {}
+        for i, key in enumerate(zip(*key_columns)):
+            if on_conflict == 'update' or key not in positions:
+                positions[key] = i
+        if len(positions) == nrows:
+            return data_list, nrows
+
+        keep = np.array(sorted(positions.values()))
+        data_list = [[col[i] for i in keep] if isinstance(col, list) else np.asarray(col)[keep]
+                     for col in data_list]
+        return data_list, len(keep)
+
+    def _upsert_clause(self, conn, columns_names, on_conflict):
+        """
+        Conflict clause appended to a multi row INSERT for the dialects that
+        have one, None for the dialects that have to MERGE from a staging
+        table. On MySQL every unique key of the table decides what a 
+        conflict is, not only the conflict keys.
+        """
+
+        preparer = conn.dialect.identifier_preparer
+        dialect = conn.dialect.name
+        conflict_keys = self._conflict_keys()
+        updates = [preparer.quote(col) for col in columns_names if col not in conflict_keys]
+
+        if dialect in ('postgresql', 'sqlite'):
+            # SQLite needs 3.24 or later for ON CONFLICT
+            target = ', '.join([preparer.quote(col) for col in conflict_keys])
+            if on_conflict == 'ignore' or not updates:
+                return " ON CONFLICT (%s) DO NOTHING"%target
+            return " ON CONFLICT (%s) DO UPDATE SET %s"%(target, 
+                        ', '.join(['%s = excluded.%s'%(col, col) for col in updates]))
+        elif dialect == 'mysql':
+            if on_conflict == 'ignore' or not updates:
+                # Assigning a key to itself leaves the row as is, unlike 
+                # INSERT IGNORE it does not swallow other errors
+                key = preparer.quote(conflict_keys[0])
+                return " ON DUPLICATE KEY UPDATE %s = %s"%(key, key)
+            return " ON DUPLICATE KEY UPDATE %s"%(
+                        ', '.join(['%s = VALUES(%s)'%(col, col) for col in updates]))
+        return None
+
+    def _upsert_select_stmt(self, conn, staging, on_conflict):
+        """
+        Statement that upserts all rows of the staging table into the table,
+        INSERT ... SELECT with the conflict clause or a MERGE.
+        """
+
+        preparer = conn.dialect.identifier_preparer
+        columns_names = [sql_col.name for sql_col in staging.columns]
+        table_name, columns = self._quoted_names(conn, columns_names)
+        source = preparer.format_table(staging)
+
+        clause = self._upsert_clause(conn, columns_names, on_conflict)
+        if clause is not None:
+            # The WHERE keeps SQLite from parsing ON CONFLICT as a join constraint
+            return "INSERT INTO %s (%s) SELECT %s FROM %s WHERE 1 = 1%s"%(
+                                    table_name, columns, columns, source, clause)
+
+        conflict_keys = self._conflict_keys()
+        quoted = [preparer.quote(col) for col in columns_names]
+        updates = [preparer.quote(col) for col in columns_names if col not in conflict_keys]
+        
+        merge_stmt = "MERGE INTO %s t USING %s s ON (%s)"%(table_name, source,
+                        ' AND '.join(['t.%s = s.%s'%(preparer.quote(col), preparer.quote(col)) 
+                                      for col in conflict_keys]))
+        if on_conflict == 'update' and updates:
+            merge_stmt += " WHEN MATCHED THEN UPDATE SET %s"%(
+                        ', '.join(['t.%s = s.%s'%(col, col) for col in updates]))
+        merge_stmt += " WHEN NOT MATCHED THEN INSERT (%s) VALUES (%s)"%(
+                        columns, ', '.join(['s.%s'%col for col in quoted]))
+        if conn.dialect.name == 'mssql':
+            # SQL Server requires MERGE to be terminated
+            merge_stmt += ';'
+        return merge_stmt
+
+    def _execute_upsert(self, conn, keys, data_iter, bulk, on_conflict):
+        """
+        Positional INSERT of the chunk with the dialects conflict clause, 
+        one multi row statement when bulk otherwise one executemany.
+        """
+
+        clause = self._upsert_clause(conn, keys, on_conflict)
+        rows = list(data_iter)
+        if bulk:
+            params = tuple(v for row in rows for v in row)
+            result = conn.execute(self._positional_insert_stmt(conn, keys, len(rows)) + clause,
+                                  params)
+        else:
+            result = conn.execute(self._positional_insert_stmt(conn, keys, 1) + clause, rows)
+        result.close()
+        
+    def insert(self, conn, bulk, chunksize=None, auto_adjust=True, copy=True, prepared=None,
+                          positional=False, workers=1, ordering='interleaved', transaction='worker',
+                      adaptive=False, target_time=0.5, on_conflict=None, cache_statements=True,
+                                                                                converted=None):
+        """
+        Insert the frame in chunks. Returns a stats dict with the rows,
+        chunks (statements) and rows per second of the insert.
+        
+        With on_conflict 'update' or 'ignore' rows whose conflict keys 
+        (table_keys or the primary key) already exist are updated or left
+        as is. Rows of the frame sharing conflict keys are reduced to the 
+        last ('update') or first ('ignore') before chunking. PostgreSQL, SQLite and MySQL upsert each chunk with their
+        conflict clause, other dialects load a staging table and MERGE it
+        into the table in one statement.
+        
+        With workers > 1 the chunks are partitioned across that many pooled
+        connections, see _parallel_insert.
+
+        With adaptive=True the chunk size starts from the parameter limit
+        (or the size last converged to for this table) and is resized after
+        every chunk toward target_time seconds per statement, see 
+        _AdaptiveChunker. The sizes used are in stats['chunk_sizes'].
+
+        With cache_statements the compiled INSERT of each chunk shape is 
+        reused across chunks and inserts, and a partial last chunk is split
+        into power of two pieces so it hits the cache too. PostgreSQL 
+        (psycopg2) positional inserts use server side prepared statements.
+        
+        converted is the output of insert_data when it was already run,
+        e.g. ahead of time on another thread by SQLDatabase.insert_stream.
+        """
         
         #Sub Function#
-        def sub_insert(conn, bulk, chunks, columns_names, chunksize, nrows, data_list):
+        def sub_insert(conn, ranges, columns_names, data_list, table=None, stop=None):
             """doc string"""
-            for i in xrange(chunks):
-                start_i = i * chunksize
-                end_i = min((i + 1) * chunksize, nrows)
-                if start_i >= end_i:
+            target = self if table is None else self._retarget(table)
+            # Staging tables are used once, their statements are not worth
+            # a cache entry or a prepared statement left on the connection
+            cache = cache_statements and table is None
+            executed = 0
+            for start_i, end_i in ranges:
+                if stop is not None and stop.is_set():
+                    # Another worker failed, the whole insert will be raised
                     break
 
+                chunk_start = default_timer()
                 chunk_iter = zip(*[arr[start_i:end_i] for arr in data_list])
              
-    
-                if bulk:
-                    self._execute_bulk_insert(conn, columns_names, chunk_iter)
+                if on_conflict is not None and table is None:
+                    target._execute_upsert(conn, columns_names, chunk_iter, bulk, on_conflict)
+                elif positional:
+                    target._execute_positional_insert(conn, columns_names, chunk_iter, bulk,
+                                                      cache=cache)
+                elif bulk:
+                    target._execute_bulk_insert(conn, columns_names, chunk_iter, cache=cache)
                 else:
-                    self._execute_many_insert(conn, columns_names, chunk_iter)
+                    target._execute_many_insert(conn, columns_names, chunk_iter, cache=cache)
+                executed += 1
+                self.executed_chunks += 1
+                
+                if isinstance(ranges, _AdaptiveChunker):
+                    ranges.record(end_i - start_i, default_timer() - chunk_start)
+                
+            return executed
+
+        #Sub Function#
+        def staged_upsert(conn, ranges, columns_names, data_list):
+            """Load a staging table on conn and MERGE it into the table"""
+            staging = self._create_staging_table(conn)
+            try:
+                executed = sub_insert(conn, ranges, columns_names, data_list, table=staging)
+                conn.execute(self._upsert_select_stmt(conn, staging, on_conflict)).close()
+            finally:
+                staging.drop(bind=conn, checkfirst=True)
+            return executed + 1
                     
         #Start Method#
         
-        columns_names, ncols, data_list = self.insert_data(copy)
+        if on_conflict not in (None, 'update', 'ignore'):
+            raise ValueError("'{0}' is not valid for on_conflict".format(on_conflict))
+        
+        self.executed_chunks = 0
+        start_time = default_timer()
+        self.stats = {'method': ('bulk' if bulk else 'many') + 
+                                ('_positional' if positional else '') +
+                                ('_upsert' if on_conflict is not None else ''),
+                      'rows': 0, 'chunks': 0, 'workers': 1, 
+                      'seconds': 0.0, 'rows_per_sec': 0.0}
+        
+        if converted is None:
+            converted = self.insert_data(copy, prepared=prepared)
+        columns_names, ncols, data_list = converted
 
         nrows = len(self.frame)
         
         if nrows == 0:
-            return
+            return self.stats
+
+        if on_conflict is not None:
+            data_list, nrows = self._dedupe_conflict_rows(columns_names, data_list, nrows, 
+                                                          on_conflict)
 
         if chunksize is None:
             if ncols*nrows >= self.sql_para_max:
@@ -488,13 +1509,50 @@ class SQLTable(PandasObject):
             else:
                 raise ValueError("%s is not a valid for if_adjust")
 
-        chunks = int(nrows / chunksize) + 1
+        ranges = [(start_i, min(start_i + chunksize, nrows)) 
+                  for start_i in xrange(0, nrows, chunksize)]
+        if cache_statements and bulk:
+            ranges = _split_last_chunk(ranges)
+
+        run_insert = sub_insert
+        if (on_conflict is not None and 
+                self._upsert_clause(self.pd_sql.engine, columns_names, on_conflict) is None):
+            if workers > 1:
+                # The parallel staging swap does the MERGE
+                transaction = 'staging'
+            else:
+                run_insert = staged_upsert
+
+        chunker = None
+        if adaptive and workers <= 1:
+            tuned_key = (str(self.pd_sql.engine.url), self.name, self.stats['method'])
+            with _ADAPTIVE_CHUNKSIZES_LOCK:
+                initial = _ADAPTIVE_CHUNKSIZES.get(tuned_key, chunksize)
+            chunker = _AdaptiveChunker(nrows, ncols, _estimate_row_bytes(self.frame), 
+                                       self.sql_para_max, bulk=bulk, target_time=target_time,
+                                       max_bytes=self._server_packet_limit(conn),
+                                       initial=initial)
+            ranges = chunker
+
+        if workers > 1 and conn is not None and (transaction == 'worker' or 
+                                                 conn.dialect.name == 'mysql'):
+            # Worker transactions can not join the callers transaction and
+            # on MySQL dropping the staging table would commit it
+            warnings.warn("workers with a passed in connection requires transaction="
+                          "'staging' and a non MySQL database, inserting sequentially")
+            workers = 1
+
+        if workers > 1 and len(ranges) > 1:
+            self.stats['chunks'] = self._parallel_insert(conn, sub_insert, ranges, columns_names,
+                                                         data_list, workers, ordering, transaction,
+                                                         on_conflict=on_conflict)
+            self.stats['workers'] = min(workers, len(ranges))
 
         #If conn is passed in, use it but no commit or closure, which gives
         #transaction control and connection closure back to the creator
-        if conn != None:
+        elif conn != None:
             if not conn.closed:
-                sub_insert(conn, bulk, chunks, columns_names, chunksize, nrows, data_list)
+                self.stats['chunks'] = run_insert(conn, ranges, columns_names, data_list)
             else:
                 raise exc.SQLAlchemyError("Connection closed")
                 
@@ -503,28 +1561,414 @@ class SQLTable(PandasObject):
             #and context manager, which will close the connection and commit
             #on success or rollback upon failure.
             with self.pd_sql.engine.begin() as conn:
-                sub_insert(conn, bulk, chunks, columns_names, chunksize, nrows, data_list)
-                      
-                    
-    def _query_iterator(self, result, chunksize, columns, coerce_float=True, parse_dates=None):
-        """Return generator through chunked result set"""
+                self.stats['chunks'] = run_insert(conn, ranges, columns_names, data_list)
+
+        if chunker is not None:
+            chunksize = chunker.size
+            with _ADAPTIVE_CHUNKSIZES_LOCK:
+                _ADAPTIVE_CHUNKSIZES[tuned_key] = chunksize
+            self.stats.update(chunk_sizes=chunker.sizes, chunk_seconds=chunker.seconds,
+                              chunk_bytes=chunker.bytes, max_chunksize=chunker.max_rows)
+
+        elapsed = default_timer() - start_time
+        self.stats.update(rows=nrows, chunksize=chunksize, seconds=elapsed,
+                          rows_per_sec=nrows / elapsed if elapsed > 0 else float('inf'))
+        
+        return self.stats
 
-        while True:
-            data = result.fetchmany(chunksize)
-            if not data:
-                break
-            else:
-                self.frame = DataFrame.from_records(
-                    data, columns=columns, coerce_float=coerce_float)
+    def _server_packet_limit(self, conn=None):
+        """Maximum statement size in bytes the server accepts, if it has one"""
 
-                self._harmonize_columns(parse_dates=parse_dates)
+        if self.pd_sql.engine.dialect.name != 'mysql':
+            return None
+        
+        executor = conn if conn is not None else self.pd_sql.engine
+        try:
+            return int(executor.execute("SELECT @@max_allowed_packet").scalar())
+        except (exc.DBAPIError, TypeError, ValueError):
+            return None
+
+    def _retarget(self, table):
+        """Shallow copy of this SQLTable writing to another SQLAlchemy table"""
+        
+        import copy
+        target = copy.copy(self)
+        target.table = table
+        target._plans = None
+        return target
+
+    def _create_staging_table(self, bind):
+        """
+        Empty copy of the table columns, without constraints, that parallel
+        workers can load independently before the final swap. It is created
+        on bind, which should also drop it. The name is 
+        <prefix>_staging_<table>_<random>, so tables left behind by a 
+        crashed process can be found with LIKE 'pandas_staging_%'.
+        """
+        
+        import uuid
+        from sqlalchemy import Table, Column
+
+        name = '%s_staging_%s_%s'%(self.prefix, self.name[:30], uuid.uuid4().hex[:8])
+        meta = MetaData(schema=self.table.schema)
+        columns = [Column(sql_col.name, sql_col.type) for sql_col in self.table.columns]
+        staging = Table(name, meta, *columns, schema=self.table.schema)
+        staging.create(bind=bind)
+        
+        return staging
+
+    def _parallel_insert(self, conn, sub_insert, ranges, columns_names, data_list, 
+                                        workers, ordering, transaction, on_conflict=None):
+        """
+        Partition the chunk ranges across a thread pool, each worker on its
+        own pooled connection, so the engine pool must allow for workers
+        connections (in memory SQLite can not be shared this way).
+
+        ordering : {'interleaved', 'contiguous'}
+            - interleaved: chunk i goes to worker i % workers, balances load
+            - contiguous: each worker loads one consecutive run of chunks,
+              keeping rows in frame order within a worker
+        transaction : {'worker', 'staging'}
+            - worker: each worker commits its own transaction. On failure
+              the chunks of workers that already committed remain.
+            - staging: workers load an unconstrained staging table and the
+              rows are moved to the table with a single INSERT ... SELECT,
+              on conn when passed in, so the insert is all or nothing.
+              With on_conflict the swap is the upsert, see 
+              _upsert_select_stmt.
+
+        The first worker error is re-raised unchanged, so SQLCommonClass
+        sees the same SQLAlchemy exception types as a sequential insert.
+        """
+        
+        import threading
+        from multiprocessing.pool import ThreadPool
+
+        workers = min(workers, len(ranges))
+        if ordering == 'interleaved':
+            partitions = [ranges[i::workers] for i in xrange(workers)]
+        elif ordering == 'contiguous':
+            size = int(np.ceil(len(ranges) / float(workers)))
+            partitions = [ranges[i:i + size] for i in xrange(0, len(ranges), size)]
+        else:
+            raise ValueError("'{0}' is not valid for ordering".format(ordering))
+
+        if transaction not in ('worker', 'staging'):
+            raise ValueError("'{0}' is not valid for transaction".format(transaction))
+
+        stop = threading.Event()
+
+        def worker_insert(partition, table):
+            try:
+                with self.pd_sql.engine.begin() as worker_conn:
+                    return sub_insert(worker_conn, partition, columns_names, data_list, 
+                                      table=table, stop=stop)
+            except Exception:
+                stop.set()
+                raise
+
+        swap_conn = None
+        staging = None
+        if transaction == 'staging':
+            # Created and dropped on one connection held for the whole insert,
+            # so any failure after the create drops it where it was made
+            staging_conn = self.pd_sql.engine.connect()
+            try:
+                staging = self._create_staging_table(staging_conn)
+            except Exception:
+                staging_conn.close()
+                raise
+        pool = ThreadPool(len(partitions))
+        try:
+            results = [pool.apply_async(worker_insert, (partition, staging)) 
+                       for partition in partitions]
+            executed = 0
+            errors = []
+            for result in results:
+                try:
+                    executed += result.get()
+                except Exception as e:
+                    errors.append(e)
+            if errors:
+                raise errors[0]
+
+            if staging is not None:
+                if on_conflict is None:
+                    swap = self.table.insert().from_select(
+                                [sql_col.name for sql_col in staging.columns], staging.select())
+                else:
+                    swap = self._upsert_select_stmt(conn or self.pd_sql.engine, staging, 
+                                                    on_conflict)
+                if conn is not None:
+                    # The staging table is locked by the callers transaction
+                    # from here on, so it can only be dropped through it
+                    swap_conn = conn
+                    conn.execute(swap).close()
+                    staging.drop(bind=conn)
+                    staging = None
+                else:
+                    with staging_conn.begin():
+                        staging_conn.execute(swap).close()
+        finally:
+            pool.close()
+            pool.join()
+            if transaction == 'staging':
+                try:
+                    if staging is not None:
+                        if swap_conn is None:
+                            staging.drop(bind=staging_conn, checkfirst=True)
+                        else:
+                            warnings.warn("Staging table '%s' is held by the failed "
+                                          "transaction and was not dropped"%staging.name)
+                finally:
+                    staging_conn.close()
+
+        return executed
+                      
+                    
+    def _copy_frame(self, temp, bool_as_int=False):
+        """
+        Adjust the frame so its CSV text matches what the server expects
+        for the target column types. Integer columns holding NaN are float
+        in pandas and would be written as 1.0, which COPY/LOAD DATA reject.
+        """
+        from sqlalchemy.types import Integer
+
+        converted = {}
+        for sql_col in self.table.columns:
+            if sql_col.name not in temp.columns:
+                continue
+            df_col = temp[sql_col.name]
+            if isinstance(sql_col.type, Integer) and com.is_float_dtype(df_col):
+                mask = isnull(df_col.values)
+                values = np.where(mask, 0, df_col.values).astype(np.int64).astype(object)
+                values[mask] = None
+                converted[sql_col.name] = values
+            elif bool_as_int and com.is_bool_dtype(df_col):
+                converted[sql_col.name] = df_col.values.astype(np.int8)
+
+        if converted:
+            # Never alter the callers frame, copy=False only skips the index copy
+            temp = temp.copy()
+            for col_name, values in converted.items():
+                temp[col_name] = values
+
+        return temp
+
+    def _quoted_names(self, conn, columns_names):
+        """doc string"""
+        
+        preparer = conn.dialect.identifier_preparer
+        return (preparer.format_table(self.table), 
+                ', '.join([preparer.quote(col) for col in columns_names]))
+
+    @contextmanager
+    def _dbapi_cursor(self, conn, statement):
+        """DBAPI cursor whose driver errors are wrapped the way SQLAlchemy does"""
+        
+        cursor = conn.connection.cursor()
+        try:
+            yield cursor
+        except conn.dialect.dbapi.Error as e:
+            raise exc.DBAPIError.instance(statement, None, e, conn.dialect.dbapi.Error)
+        finally:
+            cursor.close()
+
+    def _native_loader(self, conn):
+        """Return the dialect specific bulk loader for the connection or None"""
+
+        dialect = conn.dialect.name
+        if dialect == 'postgresql':
+            if conn.dialect.driver == 'psycopg2':
+                return self._execute_copy_postgresql
+        elif dialect == 'mysql':
+            return self._execute_load_data_mysql
+        elif dialect == 'sqlite':
+            return self._execute_executemany_sqlite
+        return None
+
+    def _execute_copy_postgresql(self, conn, temp, chunksize):
+        """Stream the frame through COPY FROM STDIN as CSV"""
+
+        temp = self._copy_frame(temp)
+        table_name, columns = self._quoted_names(conn, list(map(str, temp.columns)))
+        copy_stmt = "COPY %s (%s) FROM STDIN WITH CSV NULL '\\N'"%(table_name, columns)
+        stream = _FrameCSVStream(temp, chunksize, '\\N')
+
+        with self._dbapi_cursor(conn, copy_stmt) as cursor:
+            cursor.copy_expert(copy_stmt, stream)
+
+    def _execute_load_data_mysql(self, conn, temp, chunksize):
+        """
+        Spool the frame to a temporary CSV file chunk by chunk and load it
+        with a single LOAD DATA LOCAL INFILE. The driver must be created
+        with local_infile enabled.
+        """
+        
+        temp = self._copy_frame(temp, bool_as_int=True)
+        table_name, columns = self._quoted_names(conn, list(map(str, temp.columns)))
+        stream = _FrameCSVStream(temp, chunksize, 'NULL')
+
+        fd, path = tempfile.mkstemp(suffix='.csv', prefix=self.prefix + '_load_')
+        try:
+            with os.fdopen(fd, 'w') as csv_file:
+                shutil.copyfileobj(stream, csv_file)
+            
+            load_stmt = ("LOAD DATA LOCAL INFILE '%s' INTO TABLE %s CHARACTER SET utf8 "
+                         "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                         "LINES TERMINATED BY '\\n' (%s)"
+                         %(path.replace('\\', '/').replace("'", "''"), table_name, columns))
+            result = conn.execute(load_stmt)
+            result.close()
+        finally:
+            os.remove(path)
+
+    def _execute_executemany_sqlite(self, conn, temp, chunksize):
+        """
+        A single executemany over the DBAPI cursor, fed from an iterator so
+        the parameter rows are never all materialized at once.
+        """
+
+        columns_names, ncols, data_list = self.insert_data(prepared=temp)
+        table_name, columns = self._quoted_names(conn, columns_names)
+        insert_stmt = "INSERT INTO %s (%s) VALUES (%s)"%(table_name, columns, 
+                                                         ', '.join(['?'] * ncols))
+        with self._dbapi_cursor(conn, insert_stmt) as cursor:
+            cursor.executemany(insert_stmt, zip(*data_list))
+
+    def insert_copy(self, conn, chunksize=None, copy=True, fallback=True):
+        """
+        Load the frame with the dialects native bulk load facility, 
+        COPY FROM STDIN for PostgreSQL, LOAD DATA LOCAL INFILE for MySQL and
+        a single executemany for SQLite, all inside one transaction.
+        When no native path exists, or the native load fails and fallback 
+        is True, the regular bulk insert is used instead.
+        
+        Returns the insert stats, with path 'native' for the native load, 
+        or the stats of the bulk insert with path 'fallback'.
+        """
+        
+        #Sub Function#
+        def sub_copy(conn, temp, chunksize):
+            """Stats of the bulk insert fallback, None for the native load"""
+            loader = self._native_loader(conn)
+            if loader is None:
+                if not fallback:
+                    raise ValueError("No native bulk load available for the '%s' "
+                                     "dialect"%conn.dialect.name)
+                return self.insert(conn, bulk=True, chunksize=insert_chunksize, prepared=temp)
+
+            if conn.dialect.name == 'sqlite':
+                # pysqlite savepoint support is unreliable so any failure
+                # is raised and rolled back by the transaction owner
+                loader(conn, temp, chunksize)
+                return None
+
+            savepoint = conn.begin_nested()
+            try:
+                loader(conn, temp, chunksize)
+            except exc.DBAPIError as e:
+                savepoint.rollback()
+                if not fallback:
+                    raise
+                warnings.warn("Native bulk load failed with '%s', falling back "
+                              "to bulk insert"%e)
+                return self.insert(conn, bulk=True, chunksize=insert_chunksize, prepared=temp)
+            else:
+                savepoint.commit()
+            return None
+
+        #Start Method#
+
+        start_time = default_timer()
+        nrows = len(self.frame)
+        self.stats = {'method': 'copy', 'path': 'native', 'rows': 0, 'chunks': 0, 
+                      'workers': 1, 'seconds': 0.0, 'rows_per_sec': 0.0}
+        
+        if nrows == 0:
+            return self.stats
+        
+        # The bulk insert fallback chunks as the caller asked, not by copy_chunksize
+        insert_chunksize = chunksize
+        if chunksize is None:
+            chunksize = self.copy_chunksize
+        elif chunksize <= 0:
+            raise ValueError("chunksize argument should be non-zero")
+
+        temp = self._prepare_frame(copy)
+
+        if conn != None:
+            if not conn.closed:
+                stats = sub_copy(conn, temp, chunksize)
+            else:
+                raise exc.SQLAlchemyError("Connection closed")
+        else:
+            with self.pd_sql.engine.begin() as conn:
+                stats = sub_copy(conn, temp, chunksize)
+
+        if stats is not None:
+            # The bulk insert replaced self.stats with its own
+            stats['path'] = 'fallback'
+        else:
+            stats = self.stats
+            stats.update(chunks=-(-nrows // chunksize), chunksize=chunksize)
+        # Time the whole load, a failed native attempt included
+        elapsed = default_timer() - start_time
+        stats.update(rows=nrows, seconds=elapsed, 
+                     rows_per_sec=nrows / elapsed if elapsed > 0 else float('inf'))
+
+        return stats
+
+    def _query_iterator(self, result, chunksize, columns, coerce_float=True, parse_dates=None,
+                                                                             columnar=False):
+        """Return generator through chunked result set"""
+
+        kinds = self._buffer_kinds(columns) if columnar else None
+        while True:
+            if columnar:
+                data = _columnar_frame(result, columns, kinds=kinds, 
+                                       coerce_float=coerce_float, limit=chunksize)
+            else:
+                data = result.fetchmany(chunksize)
+            if data is None or len(data) == 0:
+                break
+            else:
+                if columnar:
+                    self.frame = data
+                else:
+                    self.frame = DataFrame.from_records(
+                        data, columns=columns, coerce_float=coerce_float)
+
+                self._harmonize_columns(parse_dates=parse_dates)
 
                 if self.index is not None:
                     self.frame.set_index(self.index, inplace=True)
 
                 yield self.frame
 
-    def read(self, coerce_float=True, parse_dates=None, columns=None, chunksize=None):
+    def _buffer_kinds(self, columns):
+        """Column buffer kinds for the columnar read from the reflected types"""
+        
+        numpy_types = self._column_types()
+        kinds = []
+        for col_name in columns:
+            col_type = numpy_types.get(col_name, object)
+            if col_type is float:
+                kinds.append('f')
+            elif col_type is np.dtype('int64'):
+                kinds.append('i')
+            elif col_type is bool:
+                kinds.append('b')
+            elif col_type is datetime or col_type is date:
+                kinds.append('M')
+            else:
+                # Decimal, text, ... decided from the values
+                kinds.append(None)
+                
+        return kinds
+
+    def read(self, coerce_float=True, parse_dates=None, columns=None, chunksize=None,
+                             columnar=False, stream=False, order_by=None, after=None):
         """doc string"""
 
         if columns is not None and len(columns) > 0:
@@ -536,24 +1980,51 @@ class SQLTable(PandasObject):
         else:
             sql_select = self.table.select()
 
+        if order_by is not None:
+            if isinstance(order_by, string_types):
+                order_by = [order_by]
+            keys = [self.table.c[n] for n in order_by]
+            if after is not None:
+                if not isinstance(after, (list, tuple)):
+                    after = [after]
+                if len(keys) == 1:
+                    sql_select = sql_select.where(keys[0] > after[0])
+                else:
+                    from sqlalchemy import tuple_
+                    sql_select = sql_select.where(tuple_(*keys) > tuple_(*after))
+            sql_select = sql_select.order_by(*keys)
+
+        if chunksize is not None and stream:
+            conn, result = self.pd_sql._execute_stream(sql_select)
+            return self.pd_sql._streaming_iterator(conn, 
+                        self._query_iterator(result, chunksize, result.keys(),
+                                             coerce_float=coerce_float,
+                                             parse_dates=parse_dates,
+                                             columnar=columnar))
+
         result = self.pd_sql.execute(sql_select)
         column_names = result.keys()
 
         if chunksize is not None:
             return self._query_iterator(result, chunksize, column_names,
                                         coerce_float=coerce_float,
-                                        parse_dates=parse_dates)
+                                        parse_dates=parse_dates,
+                                        columnar=columnar)
+        elif columnar:
+            self.frame = _read_columnar(result, column_names, 
+                                        kinds=self._buffer_kinds(column_names),
+                                        coerce_float=coerce_float)
         else:
             data = result.fetchall()
             self.frame = DataFrame.from_records(
                 data, columns=column_names, coerce_float=coerce_float)
 
-            self._harmonize_columns(parse_dates=parse_dates)
+        self._harmonize_columns(parse_dates=parse_dates)
 
-            if self.index is not None:
-                self.frame.set_index(self.index, inplace=True)
+        if self.index is not None:
+            self.frame.set_index(self.index, inplace=True)
 
-            return self.frame
+        return self.frame
 
     def _index_name(self, index, index_label):
         """doc string"""
@@ -613,11 +2084,15 @@ class SQLTable(PandasObject):
         column_names_and_types = \
             self._get_column_names_and_types(self._sqlalchemy_type)
 
+        if self.dtype is not None:
+            column_names_and_types = [(name, self.dtype.get(name, typ), is_index) 
+                                      for name, typ, is_index in column_names_and_types]
+
         columns = [Column(name, typ, index=is_index)
                    for name, typ, is_index in column_names_and_types]
 
         if self.keys is not None:
-            pkc = PrimaryKeyConstraint(self.keys, name=self.name + '_pk')
+            pkc = PrimaryKeyConstraint(*self._key_names(), name=self.name + '_pk')
             columns.append(pkc)
 
         schema = self.schema or self.pd_sql.meta.schema
@@ -629,6 +2104,66 @@ class SQLTable(PandasObject):
 
         return Table(self.name, meta, *columns, schema=schema)
 
+    def _table_plans(self):
+        """
+        Dict of plans derived from the reflected table. Shared through the
+        schema cache entry of the table so every SQLTable for it, and every
+        chunk of a chunked read, reuses them. Invalidated with the entry.
+        The plans are kept per column types, as a Table from a MetaData the
+        caller passed may type the columns unlike the cached one.
+        """
+        
+        if self._plans is None:
+            entry = None
+            if self.table is not None:
+                entry = _SCHEMA_CACHE.get(_SCHEMA_CACHE.key(self.pd_sql.engine, self.name,
+                                                            self.table.schema))
+            if entry is None:
+                self._plans = {}
+            else:
+                column_types = tuple((col.name, repr(col.type)) for col in self.table.columns)
+                self._plans = entry['plans'].setdefault(column_types, {})
+        return self._plans
+
+    def _column_types(self):
+        """The _numpy_type of every reflected column by name"""
+        
+        plans = self._table_plans()
+        numpy_types = plans.get('numpy_types')
+        if numpy_types is None:
+            numpy_types = plans['numpy_types'] = dict(
+                (sql_col.name, self._numpy_type(sql_col.type)) for sql_col in self.table.columns)
+        return numpy_types
+
+    def _harmonize_plan(self, parse_dates):
+        """
+        Conversion plan of the reflected columns for a parse_dates dict:
+        
+        dates : list of (column, format), parsed once each. parse_dates
+            wins over the column type so a column is never parsed twice.
+        floats : list of columns converted to float
+        exact : list of (column, dtype) for the int and bool columns, only
+            converted when they hold no NA values
+        """
+        
+        plans = self._table_plans()
+        plan_key = ('harmonize', tuple(sorted((col_name, repr(fmt)) 
+                                              for col_name, fmt in parse_dates.items())))
+        plan = plans.get(plan_key)
+        if plan is None:
+            dates, floats, exact = [], [], []
+            for col_name, col_type in self._column_types().items():
+                if col_name in parse_dates:
+                    dates.append((col_name, parse_dates[col_name]))
+                elif col_type is datetime or col_type is date:
+                    dates.append((col_name, None))
+                elif col_type is float:
+                    floats.append(col_name)
+                elif col_type is np.dtype('int64') or col_type is bool:
+                    exact.append((col_name, np.dtype(col_type)))
+            plan = plans[plan_key] = (dates, floats, exact)
+        return plan
+
     def _harmonize_columns(self, parse_dates=None):
         """
         Make the DataFrame's column types align with the SQL table
@@ -640,6 +2175,11 @@ class SQLTable(PandasObject):
         NA values.
         Datetimes should already be converted to np.datetime64 if supported,
         but here we also force conversion if required
+        
+        The conversions come from _harmonize_plan, built once per table. 
+        Columns already of the target dtype are skipped, the rest are 
+        converted together per dtype with one NA count for the int and
+        bool columns.
         """
         # handle non-list entries for parse_dates gracefully
         if parse_dates is True or parse_dates is None or parse_dates is False:
@@ -648,40 +2188,45 @@ class SQLTable(PandasObject):
         if not hasattr(parse_dates, '__iter__'):
             parse_dates = [parse_dates]
 
-        for sql_col in self.table.columns:
-            col_name = sql_col.name
-            try:
-                df_col = self.frame[col_name]
-                # the type the dataframe column should have
-                col_type = self._numpy_type(sql_col.type)
-
-                if col_type is datetime or col_type is date:
-                    if not issubclass(df_col.dtype.type, np.datetime64):
-                        self.frame[col_name] = _handle_date_column(df_col)
-
-                elif col_type is float:
-                    # floats support NA, can always convert!
-                    self.frame[col_name] = df_col.astype(col_type, copy=False)
-
-                elif len(df_col) == df_col.count():
-                    # No NA values, can convert ints and bools
-                    if col_type is np.dtype('int64') or col_type is bool:
-                        self.frame[col_name] = df_col.astype(col_type, copy=False)
-
-                # Handle date parsing
-                if col_name in parse_dates:
-                    try:
-                        fmt = parse_dates[col_name]
-                    except TypeError:
-                        fmt = None
-                    self.frame[col_name] = _handle_date_column(
-                        df_col, format=fmt)
-
-            except KeyError:
-                pass  # this column not in results
+        if not isinstance(parse_dates, dict):
+            parse_dates = dict((col_name, None) for col_name in parse_dates)
+
+        dates, floats, exact = self._harmonize_plan(parse_dates)
+        frame = self.frame
+        present = set(frame.columns)
+
+        for col_name, fmt in dates:
+            if col_name in present:
+                df_col = frame[col_name]
+                if not issubclass(df_col.dtype.type, np.datetime64):
+                    frame[col_name] = _handle_date_column(df_col, format=fmt)
+
+        # floats support NA, can always convert!
+        floats = [col_name for col_name in floats 
+                  if col_name in present and frame[col_name].dtype != np.float64]
+        if floats:
+            converted = frame[floats].astype(float)
+            for col_name in floats:
+                frame[col_name] = converted[col_name]
+
+        exact = [(col_name, col_type) for col_name, col_type in exact
+                 if col_name in present and frame[col_name].dtype != col_type]
+        if exact:
+            # No NA values, can convert ints and bools
+            counts = frame[[col_name for col_name, _ in exact]].count()
+            for col_type in set(col_type for _, col_type in exact):
+                cols = [col_name for col_name, c_type in exact 
+                        if c_type == col_type and counts[col_name] == len(frame)]
+                if cols:
+                    converted = frame[cols].astype(col_type)
+                    for col_name in cols:
+                        frame[col_name] = converted[col_name]
 
     def _sqlalchemy_type(self, col):
-        """doc string"""
+        """
+        SQL type for a column. With infer_types the size comes from the 
+        values, see _integer_type, _string_type and _numeric_type.
+        """
       
         from sqlalchemy.types import (BigInteger, Float, Text, Boolean, DateTime, Date, Time)
 
@@ -699,7 +2244,8 @@ class SQLTable(PandasObject):
         elif com.is_float_dtype(col):
             return Float
         elif com.is_integer_dtype(col):
-            # TODO: Refine integer size.
+            if self.infer_types:
+                return self._integer_type(col)
             return BigInteger
         elif com.is_bool_dtype(col):
             return Boolean
@@ -708,8 +2254,84 @@ class SQLTable(PandasObject):
             return Date
         if inferred == 'time':
             return Time
+        if self.infer_types:
+            if inferred in ('string', 'unicode'):
+                return self._string_type(col)
+            elif inferred in ('decimal', 'mixed'):
+                numeric = self._numeric_type(col)
+                if numeric is not None:
+                    return numeric
         return Text
 
+    def _integer_type(self, col):
+        """Smallest integer type holding the column's min and max"""
+        
+        from sqlalchemy.types import SmallInteger, Integer, BigInteger, Numeric
+        
+        values = np.asarray(col)
+        if len(values) == 0:
+            return BigInteger
+        
+        col_min, col_max = values.min(), values.max()
+        if col_min >= -2**15 and col_max < 2**15:
+            return SmallInteger
+        elif col_min >= -2**31 and col_max < 2**31:
+            return Integer
+        elif col_max < 2**63:
+            return BigInteger
+        # uint64 beyond the signed range
+        return Numeric(20, 0)
+
+    def _string_type(self, col, max_varchar=4000):
+        """
+        VARCHAR of the longest string, Text when there are no values or the
+        longest is over max_varchar, the VARCHAR limit Oracle and SQL Server
+        nvarchar share.
+        """
+        
+        from sqlalchemy.types import String, Text
+        
+        values = com._ensure_object(col)
+        values = values[~isnull(values)]
+        if len(values) == 0:
+            return Text
+        
+        max_len = int(np.frompyfunc(len, 1, 1)(values).max())
+        if max_len > max_varchar:
+            return Text
+        return String(max(max_len, 1))
+
+    def _numeric_type(self, col, max_precision=38):
+        """
+        Numeric(precision, scale) covering every Decimal in the column, or
+        None when the column holds other values. Precision is capped at 
+        max_precision, the largest most databases accept.
+        """
+        
+        from decimal import Decimal
+        from sqlalchemy.types import Numeric
+        
+        values = com._ensure_object(col)
+        values = values[~isnull(values)]
+        if len(values) == 0:
+            return None
+        
+        int_digits = scale = 0
+        for value in values:
+            if not isinstance(value, Decimal):
+                return None
+            sign, digits, exponent = value.as_tuple()
+            if not isinstance(exponent, int):
+                # NaN or Infinity
+                return None
+            int_digits = max(int_digits, len(digits) + exponent)
+            scale = max(scale, -exponent)
+            
+        precision = max(int_digits, 0) + scale
+        if precision > max_precision:
+            return Numeric()
+        return Numeric(max(precision, 1), scale)
+
     def _numpy_type(self, sqltype):
         """doc string"""
     
@@ -730,6 +2352,186 @@ class SQLTable(PandasObject):
         return object
 
 
+class QueryResultCache(object):
+    """
+    LRU cache of read_query results for a SQLDatabase, bounded by entries,
+    by approximate bytes and by age. Each entry is tagged with the tables
+    its query reads, and writes to a table through the same SQLDatabase 
+    (insert_bulk, insert_many, insert_copy, insert_stream, table_from_frame,
+    drop_table) drop the entries tagged with it. Statements run through
+    SQLDatabase.execute drop the entries of the table they write, or every
+    entry when what they write can not be told, see invalidate_statement.
+    Writes made any other way need an explicit invalidate(table) or clear().
+
+    Frames are copied going in and coming out, so a caller modifying its
+    result can not change what the next caller gets.
+
+    Parameters
+    ----------
+    max_entries : int, default 128
+    max_bytes : int, default 256 MB
+        Results estimated larger than this are never cached.
+    ttl : float, default 300
+        Seconds an entry stays valid.
+    """
+
+    _TABLE_PATTERN = re.compile(r'\b(?:from|join|update|into)\s+([\w\."`\[\]]+)', re.IGNORECASE)
+
+    def __init__(self, max_entries=128, max_bytes=256 * 2**20, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    _LITERAL_PATTERN = re.compile(r"('(?:[^']|'')*')")
+
+    @classmethod
+    def normalize(cls, sql):
+        """SQL text with the whitespace outside of string literals collapsed"""
+        
+        parts = cls._LITERAL_PATTERN.split(str(sql).strip())
+        # Odd parts are the literals themselves
+        return ''.join([part if i % 2 else re.sub(r'\s+', ' ', part)
+                        for i, part in enumerate(parts)])
+
+    @classmethod
+    def tables_in(cls, sql):
+        """Lower case names of the tables a statement reads, without schema or quotes"""
+        
+        names = set()
+        for name in cls._TABLE_PATTERN.findall(str(sql)):
+            name = name.split('.')[-1].strip('"`[]').lower()
+            if name:
+                names.add(name)
+        return names
+
+    def key(self, sql, params=None, *options):
+        """Cache key from the normalized SQL, the params and the read options"""
+        
+        if hasattr(params, 'keys'):
+            params = tuple(sorted(params.items()))
+        elif params is not None:
+            params = tuple(params)
+        if not isinstance(sql, string_types) and hasattr(sql, 'compile'):
+            # SQLAlchemy construct, the bound values are part of the query
+            params = (params, tuple(sorted(sql.compile().params.items())))
+        return (self.normalize(sql), repr(params), repr(options))
+
+    def get(self, key):
+        """Copy of the cached frame or None"""
+        
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and default_timer() - entry['time'] > self.ttl:
+                self._discard(key, entry)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+            frame = entry['frame']
+            
+        return frame.copy()
+
+    def put(self, key, frame, tags):
+        """Cache a copy of frame under key, tagged with the table names in tags"""
+        
+        nbytes = int(_estimate_row_bytes(frame) * len(frame)) if len(frame.columns) else 0
+        if nbytes > self.max_bytes:
+            return
+        
+        entry = {'frame': frame.copy(), 'bytes': nbytes, 'time': default_timer(),
+                 'tags': set(tag.lower() for tag in tags)}
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._discard(key, old)
+            self._entries[key] = entry
+            self.nbytes += nbytes
+            for tag in entry['tags']:
+                self._tags.setdefault(tag, set()).add(key)
+            
+            while self._entries and (len(self._entries) > self.max_entries or 
+                                     self.nbytes > self.max_bytes):
+                old_key, old = self._entries.popitem(last=False)
+                self._discard(old_key, old)
+                self.evictions += 1
+
+    def _discard(self, key, entry):
+        """Forget an entry already popped from _entries, lock held"""
+        
+        self.nbytes -= entry['bytes']
+        for tag in entry['tags']:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate(self, table_name):
+        """Drop every entry tagged with table_name"""
+        
+        with self._lock:
+            for key in self._tags.pop(table_name.lower(), set()):
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._discard(key, entry)
+
+    def invalidate_statement(self, statement):
+        """
+        Drop the entries statement, a string or SQLAlchemy construct, may 
+        have made stale: none for a read, those of the table an INSERT, 
+        UPDATE, DELETE or DDL statement names, every entry otherwise.
+        """
+        
+        from sqlalchemy.sql.dml import UpdateBase
+        from sqlalchemy.sql.selectable import SelectBase
+        
+        if isinstance(statement, SelectBase):
+            return
+        if isinstance(statement, UpdateBase):
+            tables = [statement.table.name]
+        else:
+            tables = ddl_tables(statement)
+            if tables is None:
+                if not isinstance(statement, string_types):
+                    # text() constructs
+                    statement = getattr(statement, 'text', None)
+                if not isinstance(statement, string_types):
+                    tables = []
+                elif _READ_STATEMENT.match(statement):
+                    return
+                else:
+                    m = _DML_TABLE.match(statement)
+                    tables = [_unquote_name(m.group('name'))[-1]] if m is not None else []
+        
+        if tables:
+            for table_name in tables:
+                self.invalidate(table_name)
+        else:
+            self.clear()
+
+    def clear(self):
+        """doc string"""
+        
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """doc string"""
+        
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.nbytes, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+
 class SQLDatabase:
     """
     This class enables convertion between DataFrame and SQL databases
@@ -747,25 +2549,136 @@ class SQLDatabase:
         If provided, this MetaData object is used instead of a newly
         created. This allows to specify database flavor specific
         arguments in the MetaData object.
+    result_cache : boolean or QueryResultCache, default None
+        Cache read_query results, True for a QueryResultCache with the
+        default limits. Off by default.
 
     """
 
-    def __init__(self, engine, meta=None, schema=None):
+    def __init__(self, engine, meta=None, schema=None, result_cache=None):
         self.engine = engine
+        # A MetaData passed in holds the callers table definitions, DDL never
+        # removes them
+        self._own_meta = meta is None
         if meta is None:
             meta = MetaData(self.engine, schema=schema)
           
         self.meta = meta
+        
+        if result_cache is True:
+            result_cache = QueryResultCache()
+        self.result_cache = result_cache or None
+
+    def _invalidate_results(self, table_name):
+        """Drop cached read_query results that read table_name"""
+        if self.result_cache is not None:
+            self.result_cache.invalidate(table_name)
 
     def run_transaction(self):
         return self.engine.begin()
 
     def execute(self, *args, **kwargs):
-        """Simple passthrough to SQLAlchemy engine"""
-        return self.engine.execute(*args, **kwargs)
+        """
+        Simple passthrough to SQLAlchemy engine. DDL drops the cached 
+        reflections of the tables it names and writes the cached results
+        of the tables they change, see statement_executed.
+        """
+        try:
+            return self.engine.execute(*args, **kwargs)
+        finally:
+            if args:
+                self.statement_executed(args[0])
+
+    def statement_executed(self, statement):
+        """
+        Drop what statement, run on the engine outside of this class, may 
+        have made stale: the reflections of the tables DDL names (see 
+        ddl_executed) and the cached read_query results of the tables it 
+        writes (see QueryResultCache.invalidate_statement).
+        """
+        self.ddl_executed(statement)
+        if self.result_cache is not None:
+            self.result_cache.invalidate_statement(statement)
+
+    def ddl_executed(self, statement):
+        """
+        Drop the cached reflections and statements of the tables statement
+        names when it is DDL, or of every table of the engine when it names
+        none that can be parsed, see clear_schema_cache_on_ddl. They are 
+        also removed from meta, unless meta was passed in. Returns 
+        ddl_tables(statement).
+        """
+        tables = clear_schema_cache_on_ddl(self.engine, statement)
+        if tables is not None and self._own_meta:
+            if tables:
+                names = set(table_name.lower() for table_name in tables)
+                for table in list(self.meta.tables.values()):
+                    if table.name.lower() in names:
+                        self.meta.remove(table)
+            else:
+                self.meta.clear()
+        return tables
+
+    def _forget_table(self, table_name, schema=None):
+        """Drop the reflection of table_name from meta and the caches"""
+        
+        schema = schema or self.meta.schema
+        name = '.'.join([schema, table_name]) if schema else table_name
+        if name in self.meta.tables:
+            self.meta.remove(self.meta.tables[name])
+        _SCHEMA_CACHE.invalidate(_SCHEMA_CACHE.key(self.engine, table_name, schema))
+        _clear_statement_cache(self.engine, table_name, schema)
+
+    def _with_fresh_schema(self, table_name, schema, call, executed=None, conn=None):
+        """
+        call(), which reads or inserts into table_name. When it fails in a
+        way that points to a stale reflection of the table, a column the
+        reflection lacks (KeyError, CompileError) or a database error for a
+        missing column or table (see _stale_schema_error), the reflection is
+        dropped and call() retried once. It is not retried when executed() 
+        says part of it already ran, nor on a database error inside the 
+        passed in conn, whose transaction may be aborted. Other errors are 
+        raised as they are.
+        """
+        try:
+            return call()
+        except (KeyError, exc.CompileError, exc.DBAPIError) as e:
+            if isinstance(e, exc.DBAPIError) and not _stale_schema_error(e):
+                raise
+            self._forget_table(table_name, schema)
+            if (executed is not None and executed()) or \
+                    (conn is not None and isinstance(e, exc.DBAPIError)):
+                raise
+            return call()
+
+    def _execute_stream(self, *args, **kwargs):
+        """
+        Execute on a dedicated connection with stream_results, which gives
+        server side cursors on drivers that support them (psycopg2 named
+        cursors, MySQLdb/pymysql SSCursor). Returns the connection, which 
+        the caller must close once the result is consumed, and the result.
+        """
+        conn = self.engine.connect()
+        try:
+            result = conn.execution_options(stream_results=True).execute(*args, **kwargs)
+        except Exception:
+            conn.close()
+            raise
+            
+        return conn, result
+
+    @staticmethod
+    def _streaming_iterator(conn, iterator):
+        """Chunk iterator that closes the streaming connection with it"""
+        try:
+            for chunk in iterator:
+                yield chunk
+        finally:
+            conn.close()
 
     def read_table(self, table_name, index_col=None, coerce_float=True, parse_dates=None, 
-                                                columns=None, schema=None, chunksize=None):
+                   columns=None, schema=None, chunksize=None, columnar=False, stream=False,
+                                                                  order_by=None, after=None):
         """Read SQL database table into a DataFrame.
 
         Parameters
@@ -796,6 +2709,20 @@ class SQLDatabase:
         chunksize : int, default None
             If specified, return an iterator where `chunksize` is the number
             of rows to include in each chunk.
+        columnar : boolean, default False
+            Fetch in batches straight into typed NumPy column buffers, typed
+            from the reflected column types, instead of building every row
+            as a tuple first.
+        stream : boolean, default False
+            With chunksize, read through a server side cursor on a dedicated
+            connection held for the lifetime of the iterator, so memory stays
+            bounded by chunksize regardless of the table size.
+        order_by : string or list, default None
+            Columns to return the rows ordered by, usually the primary key.
+        after : value or tuple, default None
+            With order_by, only the rows whose order_by columns sort after 
+            this key, e.g. the key of the last row of an earlier read. Reads
+            resume from an index seek instead of skipping the rows before.
 
         Returns
         -------
@@ -807,14 +2734,36 @@ class SQLDatabase:
         SQLDatabase.read_query
 
         """
-        table = SQLTable(table_name, self, index=index_col, schema=schema)
-        return table.read(coerce_float=coerce_float, parse_dates=parse_dates, columns=columns, chunksize=chunksize)
+        #Sub Function#
+        def read():
+            table = SQLTable(table_name, self, index=index_col, schema=schema)
+            return table.read(coerce_float=coerce_float, parse_dates=parse_dates, columns=columns, 
+                                       chunksize=chunksize, columnar=columnar, stream=stream,
+                                                          order_by=order_by, after=after)
+                                                          
+        #Start Method#
+        
+        return self._with_fresh_schema(table_name, schema, read)
 
     @staticmethod
-    def _query_iterator(result, chunksize, columns, index_col=None, coerce_float=True, parse_dates=None):
+    def _query_iterator(result, chunksize, columns, index_col=None, coerce_float=True, 
+                                                       parse_dates=None, columnar=False):
         """Return generator through chunked result set"""
 
+        kinds = None
         while True:
+            if columnar:
+                frame = _columnar_frame(result, columns, kinds=kinds, 
+                                        coerce_float=coerce_float, limit=chunksize)
+                if frame is None:
+                    break
+                if kinds is None and len(set(columns)) == len(columns):
+                    # Keep the typed kinds inferred from the first chunk, object
+                    # columns (maybe all NULL so far) are inferred again
+                    kinds = [_BUFFER_KINDS.get(frame[col].dtype.kind) for col in columns]
+                yield _finish_frame(frame, index_col=index_col, parse_dates=parse_dates)
+                continue
+                
             data = result.fetchmany(chunksize)
             if not data:
                 break
@@ -824,7 +2773,8 @@ class SQLDatabase:
                                    parse_dates=parse_dates)
 
     def read_query(self, sql, index_col=None, coerce_float=True, parse_dates=None, 
-                                                      params=None, chunksize=None):
+                         params=None, chunksize=None, columnar=False, stream=False,
+                                                        use_cache=True, cache_tags=None):
         """Read SQL query into a DataFrame.
 
         Parameters
@@ -851,6 +2801,23 @@ class SQLDatabase:
               to the keyword arguments of :func:`pandas.to_datetime`
               Especially useful with databases without native Datetime support,
               such as SQLite
+        chunksize : int, default None
+            If specified, return an iterator where `chunksize` is the number
+            of rows to include in each chunk.
+        columnar : boolean, default False
+            Fetch in batches straight into typed NumPy column buffers, typed
+            from the first non NULL value of each column, or through the
+            drivers Arrow/NumPy fetch when it has one.
+        stream : boolean, default False
+            With chunksize, read through a server side cursor on a dedicated
+            connection held for the lifetime of the iterator, so memory stays
+            bounded by chunksize regardless of the result size.
+        use_cache : boolean, default True
+            Use the result cache when the SQLDatabase has one. Chunked reads
+            are never cached.
+        cache_tags : list, default None
+            Tables the cached result is invalidated by. If None the tables
+            named after FROM/JOIN in the query.
 
         Returns
         -------
@@ -862,8 +2829,25 @@ class SQLDatabase:
         read_sql
 
         """
+        cache_key = None
+        if self.result_cache is not None and use_cache and chunksize is None:
+            cache_key = self.result_cache.key(sql, params, index_col, coerce_float, 
+                                              parse_dates, columnar)
+            frame = self.result_cache.get(cache_key)
+            if frame is not None:
+                return frame
+                
         args = _convert_params(sql, params)
 
+        if chunksize is not None and stream:
+            conn, result = self._execute_stream(*args)
+            return self._streaming_iterator(conn, 
+                        self._query_iterator(result, chunksize, result.keys(),
+                                             index_col=index_col,
+                                             coerce_float=coerce_float,
+                                             parse_dates=parse_dates,
+                                             columnar=columnar))
+
         result = self.execute(*args)
         columns = result.keys()
 
@@ -871,18 +2855,31 @@ class SQLDatabase:
             return self._query_iterator(result, chunksize, columns,
                                         index_col=index_col,
                                         coerce_float=coerce_float,
-                                        parse_dates=parse_dates)
+                                        parse_dates=parse_dates,
+                                        columnar=columnar)
+        elif columnar:
+            frame = _read_columnar(result, columns, coerce_float=coerce_float)
+            frame = _finish_frame(frame, index_col=index_col, parse_dates=parse_dates)
         else:
             data = result.fetchall()
             frame = _wrap_result(data, columns, index_col=index_col,
                                  coerce_float=coerce_float,
                                  parse_dates=parse_dates)
-            return frame
+            
+        if cache_key is not None:
+            if cache_tags is None:
+                cache_tags = self.result_cache.tables_in(sql)
+            self.result_cache.put(cache_key, frame, cache_tags)
+        return frame
 
     
 
     def insert_bulk(self, frame, table_name, conn=None, index=False, index_label=None, 
-                          schema=None, chunksize=None, copy=True, auto_adjust=True):
+                          schema=None, chunksize=None, copy=True, auto_adjust=True,
+                                                                    positional=False,
+                                  workers=1, ordering='interleaved', transaction='worker',
+                                  adaptive=False, target_time=0.5, on_conflict=None,
+                                             table_keys=None, cache_statements=True):
         """
         Write records stored in a DataFrame to a SQL database.
 
@@ -911,19 +2908,76 @@ class SQLDatabase:
             Whether to copy the frame when resetting the index, if index=True.
             There is a possibility that the index will not reset correctly and
             it could affect the current in frame.
+        positional : boolean, default False
+            Bind the values positionally from the column arrays instead of
+            building a dict per row. Values go to the driver as is, so 
+            SQLAlchemy type processors are skipped.
+        workers : int, default 1
+            Number of pooled connections to spread the chunks over. The 
+            engine pool must allow this many connections.
+        ordering : {'interleaved', 'contiguous'}, default 'interleaved'
+            How chunks are partitioned between workers, see 
+            SQLTable._parallel_insert.
+        transaction : {'worker', 'staging'}, default 'worker'
+            One transaction per worker, or load a staging table and move the
+            rows into the table with one INSERT ... SELECT.
+        adaptive : boolean, default False
+            Resize the chunks after each statement from the measured latency
+            toward target_time seconds, within the parameter and packet 
+            limits. The sizes used are reported in the stats chunk_sizes.
+        target_time : float, default 0.5
+            Seconds per statement the adaptive chunk size aims for.
+        on_conflict : {None, 'update', 'ignore'}, default None
+            - None: plain insert, duplicate keys raise.
+            - update: update the existing rows from the frame (upsert).
+            - ignore: keep the existing rows, insert only the new ones.
+            Rows are matched on table_keys, or the primary key of the table.
+            Frame rows with the same keys collapse to the last (update) or 
+            first (ignore) row. Runs in bulk, with ON CONFLICT on 
+            PostgreSQL/SQLite, ON DUPLICATE KEY UPDATE on MySQL and a 
+            staging table MERGE elsewhere.
+        table_keys : string or list, default None
+            Columns to match existing rows on for on_conflict.
+        cache_statements : boolean, default True
+            Reuse the compiled INSERT for chunks of the same shape, see
+            SQLTable.insert.
+
+        Returns
+        -------
+        dict of insert stats (rows, chunks, chunksize, seconds, rows_per_sec)
     
         """
 
-        table = SQLTable(table_name, self, frame=frame, table_setup=False, index=index,
-                         if_exists='append', index_label=index_label, schema=schema)
-                         
-        table.insert(conn=conn, bulk=True, chunksize=chunksize, copy=copy, 
-                                                            auto_adjust=auto_adjust)
+        tables = []
+        
+        #Sub Function#
+        def insert():
+            table = SQLTable(table_name, self, frame=frame, table_setup=False, index=index,
+                             if_exists='append', index_label=index_label, schema=schema,
+                             table_keys=table_keys)
+            tables.append(table)
+            return table.insert(conn=conn, bulk=True, chunksize=chunksize, copy=copy,
+                                auto_adjust=auto_adjust, positional=positional, workers=workers,
+                                ordering=ordering, transaction=transaction, adaptive=adaptive,
+                                target_time=target_time, on_conflict=on_conflict,
+                                cache_statements=cache_statements)
+                                
+        #Start Method#
+        
+        try:
+            return self._with_fresh_schema(table_name, schema, insert, conn=conn,
+                            executed=lambda: bool(tables) and tables[-1].executed_chunks > 0)
+        finally:
+            self._invalidate_results(table_name)
                                                                               
 
                           
     def insert_many(self, frame, table_name, conn=None, index=False, index_label=None, 
-                              schema=None, chunksize=None, copy=True, auto_adjust=True):
+                              schema=None, chunksize=None, copy=True, auto_adjust=True,
+                                                                        positional=False,
+                                  workers=1, ordering='interleaved', transaction='worker',
+                                  adaptive=False, target_time=0.5, on_conflict=None,
+                                             table_keys=None, cache_statements=True):
         """
         Write records stored in a DataFrame to a SQL database.
 
@@ -952,18 +3006,283 @@ class SQLDatabase:
             Whether to copy the frame when resetting the index, if index=True.
             There is a possibility that the index will not reset correctly and
             it could affect the current in frame.
+        positional : boolean, default False
+            Bind the values positionally from the column arrays instead of
+            building a dict per row. Values go to the driver as is, so 
+            SQLAlchemy type processors are skipped.
+        workers : int, default 1
+            Number of pooled connections to spread the chunks over. The 
+            engine pool must allow this many connections.
+        ordering : {'interleaved', 'contiguous'}, default 'interleaved'
+            How chunks are partitioned between workers, see 
+            SQLTable._parallel_insert.
+        transaction : {'worker', 'staging'}, default 'worker'
+            One transaction per worker, or load a staging table and move the
+            rows into the table with one INSERT ... SELECT.
+        adaptive : boolean, default False
+            Resize the chunks after each statement from the measured latency
+            toward target_time seconds, within the parameter and packet 
+            limits. The sizes used are reported in the stats chunk_sizes.
+        target_time : float, default 0.5
+            Seconds per statement the adaptive chunk size aims for.
+        on_conflict : {None, 'update', 'ignore'}, default None
+            - None: plain insert, duplicate keys raise.
+            - update: update the existing rows from the frame (upsert).
+            - ignore: keep the existing rows, insert only the new ones.
+            Rows are matched on table_keys, or the primary key of the table.
+            Frame rows with the same keys collapse to the last (update) or 
+            first (ignore) row. Runs in bulk, with ON CONFLICT on 
+            PostgreSQL/SQLite, ON DUPLICATE KEY UPDATE on MySQL and a 
+            staging table MERGE elsewhere.
+        table_keys : string or list, default None
+            Columns to match existing rows on for on_conflict.
+        cache_statements : boolean, default True
+            Reuse the compiled INSERT for chunks of the same shape, see
+            SQLTable.insert.
+
+        Returns
+        -------
+        dict of insert stats (rows, chunks, chunksize, seconds, rows_per_sec)
              
         """
                                         
+        tables = []
+        
+        #Sub Function#
+        def insert():
+            table = SQLTable(table_name, self, frame=frame, table_setup=False, index=index,
+                             if_exists='append', index_label=index_label, schema=schema,
+                             table_keys=table_keys)
+            tables.append(table)
+            return table.insert(conn=conn, bulk=False, chunksize=chunksize, copy=copy,
+                                auto_adjust=auto_adjust, positional=positional, workers=workers,
+                                ordering=ordering, transaction=transaction, adaptive=adaptive,
+                                target_time=target_time, on_conflict=on_conflict,
+                                cache_statements=cache_statements)
+                                
+        #Start Method#
+        
+        try:
+            return self._with_fresh_schema(table_name, schema, insert, conn=conn,
+                            executed=lambda: bool(tables) and tables[-1].executed_chunks > 0)
+        finally:
+            self._invalidate_results(table_name)
+
+
+    def insert_copy(self, frame, table_name, conn=None, index=False, index_label=None,
+                              schema=None, chunksize=None, copy=True, fallback=True):
+        """
+        Write records stored in a DataFrame to a SQL database using the
+        database's native bulk load path. PostgreSQL (psycopg2) streams the
+        frame as CSV into COPY FROM STDIN, MySQL uses LOAD DATA LOCAL INFILE
+        and SQLite a single executemany, each in one transaction.
+
+        Parameters
+        ----------
+        frame : DataFrame
+        table_name : string
+            Name of SQL table
+        conn : SQLAlchemy connection e.i. engine.connect()
+            The allows control of the transaction. If conn is None the
+            connectionless option will be used with a context manager.
+        index : boolean, default True
+            Write DataFrame index as a column
+        index_label : string or sequence, default None
+            Column label for index column(s). If None is given (default) and
+            `index` is True, then the index names are used.
+            A sequence should be given if the DataFrame uses MultiIndex.
+        schema : string, default None
+            Name of SQL schema in database to write to (if database flavor
+            supports this). If specified, this overwrites the default
+            schema of the SQLDatabase object.
+        chunksize : int, default None
+            Number of rows rendered to CSV at a time while streaming, and rows
+            per statement of the bulk insert fallback. If None,
+            SQLTable.copy_chunksize rows are streamed and the fallback picks
+            its own chunksize.
+        copy : boolean, default False
+            Whether to copy the frame when resetting the index, if index=True.
+            There is a possibility that the index will not reset correctly and
+            it could affect the current in frame.
+        fallback : boolean, default True
+            Use the regular bulk insert when the dialect has no native load
+            path or the native load fails. MySQL requires local_infile to be
+            enabled on the connection for LOAD DATA LOCAL INFILE.
+
+        Returns
+        -------
+        dict of insert stats (rows, chunks, chunksize, seconds, rows_per_sec)
+        with path 'native' (method 'copy') or 'fallback' (the bulk insert 
+        stats)
+
+        """
+
         table = SQLTable(table_name, self, frame=frame, table_setup=False, index=index,
                          if_exists='append', index_label=index_label, schema=schema)
-            
-        table.insert(conn=conn, bulk=False, chunksize=chunksize, copy=copy, 
-                                                            auto_adjust=auto_adjust)
+
+        try:
+            return table.insert_copy(conn=conn, chunksize=chunksize, copy=copy, 
+                                     fallback=fallback)
+        finally:
+            self._invalidate_results(table_name)
+
+
+    def insert_stream(self, table_name, source, conn=None, columns=None, schema=None,
+                            batch_rows=10000, queue_size=2, commit_chunks=False, bulk=True, 
+                            chunksize=None, positional=False, on_conflict=None, table_keys=None,
+                                                                        cache_statements=True):
+        """
+        Insert records from a stream of DataFrames or rows into an existing
+        SQL table with bounded memory. A producer thread pulls the source
+        and converts each frame for the insert (insert_data) while the 
+        calling thread executes the previous ones, at most queue_size 
+        converted frames wait in between.
+
+        Parameters
+        ----------
+        table_name : string
+            Name of SQL table
+        source : DataFrame, iterable of DataFrames or iterable of row tuples
+            e.g. pd.read_csv(path, chunksize=100000), a generator of frames
+            or a generator/cursor of row tuples.
+        conn : SQLAlchemy connection e.i. engine.connect()
+            The allows control of the transaction. If conn is None the 
+            connectionless option will be used with a context manager.
+        columns : list, default None
+            Column names of row tuples. If None the table's columns in order.
+        schema : string, default None
+            Name of SQL schema in database to write to.
+        batch_rows : int, default 10000
+            Row tuples are collected into frames of this many rows.
+        queue_size : int, default 2
+            Converted frames that may wait for execution.
+        commit_chunks : boolean, default False
+            If conn is None, commit every frame on its own instead of
+            running the whole stream in one transaction.
+        bulk : boolean, default True
+            Multi VALUES statements like insert_bulk, or executemany like
+            insert_many.
+        chunksize, positional, on_conflict, table_keys, cache_statements :
+            As for insert_bulk, applied to every frame.
+
+        Returns
+        -------
+        dict of insert stats (rows, frames, chunks, seconds, rows_per_sec,
+        wait_seconds the executing thread spent waiting on the source)
+        
+        """
         
+        #Sub Function#
+        def frame_source():
+            batch = []
+            for item in ([source] if isinstance(source, DataFrame) else source):
+                if isinstance(item, DataFrame):
+                    if batch:
+                        yield DataFrame.from_records(batch, columns=columns)
+                        batch = []
+                    yield item
+                else:
+                    batch.append(tuple(item))
+                    if len(batch) >= batch_rows:
+                        yield DataFrame.from_records(batch, columns=columns)
+                        batch = []
+            if batch:
+                yield DataFrame.from_records(batch, columns=columns)
+
+        #Sub Function#
+        def put(item):
+            while not stop.is_set():
+                try:
+                    queue.put(item, timeout=0.1)
+                    return True
+                except Queue.Full:
+                    continue
+            return False
+
+        #Sub Function#
+        def produce():
+            try:
+                for frame in frame_source():
+                    if len(frame) == 0:
+                        continue
+                    table = SQLTable(table_name, self, frame=frame, table_setup=False, 
+                                     index=False, if_exists='append', schema=schema,
+                                     table_keys=table_keys)
+                    if not put((table, table.insert_data(copy=False))):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(None)
+
+        #Sub Function#
+        def consume(conn):
+            while True:
+                wait_start = default_timer()
+                item = queue.get()
+                stats['wait_seconds'] += default_timer() - wait_start
+                if item is None:
+                    break
+                elif isinstance(item, Exception):
+                    raise item
+                
+                table, converted = item
+                kwargs = dict(bulk=bulk, chunksize=chunksize, positional=positional, 
+                              on_conflict=on_conflict, cache_statements=cache_statements,
+                              converted=converted)
+                if conn is None:
+                    with self.engine.begin() as chunk_conn:
+                        frame_stats = table.insert(chunk_conn, **kwargs)
+                else:
+                    frame_stats = table.insert(conn, **kwargs)
+                stats['rows'] += frame_stats['rows']
+                stats['chunks'] += frame_stats['chunks']
+                stats['frames'] += 1
+
+        #Start Method#
+
+        if columns is None:
+            table = self.get_table(table_name, schema)
+            if table is None:
+                raise exc.NoSuchTableError("The provided table name '{0}' was not "
+                                           "found".format(table_name))
+            columns = [sql_col.name for sql_col in table.columns]
+
+        start_time = default_timer()
+        stats = {'method': 'stream_' + ('bulk' if bulk else 'many'), 'rows': 0, 
+                 'frames': 0, 'chunks': 0, 'wait_seconds': 0.0}
+        queue = Queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        producer = threading.Thread(target=produce, name='insert_stream_%s'%table_name)
+        producer.daemon = True
+        producer.start()
+        
+        try:
+            if conn is not None:
+                if conn.closed:
+                    raise exc.SQLAlchemyError("Connection closed")
+                consume(conn)
+            elif commit_chunks:
+                consume(None)
+            else:
+                with self.engine.begin() as conn:
+                    consume(conn)
+        finally:
+            stop.set()
+            producer.join()
+            self._invalidate_results(table_name)
+
+        elapsed = default_timer() - start_time
+        stats.update(seconds=elapsed, 
+                     rows_per_sec=stats['rows'] / elapsed if elapsed > 0 else float('inf'))
+        
+        return stats
+
 
     def table_from_frame(self, frame, table_name, conn=None, if_exists='fail', index=False,
-                                  index_label=None, schema=None, chunksize=None, copy=True):
+                                  index_label=None, schema=None, chunksize=None, copy=True,
+                                  positional=False, on_conflict=None, table_keys=None,
+                                                           dtype=None, infer_types=False):
         """
         Create SQL database table from DataFrame structure and insert records from
         DataFrame into a SQL table.
@@ -998,11 +3317,42 @@ class SQLDatabase:
             Whether to copy the frame when resetting the index, if index=True.
             There is a possibility that the index will not reset correctly and
             it could affect the current in frame.
+        positional : boolean, default False
+            Bind the values positionally from the column arrays instead of
+            building a dict per row. Values go to the driver as is, so 
+            SQLAlchemy type processors are skipped.
+        on_conflict : {None, 'update', 'ignore'}, default None
+            With if_exists='append', update or keep the rows of the existing
+            table that match on table_keys/the primary key instead of raising.
+            See insert_bulk.
+        table_keys : string or list, default None
+            Primary key of a created table and the columns on_conflict 
+            matches rows on.
+        dtype : dict, default None
+            Column name to SQLAlchemy type, overrides the type chosen for 
+            those columns of a created table.
+        infer_types : boolean, default False
+            Size the column types of a created table from the frame: 
+            SmallInteger/Integer/BigInteger by min and max, VARCHAR(n) by
+            the longest string and Numeric(precision, scale) for Decimal 
+            columns. Later appends must fit those sizes.
+
+        Returns
+        -------
+        dict of insert stats (rows, chunks, chunksize, seconds, rows_per_sec)
              
         """
              
+        if dtype is not None:
+            from sqlalchemy.types import TypeEngine
+            for col, my_type in dtype.items():
+                if not (isinstance(my_type, TypeEngine) or 
+                        (isinstance(my_type, type) and issubclass(my_type, TypeEngine))):
+                    raise ValueError("The type of %s is not a SQLAlchemy type"%col)
+
         table = SQLTable(table_name, self, frame=frame, table_setup=True, index=index,
-                     if_exists=if_exists, index_label=index_label, schema=schema)
+                     if_exists=if_exists, index_label=index_label, schema=schema,
+                     table_keys=table_keys, dtype=dtype, infer_types=infer_types)
                      
         table.create()
         
@@ -1014,28 +3364,37 @@ class SQLDatabase:
                           "using lower case table names.".format(name), UserWarning)
   
             
-        table.insert(conn=conn, bulk=True, chunksize=chunksize, copy=copy)
+        try:
+            return table.insert(conn=conn, bulk=True, chunksize=chunksize, copy=copy, 
+                                positional=positional, on_conflict=on_conflict)
+        finally:
+            self._invalidate_results(table_name)
 
     @property
     def tables(self):
         return self.meta.tables
 
     def has_table(self, name, schema=None):
-        return self.engine.has_table(name, schema or self.meta.schema)
+        schema = schema or self.meta.schema
+        key = _SCHEMA_CACHE.key(self.engine, name, schema)
+        entry = _SCHEMA_CACHE.get(key)
+        if entry is None:
+            entry = _SCHEMA_CACHE.put(key, exists=self.engine.has_table(name, schema))
+        return entry['exists']
 
     def get_table(self, table_name, schema=None):
-        schema = schema or self.meta.schema
-        if schema:
-            return self.meta.tables.get('.'.join([schema, table_name]))
-        else:
-            return self.meta.tables.get(table_name)
+        return _reflect_table(self.meta, table_name, schema)
 
     def drop_table(self, table_name, schema=None):
         schema = schema or self.meta.schema
+        _SCHEMA_CACHE.invalidate(_SCHEMA_CACHE.key(self.engine, table_name, schema))
         if self.engine.has_table(table_name, schema):
             self.meta.reflect(only=[table_name], schema=schema)
             self.get_table(table_name, schema).drop()
             self.meta.clear()
+        _SCHEMA_CACHE.invalidate(_SCHEMA_CACHE.key(self.engine, table_name, schema))
+        _clear_statement_cache(self.engine, table_name, schema)
+        self._invalidate_results(table_name)
 
     def _create_sql_schema(self, frame, table_name, keys=None):
         table = SQLTable(table_name, self, frame=frame, index=False, keys=keys)
@@ -1043,6 +3402,110 @@ class SQLDatabase:
 
 
 
+class AsyncSQLDatabase(object):
+    """
+    Runs SQLDatabase reads, inserts and statements on a bounded pool of 
+    worker threads, so one process can keep many independent statements in
+    flight. Every method returns a concurrent.futures.Future of what the
+    SQLDatabase method returns, gather them with concurrent.futures.wait or
+    as_completed.
+
+    Parameters
+    ----------
+    engine : SQLAlchemy engine
+        Its pool has to allow max_workers connections (pool_size plus
+        max_overflow), or workers wait on the pool.
+    schema : string, default None
+        Name of SQL schema in database to use.
+    max_workers : int, default 8
+        Statements executing at the same time.
+    max_pending : int, default None
+        Submitted calls not yet finished before a new call blocks the 
+        caller, 4 * max_workers if None. Keeps a fast producer from
+        queueing unbounded frames in memory.
+
+    Each worker thread has its own SQLDatabase and MetaData, since MetaData 
+    is not safe to reflect into from several threads. Reflection is shared 
+    between them through the process wide schema cache.
+    """
+
+    def __init__(self, engine, schema=None, max_workers=8, max_pending=None):
+        if ThreadPoolExecutor is None:
+            raise ImportError("AsyncSQLDatabase requires concurrent.futures, "
+                              "install the futures package on Python 2")
+        
+        self.engine = engine
+        self.schema = schema
+        self.max_workers = max_workers
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers)
+        self._pending = threading.BoundedSemaphore(max_pending or max_workers * 4)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self, wait=True):
+        """Stop accepting calls, by default after the submitted ones finish"""
+        self._executor.shutdown(wait=wait)
+
+    def _sql_db(self):
+        """SQLDatabase of the calling worker thread"""
+        
+        sql_db = getattr(self._local, 'sql_db', None)
+        if sql_db is None:
+            sql_db = self._local.sql_db = SQLDatabase(self.engine, schema=self.schema)
+        return sql_db
+
+    def _submit(self, method, *args, **kwargs):
+        """Queue SQLDatabase.method on the pool, blocking while max_pending calls are open"""
+        
+        #Sub Function#
+        def call():
+            return getattr(self._sql_db(), method)(*args, **kwargs)
+            
+        #Start Method#
+        
+        self._pending.acquire()
+        try:
+            future = self._executor.submit(call)
+        except Exception:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda f: self._pending.release())
+        
+        return future
+
+    def execute(self, *args, **kwargs):
+        """Future of SQLDatabase.execute"""
+        return self._submit('execute', *args, **kwargs)
+
+    def read_query(self, sql, **kwargs):
+        """
+        Future of SQLDatabase.read_query. With chunksize the future holds 
+        the chunk iterator once the query has executed, the chunks are 
+        fetched by whoever iterates it.
+        """
+        return self._submit('read_query', sql, **kwargs)
+
+    def read_table(self, table_name, **kwargs):
+        """Future of SQLDatabase.read_table"""
+        return self._submit('read_table', table_name, **kwargs)
+
+    def insert_bulk(self, frame, table_name, **kwargs):
+        """
+        Future of SQLDatabase.insert_bulk, the insert stats dict. Each call
+        commits its own transaction, a conn can not be passed in since 
+        connections are not safe to share between threads.
+        """
+        if kwargs.get('conn') is not None:
+            raise ValueError("AsyncSQLDatabase.insert_bulk does not take a conn")
+        return self._submit('insert_bulk', frame, table_name, **kwargs)
+
+
+
 
 
 
@@ -0,0 +1,307 @@
+#!/usr/bin/python
+# Author: Dustin Doubet
+# Description:
+# Benchmark harness for the pandas_sql insert and read paths. Sweeps rows,
+# columns, dtype mixes and chunk sizes against SQLite (file and in memory)
+# and optionally PostgreSQL, and records rows/sec, peak RSS and the number
+# of statements sent to the driver to a JSON file.
+#
+# Every case runs in its own process so peak RSS is per case. Frames are
+# generated from a fixed seed so runs are comparable.
+#
+# python pandas_sql_bench.py --rows 1000,100000 --cols 4,16 --output before.json
+# python pandas_sql_bench.py --pg-url postgresql://postgres@localhost:5432/bench
+#
+# A throw away PostgreSQL can be started with
+# docker run -d -p 5432:5432 -e POSTGRES_HOST_AUTH_METHOD=trust postgres
+
+import os
+import sys
+import json
+import time
+import uuid
+import resource
+import platform
+import tempfile
+import argparse
+import traceback
+import multiprocessing
+from timeit import default_timer
+
+import numpy as np
+import pandas as pd
+from pandas.core.api import DataFrame
+
+import sqlalchemy
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+#
+import pandas_sql
+
+
+OPERATIONS = ['insert_bulk', 'insert_many', 'table_from_frame',
+              'read_sql_query', 'read_sql_table']
+
+DTYPE_MIXES = {'int': ['int'],
+               'float': ['float'],
+               'datetime': ['datetime'],
+               'text': ['text'],
+               'mixed': ['int', 'float', 'datetime', 'text']}
+
+
+def make_frame(nrows, ncols, mix, seed=0):
+    """
+    Frame of nrows x ncols with the column kinds of the dtype mix cycled
+    over the columns. Floats have 10% NaN.
+    """
+
+    rs = np.random.RandomState(seed)
+    kinds = DTYPE_MIXES[mix]
+    data = {}
+    columns = []
+
+    for c in xrange(ncols):
+        kind = kinds[c % len(kinds)]
+        col_name = 'c%d_%s'%(c, kind)
+        if kind == 'int':
+            values = rs.randint(0, 1000000, nrows).astype(np.int64)
+        elif kind == 'float':
+            values = rs.randn(nrows)
+            values[rs.rand(nrows) < 0.1] = np.nan
+        elif kind == 'datetime':
+            values = (np.datetime64('2015-01-01T00:00:00') +
+                      rs.randint(0, 86400*365, nrows).astype('m8[s]'))
+        else:
+            values = np.array(['s%07d'%v for v in rs.randint(0, 10000000, nrows)],
+                              dtype=object)
+        data[col_name] = values
+        columns.append(col_name)
+
+    return DataFrame(data, columns=columns)
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # bytes on OS X, kilobytes on Linux
+        return peak / (1024.0 * 1024.0)
+    return peak / 1024.0
+
+
+def _make_engine(target, pg_url=None):
+    """Engine for the target and the path of a file to remove afterwards"""
+
+    if target == 'sqlite_memory':
+        # One shared connection so the in memory database outlives each checkout
+        engine = create_engine('sqlite://', poolclass=StaticPool,
+                               connect_args={'check_same_thread': False})
+        return engine, None
+    elif target == 'sqlite_file':
+        fd, path = tempfile.mkstemp(suffix='.db', prefix='pandas_sql_bench_')
+        os.close(fd)
+        return create_engine('sqlite:///%s'%path), path
+    elif target == 'postgresql':
+        if pg_url is None:
+            raise ValueError("The postgresql target requires --pg-url")
+        return create_engine(pg_url), None
+    else:
+        raise ValueError("'{0}' is not a valid target".format(target))
+
+
+def run_case(target, operation, nrows, ncols, mix, chunksize, seed=0, pg_url=None):
+    """Run one benchmark case and return its result record"""
+
+    record = {'target': target, 'operation': operation, 'rows': nrows, 'cols': ncols,
+              'mix': mix, 'chunksize': chunksize}
+
+    frame = make_frame(nrows, ncols, mix, seed=seed)
+    engine, path = _make_engine(target, pg_url)
+    table_name = 'bench_%s'%uuid.uuid4().hex[:8]
+    counter = {'statements': 0, 'executemany': 0}
+
+    def count_statements(conn, cursor, statement, parameters, context, executemany):
+        counter['statements'] += 1
+        if executemany:
+            counter['executemany'] += 1
+
+    pd_sql = None
+    try:
+        pd_sql = pandas_sql.SQLDatabase(engine)
+
+        # Setup is not timed or counted
+        if operation in ('insert_bulk', 'insert_many'):
+            pd_sql.table_from_frame(frame.iloc[:0], table_name, if_exists='replace')
+        elif operation in ('read_sql_query', 'read_sql_table'):
+            pd_sql.table_from_frame(frame, table_name, if_exists='replace')
+
+        event.listen(engine, 'before_cursor_execute', count_statements)
+        rss_before = _peak_rss_mb()
+        start = default_timer()
+
+        if operation == 'insert_bulk':
+            pd_sql.insert_bulk(frame, table_name, chunksize=chunksize)
+        elif operation == 'insert_many':
+            pd_sql.insert_many(frame, table_name, chunksize=chunksize)
+        elif operation == 'table_from_frame':
+            pd_sql.table_from_frame(frame, table_name, chunksize=chunksize)
+        elif operation == 'read_sql_query':
+            result = pandas_sql.read_sql_query("SELECT * FROM %s"%table_name, engine,
+                                               chunksize=chunksize)
+            read_rows = _consume(result, chunksize)
+        elif operation == 'read_sql_table':
+            result = pandas_sql.read_sql_table(table_name, engine, chunksize=chunksize)
+            read_rows = _consume(result, chunksize)
+        else:
+            raise ValueError("'{0}' is not a valid operation".format(operation))
+
+        elapsed = default_timer() - start
+        event.remove(engine, 'before_cursor_execute', count_statements)
+
+        if operation.startswith('read') and read_rows != nrows:
+            raise AssertionError("Read %s rows, expected %s"%(read_rows, nrows))
+
+        peak_rss = _peak_rss_mb()
+        record.update(seconds=elapsed,
+                      rows_per_sec=nrows / elapsed if elapsed > 0 else None,
+                      statements=counter['statements'],
+                      executemany=counter['executemany'],
+                      peak_rss_mb=peak_rss,
+                      peak_rss_delta_mb=peak_rss - rss_before)
+    finally:
+        if pd_sql is not None:
+            try:
+                pd_sql.drop_table(table_name)
+            except Exception:
+                pass
+        engine.dispose()
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+    return record
+
+
+def _consume(result, chunksize):
+    """Row count of a read, iterating the chunks of a chunked read"""
+
+    if chunksize is None:
+        return len(result)
+    return sum(len(chunk) for chunk in result)
+
+
+def _case_worker(queue, case):
+    """doc string"""
+
+    try:
+        queue.put(run_case(**case))
+    except Exception:
+        queue.put(_error_record(case, traceback.format_exc()))
+
+
+def _error_record(case, message):
+    """Result record of a failed case, keyed like run_case records"""
+
+    return {'target': case['target'], 'operation': case['operation'],
+            'rows': case['nrows'], 'cols': case['ncols'], 'mix': case['mix'],
+            'chunksize': case['chunksize'], 'error': message}
+
+
+def run_isolated(case, timeout=3600):
+    """Run a case in a child process so its peak RSS is its own"""
+
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_case_worker, args=(queue, case))
+    proc.start()
+    try:
+        record = queue.get(timeout=timeout)
+    except Exception:
+        proc.terminate()
+        record = _error_record(case, "Case did not finish within %s seconds"%timeout)
+    proc.join()
+    return record
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',') if v]
+
+
+def _chunk_list(value):
+    return [None if v.lower() == 'none' else int(v) for v in value.split(',') if v]
+
+
+def _name_list(value):
+    return [v for v in value.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pandas_sql insert and read paths")
+    parser.add_argument('--rows', type=_int_list, default=[1000, 10000])
+    parser.add_argument('--cols', type=_int_list, default=[4, 16])
+    parser.add_argument('--mixes', type=_name_list, default=sorted(DTYPE_MIXES))
+    parser.add_argument('--chunksizes', type=_chunk_list, default=[None, 1000],
+                        help="Comma separated, 'none' for the default chunking")
+    parser.add_argument('--operations', type=_name_list, default=OPERATIONS)
+    parser.add_argument('--targets', type=_name_list, default=['sqlite_memory', 'sqlite_file'])
+    parser.add_argument('--pg-url', default=os.environ.get('PANDAS_SQL_BENCH_PG'),
+                        help="SQLAlchemy URL of a scratch PostgreSQL database, adds the "
+                             "postgresql target")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=int, default=3600)
+    parser.add_argument('--output', default='pandas_sql_bench.json')
+    args = parser.parse_args(argv)
+
+    targets = list(args.targets)
+    if args.pg_url and 'postgresql' not in targets:
+        targets.append('postgresql')
+
+    for mix in args.mixes:
+        if mix not in DTYPE_MIXES:
+            parser.error("'%s' is not a valid dtype mix"%mix)
+    for operation in args.operations:
+        if operation not in OPERATIONS:
+            parser.error("'%s' is not a valid operation"%operation)
+
+    results = []
+    for target in targets:
+        for operation in args.operations:
+            for nrows in args.rows:
+                for ncols in args.cols:
+                    for mix in args.mixes:
+                        for chunksize in args.chunksizes:
+                            for run in xrange(args.repeat):
+                                case = {'target': target, 'operation': operation,
+                                        'nrows': nrows, 'ncols': ncols, 'mix': mix,
+                                        'chunksize': chunksize, 'seed': args.seed,
+                                        'pg_url': args.pg_url}
+                                record = run_isolated(case, timeout=args.timeout)
+                                record['run'] = run
+                                results.append(record)
+
+                                if 'error' in record:
+                                    print "%-14s %-16s %7s x %-3s %-8s chunk=%-6s ERROR"%(
+                                          target, operation, nrows, ncols, mix, chunksize)
+                                else:
+                                    print ("%-14s %-16s %7s x %-3s %-8s chunk=%-6s "
+                                           "%10.0f rows/s %5d stmts %8.1f MB"%(
+                                           target, operation, nrows, ncols, mix, chunksize,
+                                           record['rows_per_sec'] or 0, record['statements'],
+                                           record['peak_rss_mb']))
+
+    report = {'meta': {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'numpy': np.__version__,
+                       'pandas': pd.__version__,
+                       'sqlalchemy': sqlalchemy.__version__,
+                       'seed': args.seed},
+              'results': results}
+
+    with open(args.output, 'w') as out_file:
+        json.dump(report, out_file, indent=2, sort_keys=True)
+    print "Wrote %s results to %s"%(len(results), args.output)
+
+
+if __name__ == '__main__':
+    main()
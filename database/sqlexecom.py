@@ -7,47 +7,200 @@ import os
 import sys
 import time
 import logging
+import threading
 import traceback
 #
 from sqlalchemy import exc
+from sqlalchemy.sql.expression import Insert
 #
+import sqlpool
+import sqlspool
+import sqlmetrics
 import pandas_sql
+import retrypolicy
 from shared_exc import ResourceError    
     
+class StatementBatch(object):
+    """
+    Statements collected for one flush. Consecutive executions of the same
+    statement with the same parameter names are grouped so each group runs
+    as a single executemany, and all groups run in one transaction. The
+    statement is compiled from the first parameter set of a group, so sets
+    naming other columns can not share it.
+    """
+    
+    def __init__(self):
+        self.groups = []
+        self.count = 0
+        
+    def __len__(self):
+        return self.count
+        
+    @staticmethod
+    def _param_keys(params):
+        """Sorted parameter names of a dict, or the number of positional parameters"""
+        
+        if isinstance(params, dict):
+            return tuple(sorted(params))
+        return len(params)
+        
+    def add(self, stmt, params=None):
+        """doc string"""
+        
+        keys = self._param_keys(params) if params else None
+        if self.groups and params and self.groups[-1][2] and \
+                self.groups[-1][1] == keys and \
+                (self.groups[-1][0] is stmt or 
+                 (isinstance(stmt, basestring) and self.groups[-1][0] == stmt)):
+            self.groups[-1][2].append(params)
+        else:
+            self.groups.append((stmt, keys, [params] if params else []))
+        self.count += 1
+        
+    def execute(self, conn):
+        """Run every group on conn in one transaction"""
+        
+        trans = conn.begin()
+        try:
+            for stmt, keys, params in self.groups:
+                if params:
+                    conn.execute(stmt, params).close()
+                else:
+                    conn.execute(stmt).close()
+            trans.commit()
+        except:
+            trans.rollback()
+            raise
+            
+            
+class BatchExecutor(object):
+    """
+    Collects insert/update statements and sends them to the database in
+    batches, flushed once max_size statements are pending or window seconds
+    after the first pending one, whichever comes first, and on flush/close.
+
+    Each batch goes through SQLCommonClass._execute_with_exc as one unit, so
+    retries and queue_routine apply per batch and a retried batch is never
+    partially applied. A flush run by the window timer that fails is raised
+    from the next add, flush or close.
+    """
+    
+    def __init__(self, sql_common, instance, table_name, max_size=100, window=1.0, 
+                                                                  queue_routine=None):
+        self.sql_common = sql_common
+        self.instance = instance
+        self.table_name = table_name
+        self.max_size = max_size
+        self.window = window
+        self.queue_routine = queue_routine
+        self.flushed_batches = 0
+        self.flushed_statements = 0
+        
+        self._pending = StatementBatch()
+        self._timer = None
+        self._error = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Do not flush statements queued by a failing block
+            self._cancel_timer()
+        
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        
+    def _cancel_timer(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+                
+    def _timed_flush(self):
+        try:
+            self.flush()
+        except Exception as e:
+            self._error = e
+        
+    def add(self, stmt, **params):
+        """Queue a statement with its bind parameters"""
+        
+        self._raise_error()
+        with self._lock:
+            self._pending.add(stmt, params)
+            full = len(self._pending) >= self.max_size
+            if not full and self._timer is None and self.window:
+                self._timer = threading.Timer(self.window, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+                
+        if full:
+            self.flush()
+            
+    insert = add
+    update = add
+            
+    def flush(self):
+        """Send the pending statements now"""
+        
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, StatementBatch()
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                    
+            if len(batch):
+                with self.sql_common.Metrics.timer('batch'):
+                    self.sql_common._execute_with_exc(conn=None, instance=self.instance, 
+                                                      table_name=self.table_name, exec_stmt=batch,
+                                                      queue_routine=self.queue_routine)
+                self.flushed_batches += 1
+                self.flushed_statements += len(batch)
+                
+        self._raise_error()
+        
+    def close(self):
+        """Flush what is pending"""
+        self.flush()
+        
+        
 class SQLCommonClass:
     
     
     def __init__(self, engine, meta, wf_logger=None, log_to_file=True, log_level=None, 
-                                                              hdlr_path=None, **kwargs):
-    
+                                   hdlr_path=None, pool_options=None, pre_ping=None, 
+                                  backoff_base=1.0, backoff_cap=30.0, retry_policy=None, 
+                                                          metrics=None, spool=None, **kwargs):
+        """
+        engine can be a SQLAlchemy engine or a database URL, which gets a
+        QueuePool engine from sqlpool.create_pooled_engine with pool_options
+        (pool_size, max_overflow, pool_recycle, pool_timeout). With pre_ping
+        every checkout is tested first; None pings on the engines created
+        here only and leaves a passed engine as it is. Retries back off exponentially with
+        jitter from backoff_base seconds up to backoff_cap. retry_policy, a
+        retrypolicy.RetryPolicy, replaces the default policy; the circuit
+        breaker and retry budget are shared by everything using the same 
+        database URL in the process. Calls are timed into metrics, a 
+        sqlmetrics.OperationMetrics that can be shared between instances.
+        
+        spool, a sqlspool.SQLSpool or the path of its file, keeps inserts and
+        bulk inserts made without a connection or queue_routine when the 
+        database is unavailable, and replays them in the background once it
+        is back.
+        """
     
         if wf_logger == None:
             self.loggerName = 'SQLCommonClass'
-            if log_to_file:
-                self.logger = logging.getLogger(self.loggerName)
-                if hdlr_path is None:
-                    hdlr = logging.FileHandler(self.loggerName + '.log')
-                else:
-                    hdlr = logging.FileHandler(hdlr_path)
-                formatter = logging.Formatter(
-                        "%(asctime)s    [%(name)s]   %(levelname)s    %(message)s")
-                hdlr.setFormatter(formatter)
-                self.logger.addHandler(hdlr)
-                if log_level is None:
-                    self.logger.setLevel(logging.INFO)
-                else:
-                    self.logger.setLevel(log_level.upper())
-            else:
-                self.logger = logging.getLogger(self.loggerName)
-                hdlr = logging.StreamHandler()
-                formatter = logging.Formatter(
-                        '%(asctime)s    %(name)s    %(levelname)s    %(message)s')
-                hdlr.setFormatter(formatter)
-                self.logger.addHandler(hdlr)
-                if log_level is None:
-                    self.logger.setLevel(logging.INFO)
-                else:
-                    self.logger.setLevel(log_level.upper())
+            self.logger = sqlmetrics.configure_logger(self.loggerName, log_to_file=log_to_file, 
+                                                      log_level=log_level, hdlr_path=hdlr_path)
         else:
             self.loggerName = wf_logger +'.SQLCommonClass'
             self.logger = logging.getLogger(self.loggerName)
@@ -55,33 +208,65 @@ class SQLCommonClass:
          
         #///////////////////////////////////////////////////////////////
            
+        if isinstance(engine, basestring):
+            engine = sqlpool.create_pooled_engine(engine, pre_ping=pre_ping is not False, 
+                                                  **(pool_options or {}))
+            
         self.Meta   = meta    
         self.Engine = engine
         self.SqlDB  = pandas_sql.SQLDatabase(engine=self.Engine, meta=self.Meta)    
+        self.Pool   = sqlpool.monitor(self.Engine, pre_ping=pre_ping)
+        
+        if retry_policy is None:
+            retry_policy = retrypolicy.RetryPolicy(attempts=3, base=backoff_base, cap=backoff_cap)
+        
+        self.Retry    = retry_policy
+        self.RetryKey = 'sql:%r'%self.Engine.url
+        self.RETRIES  = self.Retry.attempts
+        self.Metrics  = metrics if metrics is not None else sqlmetrics.OperationMetrics()
         
-        self.RETRIES    = 3
-        self.SLEEP_TIME = 3
+        if isinstance(spool, basestring):
+            spool = sqlspool.SQLSpool(spool)
+        self.Spool = spool
+        if self.Spool is not None:
+            self.Spool.start(self)
         
         #///////////////////////////////////////////////////////////////
     
     
+    @sqlmetrics.timed('connect')
     def db_conn(self, instance, transaction=True, queue_routine=None):
         """doc string"""
         
         self.logger.debug("In method, db_conn")
         
         conn = None
+        trans = None
         instance = instance.lower()
+        retry = self.Retry.begin(self.RetryKey)
             
-        for i in range(self.RETRIES):
+        for i in retry:
             try:
-                self.logger.info("Connecting to %s database"%instance)
+                retry.check()
+                self.logger.info("Connecting to %s database", instance)
                 
-                conn = self.Engine.connect()
+                conn = self.Pool.connect()
                 
                 if transaction:
-                    self.logger.info("Starting %s database transaction"%instance)
+                    self.logger.info("Starting %s database transaction", instance)
                     trans = conn.begin()
+                    
+            except retrypolicy.CircuitOpenError as e:
+                excInfo = sys.exc_info()
+                msg = "Not connecting to %s database. %s"%(instance,e)
+                self.logger.error(msg)
+                if queue_routine is not None:
+                    self.Metrics.count('connect', 'queued')
+                    queue_routine(instance=instance, logMsg=msg, excInfo=excInfo)
+                    self.logger.debug("In method, db_conn")
+                    break
+                else:
+                    raise ResourceError("%s database not available."%instance,errors=e)
                 
             except exc.SQLAlchemyError as e:
                 excInfo = sys.exc_info()  
@@ -91,10 +276,11 @@ class SQLCommonClass:
                 self.logger.error(msg, exc_info=True)
                 
                 if type(e) in (exc.InvalidRequestError, exc.DisconnectionError):
-                    if i+1 != self.RETRIES:
-                        time.sleep(3)
+                    if retry.failed():
+                        self.Metrics.count('connect', 'retries')
                         continue
                     elif queue_routine is not None:
+                        self.Metrics.count('connect', 'queued')
                         queue_routine(instance=instance, logMsg=msg, excInfo=excInfo)
                         self.logger.debug("In method, db_conn")
                         break
@@ -105,7 +291,9 @@ class SQLCommonClass:
                     errorMsg = e.message.lower()
                     if errorMsg.find('shutdown is in progress') != -1 and errorMsg.find('6005') != -1:
                         self.logger.warning("Received SQL Server Shutdown ")
+                        retry.failed(retry=False)
                         if queue_routine is not None:
+                            self.Metrics.count('connect', 'queued')
                             queue_routine(instance=instance,logMsg=msg, excInfo=excInfo)
                             self.logger.debug("In method, db_conn")
                             break
@@ -114,11 +302,12 @@ class SQLCommonClass:
                     else:
                         raise e
                         
-                elif i+1 != self.RETRIES:
-                    self.logger.info("Resubmitting request to connect to %s database"%instance)
-                    time.sleep(5)
+                elif retry.failed(trip=self._resource_error(e)):
+                    self.Metrics.count('connect', 'retries')
+                    self.logger.info("Resubmitting request to connect to %s database", instance)
                 else:
-                    self.logger.warning("Number of resubmission requests exceeded")
+                    self.logger.warning("Number of resubmission requests exceeded (%s)",
+                                        retry.reason)
                     if conn is not None and not conn.closed:
                         #This only applies if a connection is open
                         #but there is an issue starting a transaction. 
@@ -127,7 +316,8 @@ class SQLCommonClass:
                    
                     raise e
             else:
-                self.logger.debug("Successful connection to %s database"%instance)
+                retry.succeeded()
+                self.logger.debug("Successful connection to %s database", instance)
                 break
                 
         if transaction:
@@ -136,6 +326,16 @@ class SQLCommonClass:
             return conn
             
             
+    def _resource_error(self, e):
+        """
+        True when e says the database is unreachable or overloaded, which 
+        counts against its circuit. Constraint and statement errors do not.
+        """
+        
+        return (isinstance(e, (exc.OperationalError, exc.InterfaceError, exc.TimeoutError)) or
+                getattr(e, 'connection_invalidated', False))
+            
+            
     def _execute_with_exc(self, conn, instance, table_name, exec_stmt, frame=None, insert=True, 
                                    update=False, open_trans=False, queue_routine=None, **kwargs):
         """doc string"""
@@ -144,31 +344,63 @@ class SQLCommonClass:
         
         result = None
         closeConn = False
+        retry = self.Retry.begin(self.RetryKey)
+        
+        if frame is not None and insert:
+            operation = 'insert_bulk'
+        elif isinstance(exec_stmt, StatementBatch):
+            operation = 'batch'
+        elif insert:
+            operation = 'insert'
+        elif update:
+            operation = 'update'
+        else:
+            operation = 'query'
         
-        for i in range(self.RETRIES):
+        for i in retry:
             try:
+                retry.check()
                 
                 if frame is not None and insert:
                     self.logger.debug("Executing bulk insert for DataFrame object")
                     if conn is None and not open_trans:
                         #The insert_bulk method will use a context manager 
                         #to open and close a connection
-                        self.SqlDB.insert_bulk(frame=frame, table_name=table_name, conn=None)
+                        self.SqlDB.insert_bulk(frame=frame, table_name=table_name, conn=None, 
+                                                                                   **kwargs)
                     else:
                         #Use passed in connection
-                        self.SqlDB.insert_bulk(frame=frame, table_name=table_name, conn=conn)
+                        self.SqlDB.insert_bulk(frame=frame, table_name=table_name, conn=conn, 
+                                                                                   **kwargs)
                 else:
                     if (conn is None and not open_trans) and (insert or update):
                         #Only allow for a connection to be created if executing a insert or update
                         #otherwise a connection object must be passed in. This is so query objects
                         #can be executed and returned and the connection objects are not left checked
                         #out or not returned to the connection pool.
-                        self.logger.debug("Connecting to %s database"%instance)
-                        conn = self.Engine.connect()
+                        self.logger.debug("Connecting to %s database", instance)
+                        conn = self.Pool.connect()
                         closeConn = True
                         
-                    self.logger.debug("Executing statement %s..."%exec_stmt)
-                    result = conn.execute(exec_stmt, **kwargs)
+                    if isinstance(exec_stmt, StatementBatch):
+                        self.logger.debug("Executing batch of %s statements", len(exec_stmt))
+                        result = exec_stmt.execute(conn)
+                    else:
+                        self.logger.debug("Executing statement %s...", exec_stmt)
+                        result = conn.execute(exec_stmt, **kwargs)
+                        self.SqlDB.statement_executed(exec_stmt)
+                        
+            except retrypolicy.CircuitOpenError as e:
+                self.logger.debug("In method, _execute_with_exc")
+                excInfo = sys.exc_info()
+                msg = "Not executing on %s table %s. %s"%(instance,table_name,e)
+                self.logger.error(msg)
+                if queue_routine is not None:
+                    self.Metrics.count(operation, 'queued')
+                    queue_routine(instance=instance, logMsg=msg, excInfo=excInfo)
+                    break
+                else:
+                    raise ResourceError('%s database not available'%instance,errors=e)
                 
             except exc.SQLAlchemyError as e:
                 self.logger.debug("In method, _execute_with_exc")
@@ -187,24 +419,21 @@ class SQLCommonClass:
                 self.logger.error(msg, exc_info=True)
                 
                 if type(e) in (exc.InvalidRequestError, exc.DisconnectionError):
-                    if i+1 != self.RETRIES:
-                        if queue_routine is not None:
-                            queue_routine(instance=instance, logMsg=msg, excInfo=excInfo)
-                            self.logger.debug("In method, _execute_with_exc")
-                            break
-                        elif open_trans:
-                            #There is a tranaction associated with
-                            #this connection so dont retry
-                            raise e
-                        else:
-                            conn = None
-                            time.sleep(self.SLEEP_TIME)
-                            continue
-                            
-                    elif queue_routine is not None:
+                    if queue_routine is not None:
+                        retry.failed(retry=False)
+                        self.Metrics.count(operation, 'queued')
                         queue_routine(instance=instance, logMsg=msg, excInfo=excInfo)
                         self.logger.debug("In method, _execute_with_exc")
                         break
+                    elif open_trans:
+                        #There is a tranaction associated with
+                        #this connection so dont retry
+                        retry.failed(retry=False)
+                        raise e
+                    elif retry.failed():
+                        self.Metrics.count(operation, 'retries')
+                        conn = None
+                        continue
                     else:
                         raise ResourceError('%s database not available'%instance,errors=e)
 
@@ -212,7 +441,9 @@ class SQLCommonClass:
                     errorMsg = e.message.lower()
                     if errorMsg.find('shutdown is in progress') != -1 and errorMsg.find('6005') != -1:
                         self.logger.warning("Received SQL Server Shutdown ")
+                        retry.failed(retry=False)
                         if queue_routine is not None:
+                            self.Metrics.count(operation, 'queued')
                             queue_routine(logMsg=msg, excInfo=excInfo)
                             self.logger.debug("In method, _execute_with_exc")
                             break
@@ -221,26 +452,36 @@ class SQLCommonClass:
                     else:
                         raise e
 
-                elif i+1 != self.RETRIES:
-                    if conn.invalidated:
-                        if not open_trans:
-                            conn = None
-                        else:
-                            raise e
-                    self.logger.info("Resubmitting request to insert record(s) into '%s' table"
-                                      %table_name)
-                    time.sleep(self.SLEEP_TIME)
                 else:
-                    self.logger.warning("Number of resubmission requests exceeded")
-                    raise e
+                    #A bulk insert without a passed in connection has no conn here
+                    invalidated = conn is not None and conn.invalidated
+                    if invalidated and open_trans:
+                        retry.failed(retry=False)
+                        raise e
+                    elif retry.failed(trip=self._resource_error(e)):
+                        self.Metrics.count(operation, 'retries')
+                        if invalidated:
+                            conn = None
+                        self.logger.info("Resubmitting request to insert record(s) into '%s' table",
+                                         table_name)
+                    else:
+                        self.logger.warning("Number of resubmission requests exceeded (%s)",
+                                            retry.reason)
+                        if queue_routine is not None and self._resource_error(e):
+                            self.Metrics.count(operation, 'queued')
+                            queue_routine(instance=instance, logMsg=msg, excInfo=excInfo)
+                            self.logger.debug("In method, _execute_with_exc")
+                            break
+                        raise e
             else:
+                retry.succeeded()
                 self.logger.debug("In method, _execute_with_exc")
                 if insert:
-                    self.logger.info("Record(s) successfully inserted to table %s"%table_name)
+                    self.logger.info("Record(s) successfully inserted to table %s", table_name)
                 elif update:
-                    self.logger.info("Record(s) successfully updated in table %s"%table_name)
+                    self.logger.info("Record(s) successfully updated in table %s", table_name)
                 else:
-                    self.logger.info("Statement successully executed on table %s"%table_name)
+                    self.logger.info("Statement successully executed on table %s", table_name)
                 #Break the RETRIES for loop
                 break
             finally:
@@ -248,23 +489,66 @@ class SQLCommonClass:
                     #Close the connection because, it was created and 
                     #there is no transaction associated with it.
                     if conn is not None and not conn.closed:
-                        self.logger.info("Closing %s database connection..."%instance)
+                        self.logger.info("Closing %s database connection...", instance)
                         conn.close()
                     else:
-                        self.logger.info("%s database connection closed"%instance)
+                        self.logger.info("%s database connection closed", instance)
+                    #A retry has to open a new connection
+                    conn = None
+                    closeConn = False
    
         return result
         
             
+    def _spool_routine(self, put, *args, **kwargs):
+        """queue_routine that hands the write to a SQLSpool put method"""
+        
+        #Sub Function#
+        def spool_write(instance=None, logMsg=None, excInfo=None):
+            put(*args, **kwargs)
+            self.logger.warning("Write spooled for replay. %s", logMsg)
+        #Start Method#
+        
+        return spool_write
+        
+        
+    def _insert_rows(self, insert_stmt, params):
+        """
+        (table name, schema, [row]) of a single row Insert construct, None 
+        when the statement can not be replayed as a bulk insert.
+        """
+        
+        if not isinstance(insert_stmt, Insert):
+            return None
+        try:
+            row = insert_stmt.compile(column_keys=list(params)).construct_params(params)
+        except exc.SQLAlchemyError:
+            return None
+            
+        table = insert_stmt.table
+        if not row or any(key not in table.c for key in row):
+            return None
+        return table.name, table.schema, [row]
+        
+        
+    @sqlmetrics.timed('insert')
     def insert(self, conn, instance, table_name, insert_stmt, open_trans=False, queue_routine=None, **kwargs):
         """doc string"""
         
+        if queue_routine is None and self.Spool is not None and conn is None and not open_trans:
+            spooled = self._insert_rows(insert_stmt, kwargs)
+            if spooled is not None:
+                name, schema, rows = spooled
+                queue_routine = self._spool_routine(self.Spool.put_rows, instance, name, rows, 
+                                                                               schema=schema)
+        
         self._execute_with_exc(conn=conn, instance=instance, table_name=table_name, 
                                        exec_stmt=insert_stmt, open_trans=open_trans, 
                                               queue_routine=queue_routine, **kwargs)
         return
         
         
+    @sqlmetrics.timed('update')
     def update(self, conn, instance, table_name, update_stmt, open_trans=False, queue_routine=None, **kwargs):
         """doc string"""
         
@@ -274,9 +558,31 @@ class SQLCommonClass:
         return
                         
             
+    def batch(self, instance, table_name, max_size=100, window=1.0, queue_routine=None):
+        """
+        BatchExecutor for insert/update statements on table_name. 
+
+        with sql_common.batch('log', 'status', max_size=500) as batch:
+            for record in records:
+                batch.update(status_stmt, id=record.id, status=record.status)
+        """
+        
+        return BatchExecutor(self, instance, table_name, max_size=max_size, window=window,
+                                                          queue_routine=queue_routine)
+        
+        
+    @sqlmetrics.timed('insert_bulk')
     def insert_bulk(self, frame, conn, instance, table_name, open_trans=False, queue_routine=None, **kwargs):
-        """doc string"""
+        """
+        Bulk insert a DataFrame. kwargs are passed on to SQLDatabase.insert_bulk,
+        e.g. workers=4, transaction='staging' for a parallel all or nothing
+        insert that is safe to resubmit on retry. With a spool the frame is 
+        spooled when the database is unavailable.
+        """
         
+        if queue_routine is None and self.Spool is not None and conn is None and not open_trans:
+            queue_routine = self._spool_routine(self.Spool.put_frame, instance, table_name, 
+                                                                            frame, **kwargs)
         
         self._execute_with_exc(conn=conn, instance=instance, table_name=table_name, 
                                  frame=frame, exec_stmt=None, open_trans=open_trans, 
@@ -284,6 +590,7 @@ class SQLCommonClass:
         return
         
    
+    @sqlmetrics.timed('query')
     def query(self, conn, instance, table_name, query_stmt, open_trans=False, queue_routine=None, **kwargs):
         """doc string"""
     
@@ -293,4 +600,43 @@ class SQLCommonClass:
                                 open_trans=open_trans, queue_routine=queue_routine, **kwargs)
         return result
     
-    
\ No newline at end of file
+    
+
+
+    def pool_stats(self):
+        """
+        Pool counters and state: checkouts, waits and wait_seconds for 
+        checkouts that found the pool exhausted, checked_out, overflow, ...
+        """
+        
+        return self.Pool.stats()
+        
+        
+    def retry_stats(self):
+        """
+        Retry counters and circuit state of the database: retries, rejected
+        calls while the circuit was open, budget_denied, deadline_exceeded, ...
+        """
+        
+        return self.Retry.stats(self.RetryKey)
+        
+        
+    def spool_stats(self):
+        """Spooled, replayed and dead entry counts and the entries pending"""
+        
+        if self.Spool is None:
+            return None
+        return self.Spool.stats()
+        
+        
+    def metrics_stats(self, prometheus=False):
+        """
+        Calls, errors, retries, queued and the latency histogram per operation
+        (connect, insert, update, insert_bulk, query, batch) as a dict, or
+        with prometheus in the Prometheus text format.
+        """
+        
+        if prometheus:
+            return self.Metrics.prometheus()
+        return self.Metrics.as_dict()
+    
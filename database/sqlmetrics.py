@@ -0,0 +1,228 @@
+# Author: Dustin Doubet
+# Description:
+# Logger setup without duplicate handlers, and per operation counters and
+# latency histograms for SQLCommonClass, exported as a dict or in the
+# Prometheus text format
+
+#Import Python standard libraries
+import os
+import sys
+import bisect
+import logging
+import functools
+import threading
+from timeit import default_timer
+from contextlib import contextmanager
+
+
+# Seconds, upper bounds of the latency buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+FILE_FORMAT = "%(asctime)s    [%(name)s]   %(levelname)s    %(message)s"
+STREAM_FORMAT = '%(asctime)s    %(name)s    %(levelname)s    %(message)s'
+
+
+def _has_handler(logger, hdlr_path=None):
+    """
+    True when the logger already has a FileHandler writing hdlr_path, or
+    with hdlr_path None a StreamHandler on stderr.
+    """
+
+    for hdlr in logger.handlers:
+        if hdlr_path is not None:
+            if (isinstance(hdlr, logging.FileHandler) and
+                    hdlr.baseFilename == os.path.abspath(hdlr_path)):
+                return True
+        elif (type(hdlr) is logging.StreamHandler and
+                getattr(hdlr, 'stream', None) is sys.stderr):
+            return True
+    return False
+
+
+def configure_logger(logger_name, log_to_file=True, log_level=None, hdlr_path=None):
+    """
+    The named logger with a file handler (hdlr_path, default
+    logger_name.log) or a stderr stream handler. Loggers are process
+    wide, so the handler is only added when an equivalent one is not
+    already attached, and creating many instances of a class does not
+    write every record many times.
+    """
+
+    logger = logging.getLogger(logger_name)
+
+    if log_to_file:
+        if hdlr_path is None:
+            hdlr_path = logger_name + '.log'
+        if not _has_handler(logger, hdlr_path):
+            hdlr = logging.FileHandler(hdlr_path)
+            hdlr.setFormatter(logging.Formatter(FILE_FORMAT))
+            logger.addHandler(hdlr)
+    elif not _has_handler(logger):
+        hdlr = logging.StreamHandler()
+        hdlr.setFormatter(logging.Formatter(STREAM_FORMAT))
+        logger.addHandler(hdlr)
+
+    if log_level is None:
+        logger.setLevel(logging.INFO)
+    else:
+        logger.setLevel(log_level.upper())
+
+    return logger
+
+
+class Histogram(object):
+    """Latency histogram with fixed bucket upper bounds, not thread safe"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs, the last bound is +Inf"""
+
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class OperationMetrics(object):
+    """
+    Calls, errors, retries, queued calls and a latency histogram per
+    operation (connect, insert, update, query, ...). Recording takes a lock
+    and a bisect, nothing is formatted until export.
+
+    Parameters
+    ----------
+    buckets : sequence of float, default DEFAULT_BUCKETS
+        Histogram bucket upper bounds in seconds.
+    labels : dict, default None
+        Labels added to every exported Prometheus sample.
+    """
+
+    COUNTERS = ('calls', 'errors', 'retries', 'queued')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, labels=None):
+        self.buckets = buckets
+        self.labels = dict(labels or {})
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def _operation(self, operation):
+        entry = self._operations.get(operation)
+        if entry is None:
+            entry = self._operations[operation] = dict.fromkeys(self.COUNTERS, 0)
+            entry['latency'] = Histogram(self.buckets)
+        return entry
+
+    def observe(self, operation, seconds, error=False):
+        """Record one call of operation taking seconds"""
+
+        with self._lock:
+            entry = self._operation(operation)
+            entry['calls'] += 1
+            if error:
+                entry['errors'] += 1
+            entry['latency'].observe(seconds)
+
+    def count(self, operation, counter, value=1):
+        """Add to a counter of operation, 'retries' or 'queued'"""
+
+        with self._lock:
+            self._operation(operation)[counter] += value
+
+    @contextmanager
+    def timer(self, operation):
+        """Time the block as one call of operation, an error if it raises"""
+
+        start = default_timer()
+        try:
+            yield
+        except Exception:
+            self.observe(operation, default_timer() - start, error=True)
+            raise
+        self.observe(operation, default_timer() - start)
+
+    def reset(self):
+        """doc string"""
+
+        with self._lock:
+            self._operations.clear()
+
+    def as_dict(self):
+        """
+        {operation: {'calls', 'errors', 'retries', 'queued', 'seconds_sum',
+        'seconds_mean', 'buckets': [(upper bound, cumulative count), ...]}}
+        """
+
+        stats = {}
+        with self._lock:
+            for operation, entry in self._operations.iteritems():
+                latency = entry['latency']
+                stats[operation] = dict((name, entry[name]) for name in self.COUNTERS)
+                stats[operation].update(
+                    seconds_sum=latency.sum,
+                    seconds_mean=latency.sum / latency.count if latency.count else None,
+                    buckets=latency.cumulative())
+        return stats
+
+    def prometheus(self, namespace='sqlcommon'):
+        """The metrics in the Prometheus text exposition format"""
+
+        stats = self.as_dict()
+        operations = sorted(stats)
+
+        def labels(operation, **extra):
+            pairs = sorted(self.labels.items()) + [('operation', operation)] + sorted(extra.items())
+            return '{%s}'%','.join('%s="%s"'%(k, _escape(v)) for k, v in pairs)
+
+        lines = []
+        name = '%s_operation_seconds'%namespace
+        lines.append('# HELP %s Latency of database operations in seconds'%name)
+        lines.append('# TYPE %s histogram'%name)
+        for operation in operations:
+            for bound, count in stats[operation]['buckets']:
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('%s_bucket%s %d'%(name, labels(operation, le=le), count))
+            lines.append('%s_sum%s %r'%(name, labels(operation), stats[operation]['seconds_sum']))
+            lines.append('%s_count%s %d'%(name, labels(operation), stats[operation]['calls']))
+
+        for counter in self.COUNTERS:
+            name = '%s_operation_%s_total'%(namespace, counter)
+            lines.append('# HELP %s Database operation %s'%(name, counter))
+            lines.append('# TYPE %s counter'%name)
+            for operation in operations:
+                lines.append('%s%s %d'%(name, labels(operation), stats[operation][counter]))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def timed(operation):
+    """
+    Method decorator recording each call in self.Metrics under operation.
+
+    @sqlmetrics.timed('query')
+    def query(self, ...):
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.Metrics.timer(operation):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,387 @@
+# Author: Dustin Doubet
+# Description:
+# Direct database to database migration. Tables are read from the source in
+# chunks through SQLDatabase.read_table and written to the target through
+# SQLDatabase.insert_bulk, without export and import SQL files. The target
+# tables are created from the pg_ddl_parser output with pg_mysql_dtype_map.
+#
+# Several tables are copied at a time, a table only once the tables it has
+# foreign keys to are done. Progress is checkpointed per table and chunk in
+# a SQLite file, and a run started again with the same file resumes: done
+# tables are skipped, and a table with a primary key continues after the
+# key of its last checkpointed chunk. A table without a primary key that
+# was left half copied is emptied and copied again.
+
+#Import Python standard libraries
+import json
+import time
+import sqlite3
+import logging
+import threading
+import collections
+import cPickle as pickle
+from timeit import default_timer
+
+import numpy as np
+#
+from sqlalchemy.engine import reflection
+#
+import sqlpool
+import pandas_sql
+import db_migrate_utils
+
+try:
+    # Standard library on Python 3, the futures package on Python 2
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+except ImportError:
+    ThreadPoolExecutor = None
+
+
+COPYING = 'copying'
+DONE = 'done'
+
+
+class MigrationCheckpoint(object):
+    """
+    Per table copy progress in a SQLite file: status, rows and chunks
+    copied, the key of the last copied row and the chunksize used. Every
+    update is committed before it returns.
+
+    Parameters
+    ----------
+    path : string
+        SQLite file of the checkpoint, created if missing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=FULL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS tables ("
+                             "name TEXT PRIMARY KEY, status TEXT, rows INTEGER, "
+                             "chunks INTEGER, last_key BLOB, chunksize INTEGER, "
+                             "started REAL, updated REAL)")
+            self._db.commit()
+
+    def get(self, table):
+        """{'status', 'rows', 'chunks', 'last_key', 'chunksize'} of table, None if not started"""
+
+        with self._lock:
+            row = self._db.execute("SELECT status, rows, chunks, last_key, chunksize "
+                                   "FROM tables WHERE name = ?", (table,)).fetchone()
+        if row is None:
+            return None
+        last_key = pickle.loads(str(row[3])) if row[3] is not None else None
+        return {'status': row[0], 'rows': row[1], 'chunks': row[2], 'last_key': last_key,
+                'chunksize': row[4]}
+
+    def _write(self, sql, params):
+        with self._lock:
+            self._db.execute(sql, params)
+            self._db.commit()
+
+    def start(self, table, chunksize):
+        """Mark table as being copied, the progress of an earlier run is kept"""
+
+        now = time.time()
+        self._write("INSERT OR IGNORE INTO tables (name, status, rows, chunks, chunksize, "
+                    "started, updated) VALUES (?, ?, 0, 0, ?, ?, ?)",
+                    (table, COPYING, chunksize, now, now))
+        self._write("UPDATE tables SET status = ?, chunksize = ?, updated = ? WHERE name = ?",
+                    (COPYING, chunksize, now, table))
+
+    def chunk(self, table, rows, chunks, last_key=None):
+        """Record rows and chunks copied so far and the key of the last row"""
+
+        if last_key is not None:
+            last_key = sqlite3.Binary(pickle.dumps(last_key, pickle.HIGHEST_PROTOCOL))
+        self._write("UPDATE tables SET rows = ?, chunks = ?, last_key = ?, updated = ? "
+                    "WHERE name = ?", (rows, chunks, last_key, time.time(), table))
+
+    def done(self, table, rows, chunks):
+        """doc string"""
+
+        self._write("UPDATE tables SET status = ?, rows = ?, chunks = ?, updated = ? "
+                    "WHERE name = ?", (DONE, rows, chunks, time.time(), table))
+
+    def reset(self, table=None):
+        """Forget the progress of table, or of every table"""
+
+        if table is None:
+            self._write("DELETE FROM tables", ())
+        else:
+            self._write("DELETE FROM tables WHERE name = ?", (table,))
+
+    def close(self):
+        """doc string"""
+
+        with self._lock:
+            self._db.close()
+
+
+def _plain(value):
+    """A key value as a Python object the driver can bind"""
+
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'to_pydatetime'):
+        return value.to_pydatetime()
+    return value
+
+
+class DirectMigration(object):
+    """
+    Parameters
+    ----------
+    source, target : SQLAlchemy engine or URL
+        Database read from, and the MySQL database written to. For a URL
+        a pooled engine is created with a connection per table worker
+        and insert worker.
+    ddlDict : dict
+        pg_ddl_parser output describing the tables to copy.
+    db : string, default None
+        Database key of ddlDict, needed only when it has several.
+    tables : list, default None
+        Tables of ddlDict to copy, all of them if None.
+    dtype_map : dict, default None
+        PostgreSQL to MySQL types for the target tables, pg_mysql_dtype_map()
+        if None.
+    source_schema, target_schema : string, default None
+        Schema read from and database written to, the defaults of the
+        connections if None.
+    checkpoint_path : string, default None
+        SQLite file keeping the progress, nothing is checkpointed and a run
+        can not resume if None.
+    chunksize : int, default 50000
+        Rows per read and per insert_bulk call, checkpointed after each.
+    workers : int, default 4
+        Tables copied at the same time.
+    insert_workers : int, default 1
+        insert_bulk workers per table.
+    insert_chunksize : int, default None
+        Rows per insert statement, see SQLDatabase.insert_bulk.
+    create_tables : boolean, default True
+        Create the target tables that do not exist from ddlDict.
+    columnar : boolean, default False
+        Read into typed column buffers, see SQLDatabase.read_table.
+    logger_name : string, default 'DirectMigration'
+
+    Foreign keys are read from the source, pg_ddl_parser only keeps whether
+    a column is one. Tables with foreign keys in a cycle raise ValueError.
+    """
+
+    def __init__(self, source, target, ddlDict, db=None, tables=None, dtype_map=None,
+                 source_schema=None, target_schema=None, checkpoint_path=None, chunksize=50000,
+                 workers=4, insert_workers=1, insert_chunksize=None, create_tables=True,
+                 columnar=False, logger_name='DirectMigration'):
+        if workers > 1 and ThreadPoolExecutor is None:
+            raise ImportError("DirectMigration with several workers requires "
+                              "concurrent.futures, install the futures package on Python 2")
+        if db is None:
+            if len(ddlDict) != 1:
+                raise ValueError("ddlDict has the databases %s, pass db"%', '.join(ddlDict))
+            db = list(ddlDict)[0]
+
+        pool_size = max(1, workers) * max(1, insert_workers)
+        if isinstance(source, basestring):
+            source = sqlpool.create_pooled_engine(source, pool_size=pool_size)
+        if isinstance(target, basestring):
+            target = sqlpool.create_pooled_engine(target, pool_size=pool_size)
+
+        self.source_engine = source
+        self.target_engine = target
+        self.tables = ddlDict[db]['tables']
+        self.table_names = [t for t in self.tables if tables is None or t in tables]
+        self.dtype_map = dtype_map if dtype_map is not None else \
+                                            db_migrate_utils.pg_mysql_dtype_map()
+        self.source_schema = source_schema
+        self.target_schema = target_schema
+        self.chunksize = chunksize
+        self.workers = max(1, workers)
+        self.insert_workers = insert_workers
+        self.insert_chunksize = insert_chunksize
+        self.create_tables = create_tables
+        self.columnar = columnar
+        self.logger = logging.getLogger(logger_name)
+        self.checkpoint = MigrationCheckpoint(checkpoint_path) if checkpoint_path else None
+        self._dependencies = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def dependencies(self):
+        """{table: set of the copied tables it has foreign keys to}"""
+
+        if self._dependencies is None:
+            inspector = reflection.Inspector.from_engine(self.source_engine)
+            names = set(self.table_names)
+            self._dependencies = {}
+            for table in self.table_names:
+                referred = set(fk['referred_table'] for fk in
+                               inspector.get_foreign_keys(table, schema=self.source_schema))
+                self._dependencies[table] = (referred & names) - set([table])
+        return self._dependencies
+
+    def copy_order(self):
+        """The tables, each after the tables it has foreign keys to"""
+
+        dependencies = self.dependencies()
+        order, done = [], set()
+        pending = list(self.table_names)
+        while pending:
+            ready = [t for t in pending if dependencies[t] <= done]
+            if not ready:
+                raise ValueError("Foreign keys in a cycle between the tables %s"
+                                 %', '.join(pending))
+            for table in ready:
+                pending.remove(table)
+                order.append(table)
+                done.add(table)
+        return order
+
+    def create_target_tables(self):
+        """Create the target tables that do not exist, returns their names"""
+
+        target = pandas_sql.SQLDatabase(self.target_engine, schema=self.target_schema)
+        created = []
+        try:
+            for table in self.copy_order():
+                if target.has_table(table, schema=self.target_schema):
+                    continue
+                stmt = db_migrate_utils.mysql_create_table(table, self.tables[table],
+                                                           self.dtype_map, self.target_schema)
+                target.execute(stmt)
+                created.append(table)
+                self.logger.info("Created target table %s", table)
+        finally:
+            if created:
+                # has_table looked them up as missing, copy_table reflects them
+                pandas_sql.clear_schema_cache(self.target_engine)
+        return created
+
+    def _json_columns(self, table):
+        """Columns of JSON and array types, bound as JSON text"""
+
+        tableDict = self.tables[table]
+        return [col for col, dtype in zip(tableDict['columns'], tableDict['dtypes'])
+                if dtype.lower().startswith(('json', 'array')) or dtype.endswith('[]')]
+
+    def copy_table(self, table):
+        """
+        Copy one table, resuming from its checkpoint. Returns its stats:
+        rows, chunks, seconds and resumed (rows copied by earlier runs).
+        """
+
+        start = default_timer()
+        tableDict = self.tables[table]
+        keys = [col for col, pk in zip(tableDict['columns'], tableDict['pk']) if pk]
+        state = self.checkpoint.get(table) if self.checkpoint is not None else None
+
+        if state is not None and state['status'] == DONE:
+            self.logger.info("Table %s already copied, %s rows", table, state['rows'])
+            return {'rows': state['rows'], 'chunks': state['chunks'], 'seconds': 0.0,
+                    'resumed': state['rows']}
+
+        source = pandas_sql.SQLDatabase(self.source_engine, schema=self.source_schema)
+        target = pandas_sql.SQLDatabase(self.target_engine, schema=self.target_schema)
+        rows, chunks, after, ignore_rows = 0, 0, None, 0
+        if state is not None:
+            if keys:
+                rows, chunks, after = state['rows'], state['chunks'], state['last_key']
+                # The chunk after the checkpoint may have committed before the
+                # run stopped, its rows are skipped if they are there
+                ignore_rows = state['chunksize'] or self.chunksize
+                self.logger.info("Resuming table %s after %s rows", table, rows)
+            else:
+                self.logger.warning("Table %s has no primary key to resume from, "
+                                    "copying it again", table)
+                target.execute(target.get_table(table, self.target_schema).delete())
+        resumed = rows
+
+        if self.checkpoint is not None:
+            self.checkpoint.start(table, self.chunksize)
+        json_columns = self._json_columns(table)
+
+        reader = source.read_table(table, columns=tableDict['columns'],
+                                   schema=self.source_schema, chunksize=self.chunksize,
+                                   columnar=self.columnar, stream=True,
+                                   order_by=keys or None, after=after)
+        for frame in reader:
+            if not len(frame):
+                continue
+            for col in json_columns:
+                frame[col] = frame[col].map(lambda v: json.dumps(v) if isinstance(v, (list, dict))
+                                            else v)
+
+            target.insert_bulk(frame, table, schema=self.target_schema,
+                               chunksize=self.insert_chunksize, workers=self.insert_workers,
+                               on_conflict='ignore' if rows - resumed < ignore_rows else None)
+            rows += len(frame)
+            chunks += 1
+            if keys:
+                after = tuple(_plain(v) for v in frame[keys].iloc[-1])
+            if self.checkpoint is not None:
+                self.checkpoint.chunk(table, rows, chunks, after)
+            self.logger.debug("Table %s: %s rows copied", table, rows)
+
+        if self.checkpoint is not None:
+            self.checkpoint.done(table, rows, chunks)
+        seconds = default_timer() - start
+        self.logger.info("Copied table %s, %s rows in %.1f seconds", table, rows, seconds)
+        return {'rows': rows, 'chunks': chunks, 'seconds': seconds, 'resumed': resumed}
+
+    def run(self):
+        """
+        Create the missing target tables and copy every table. Returns
+        {table: stats} in copy order. A failing table raises once the
+        tables being copied with it are done, and checkpointed progress is
+        kept for the next run.
+        """
+
+        order = self.copy_order()
+        if self.create_tables:
+            self.create_target_tables()
+
+        stats = {}
+        if self.workers == 1:
+            for table in order:
+                stats[table] = self.copy_table(table)
+            return collections.OrderedDict((table, stats[table]) for table in order)
+
+        dependencies = self.dependencies()
+        pending = list(order)
+        running = {}
+        done = set()
+        with ThreadPoolExecutor(self.workers) as executor:
+            while pending or running:
+                for table in [t for t in pending if dependencies[t] <= done]:
+                    if len(running) >= self.workers:
+                        break
+                    pending.remove(table)
+                    running[executor.submit(self.copy_table, table)] = table
+
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    table = running.pop(future)
+                    try:
+                        stats[table] = future.result()
+                    except Exception as e:
+                        # Start nothing more, the running tables finish
+                        # when the executor shuts down
+                        self.logger.error("Copy of table %s failed: %s", table, e)
+                        raise
+                    done.add(table)
+
+        return collections.OrderedDict((table, stats[table]) for table in order)
+
+    def close(self):
+        """doc string"""
+
+        if self.checkpoint is not None:
+            self.checkpoint.close()
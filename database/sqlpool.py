@@ -0,0 +1,177 @@
+# Author: Dustin Doubet
+# Description:
+# Connection pool sizing, checkout health checks and pool statistics
+# for the SQLAlchemy engines used by SQLCommonClass
+
+#Import Python standard libraries
+import weakref
+import threading
+from timeit import default_timer
+#
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.pool import QueuePool
+
+
+# One monitor per engine, so SQLCommonClass instances sharing an engine do
+# not stack up pool listeners
+_MONITORS = weakref.WeakKeyDictionary()
+_MONITORS_LOCK = threading.Lock()
+
+
+def create_pooled_engine(url, pool_size=5, max_overflow=10, pool_recycle=3600, pool_timeout=30,
+                                                                      pre_ping=True, **kwargs):
+    """
+    Engine with a QueuePool sized for the worker count.
+
+    Parameters
+    ----------
+    url : string
+        SQLAlchemy database URL
+    pool_size : int, default 5
+        Connections kept open in the pool.
+    max_overflow : int, default 10
+        Connections opened beyond pool_size under load and closed when
+        returned. A checkout waits once pool_size + max_overflow are out.
+    pool_recycle : int, default 3600
+        Seconds after which a connection is replaced on checkout, set below
+        the server or firewall idle timeout (MySQL wait_timeout).
+    pool_timeout : int, default 30
+        Seconds a checkout waits for a connection before raising.
+    pre_ping : boolean, default True
+        Test every connection on checkout, see PoolMonitor.
+    kwargs : passed on to create_engine
+    """
+
+    engine = create_engine(url, poolclass=QueuePool, pool_size=pool_size,
+                           max_overflow=max_overflow, pool_recycle=pool_recycle,
+                           pool_timeout=pool_timeout, **kwargs)
+    monitor(engine, pre_ping=pre_ping)
+
+    return engine
+
+
+def monitor(engine, pre_ping=None):
+    """
+    The PoolMonitor of the engine, created on first use.
+
+    pre_ping True or False turns the checkout ping on or off for everything
+    using the engine, None leaves it as it is (off for a new monitor).
+    """
+
+    with _MONITORS_LOCK:
+        pool_monitor = _MONITORS.get(engine)
+        if pool_monitor is None:
+            pool_monitor = _MONITORS[engine] = PoolMonitor(engine, pre_ping=bool(pre_ping))
+        elif pre_ping is not None:
+            pool_monitor.pre_ping = pre_ping
+
+    return pool_monitor
+
+
+class PoolMonitor(object):
+    """
+    Pool event counters for an engine, and the checkout ping.
+
+    With pre_ping every checkout runs a trivial SELECT on the connection. A
+    failing ping raises DisconnectionError, which makes the pool discard the
+    connection and check out another one, so a stale connection fails here
+    instead of in the middle of an insert.
+
+    Checkouts made through connect() are timed. A checkout that found every
+    connection out (pool_size + max_overflow) counts as a wait, and its time
+    as wait time, which is the sign the pool is too small for the workers.
+    """
+
+    def __init__(self, engine, pre_ping=False):
+        # Weak so the monitor registry does not keep the engine alive
+        self._engine = weakref.ref(engine)
+        self.pre_ping = pre_ping
+        self.counters = {'connects': 0, 'checkouts': 0, 'checkins': 0, 'invalidations': 0,
+                         'ping_failures': 0, 'waits': 0, 'wait_seconds': 0.0,
+                         'max_wait_seconds': 0.0}
+        self._lock = threading.Lock()
+        self._ping_stmt = "SELECT 1 FROM DUAL" if engine.dialect.name == 'oracle' else "SELECT 1"
+
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+
+    @property
+    def engine(self):
+        return self._engine()
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def _on_connect(self, dbapi_conn, connection_record):
+        self._count('connects')
+
+    def _on_checkout(self, dbapi_conn, connection_record, connection_proxy):
+        self._count('checkouts')
+        if not self.pre_ping:
+            return
+
+        cursor = None
+        try:
+            # A closed connection can fail to open the cursor already
+            cursor = dbapi_conn.cursor()
+            cursor.execute(self._ping_stmt)
+        except Exception:
+            self._count('ping_failures')
+            # The pool retries the checkout with a fresh connection
+            raise exc.DisconnectionError("Connection failed the checkout ping")
+        finally:
+            try:
+                if cursor is not None:
+                    cursor.close()
+            except Exception:
+                pass
+
+    def _on_checkin(self, dbapi_conn, connection_record):
+        self._count('checkins')
+
+    def _on_invalidate(self, dbapi_conn, connection_record, exception):
+        self._count('invalidations')
+
+    def _exhausted(self):
+        """True when a checkout has to wait for a connection to be returned"""
+
+        pool = self.engine.pool
+        if not isinstance(pool, QueuePool):
+            return False
+        max_overflow = getattr(pool, '_max_overflow', 0)
+        return (pool.checkedin() == 0 and max_overflow >= 0 and
+                pool.checkedout() >= pool.size() + max_overflow)
+
+    def connect(self):
+        """engine.connect() with the wait accounting"""
+
+        exhausted = self._exhausted()
+        start = default_timer()
+        conn = self.engine.connect()
+
+        if exhausted:
+            elapsed = default_timer() - start
+            with self._lock:
+                self.counters['waits'] += 1
+                self.counters['wait_seconds'] += elapsed
+                self.counters['max_wait_seconds'] = max(self.counters['max_wait_seconds'],
+                                                        elapsed)
+        return conn
+
+    def stats(self):
+        """Counters plus the current pool state"""
+
+        with self._lock:
+            stats = dict(self.counters)
+
+        pool = self.engine.pool
+        if isinstance(pool, QueuePool):
+            stats.update(pool_size=pool.size(), checked_out=pool.checkedout(),
+                         checked_in=pool.checkedin(), overflow=pool.overflow(),
+                         max_overflow=getattr(pool, '_max_overflow', None))
+        stats['status'] = pool.status()
+
+        return stats
@@ -0,0 +1,296 @@
+# Author: Dustin Doubet
+# Description:
+# Durable local spool for writes SQLCommonClass could not make while a
+# database was unavailable, replayed through SQLDatabase.insert_bulk by a
+# background drainer once the database is back.
+#
+# Entries are kept in a SQLite file: one row per spooled insert_bulk frame
+# or batch of insert rows. By default every put is committed to the file
+# before it returns; with flush_rows > 1 puts are buffered and written in 
+# one transaction every flush_rows puts or drain interval, whichever comes
+# first. Replay is at least once, an entry is deleted after the insert that
+# replayed it committed.
+
+#Import Python standard libraries
+import time
+import sqlite3
+import logging
+import threading
+import cPickle as pickle
+from timeit import default_timer
+
+import pandas as pd
+from pandas.core.api import DataFrame
+#
+from sqlalchemy import exc
+#
+import retrypolicy
+
+
+class SQLSpool(object):
+    """
+    Parameters
+    ----------
+    path : string
+        SQLite file of the spool, created if missing.
+    flush_rows : int, default 1
+        Buffered puts written to the file at once. The default commits
+        every put before it returns, so a spooled write survives the process
+        dying, at the cost of one SQLite commit per put. Larger values
+        commit flush_rows puts at once for write heavy outages, but up to
+        flush_rows - 1 puts, or one interval of puts, are lost if the 
+        process dies.
+    batch_entries : int, default 50
+        Spool entries replayed per insert_bulk.
+    interval : float, default 1.0
+        Seconds between drainer passes.
+    backoff_base, backoff_cap : float, default 1.0, 60.0
+        Wait between replay attempts while the database is unavailable.
+    logger_name : string, default 'SQLSpool'
+    """
+
+    def __init__(self, path, flush_rows=1, batch_entries=50, interval=1.0, backoff_base=1.0,
+                                                      backoff_cap=60.0, logger_name='SQLSpool'):
+        self.path = path
+        self.flush_rows = max(1, flush_rows)
+        self.batch_entries = batch_entries
+        self.interval = interval
+        self.backoff = retrypolicy.Backoff(base=backoff_base, cap=backoff_cap)
+        self.logger = logging.getLogger(logger_name)
+        self.counters = {'spooled': 0, 'replayed_entries': 0, 'replayed_rows': 0,
+                         'replay_failures': 0, 'dead': 0}
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._failures = 0
+        self._next_attempt = 0.0
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db_lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS spool ("
+                             "id INTEGER PRIMARY KEY AUTOINCREMENT, instance TEXT, "
+                             "table_name TEXT, schema TEXT, nrows INTEGER, payload BLOB, "
+                             "created REAL, attempts INTEGER DEFAULT 0, dead INTEGER DEFAULT 0, "
+                             "error TEXT)")
+            self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def put_frame(self, instance, table_name, frame, schema=None, **kwargs):
+        """Spool an insert_bulk of frame, kwargs are passed on at replay"""
+
+        self._put(instance, table_name, schema, len(frame),
+                  {'frame': frame, 'rows': None, 'kwargs': kwargs})
+
+    def put_rows(self, instance, table_name, rows, schema=None):
+        """Spool insert rows, a list of {column: value} dicts"""
+
+        self._put(instance, table_name, schema, len(rows),
+                  {'frame': None, 'rows': list(rows), 'kwargs': {}})
+
+    def _put(self, instance, table_name, schema, nrows, payload):
+        blob = sqlite3.Binary(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            self._buffer.append((instance, table_name, schema, nrows, blob, time.time()))
+            self.counters['spooled'] += 1
+            full = len(self._buffer) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def flush(self):
+        """Write the buffered puts to the spool file"""
+
+        with self._lock:
+            buffered, self._buffer = self._buffer, []
+        if not buffered:
+            return
+        with self._db_lock:
+            self._db.executemany("INSERT INTO spool (instance, table_name, schema, nrows, "
+                                 "payload, created) VALUES (?, ?, ?, ?, ?, ?)", buffered)
+            self._db.commit()
+
+    def pending(self):
+        """Spooled entries waiting for replay, buffered ones included"""
+
+        with self._db_lock:
+            stored = self._db.execute("SELECT COUNT(*) FROM spool WHERE dead = 0").fetchone()[0]
+        with self._lock:
+            return stored + len(self._buffer)
+
+    def stats(self):
+        """doc string"""
+
+        with self._lock:
+            stats = dict(self.counters)
+        stats['pending'] = self.pending()
+        with self._db_lock:
+            stats['dead_entries'] = self._db.execute(
+                                    "SELECT COUNT(*) FROM spool WHERE dead = 1").fetchone()[0]
+        return stats
+
+    @staticmethod
+    def _columns(payload):
+        """Columns the payload inserts"""
+
+        if payload['frame'] is not None:
+            return tuple(payload['frame'].columns)
+        return tuple(sorted(set().union(*payload['rows'])))
+
+    def _next_batch(self):
+        """
+        The oldest entries with the same instance, table, insert kwargs and
+        columns. Entries with other columns are not concatenated, that would
+        fill the missing columns with NaN and insert NULL where the table 
+        default should apply. Entries whose payload can not be read are 
+        marked dead, they would otherwise stop the replay for good.
+        """
+
+        with self._db_lock:
+            rows = self._db.execute("SELECT id, instance, table_name, schema, nrows, payload "
+                                    "FROM spool WHERE dead = 0 ORDER BY id LIMIT ?",
+                                    (self.batch_entries,)).fetchall()
+        batch = []
+        for row in rows:
+            try:
+                payload = pickle.loads(str(row[5]))
+                columns = self._columns(payload)
+                kwargs = payload['kwargs']
+            except Exception as e:
+                self._mark([row[0]], "Payload can not be read: %s"%e, dead=True)
+                self._count('dead')
+                self.logger.error("Spooled entry %s for %s table %s can not be read, "
+                                  "entry marked dead: %s", row[0], row[1], row[2], e)
+                continue
+            if batch and (row[1:4] != batch[0][0][1:4] or kwargs != batch[0][1]['kwargs'] or
+                          columns != self._columns(batch[0][1])):
+                break
+            batch.append((row, payload))
+        return batch
+
+    def _mark(self, ids, error, dead=False):
+        with self._db_lock:
+            self._db.executemany("UPDATE spool SET attempts = attempts + 1, error = ?, dead = ? "
+                                 "WHERE id = ?", [(error, int(dead), i) for i in ids])
+            self._db.commit()
+
+    def drain_once(self, sql_common):
+        """
+        Replay one batch through sql_common.SqlDB.insert_bulk. Returns the
+        rows replayed, 0 when there was nothing to replay or the circuit of
+        the database is open, and raises the error of a replay that found the
+        database still unavailable.
+
+        The attempt goes through the retry policy of sql_common, so a replay
+        that succeeds closes the circuit of the database and direct writes
+        resume, and one that fails keeps it open. Entries failing for any
+        other reason than the database being unavailable are marked dead
+        and skipped.
+        """
+
+        self.flush()
+        batch = self._next_batch()
+        if not batch:
+            return 0
+        return self._replay(sql_common, batch)
+
+    def _replay(self, sql_common, batch):
+        """doc string"""
+
+        first = batch[0][0]
+        instance, table_name, schema = first[1], first[2], first[3]
+        ids = [row[0] for row, payload in batch]
+        frames = [payload['frame'] if payload['frame'] is not None else DataFrame(payload['rows'])
+                  for row, payload in batch]
+        frame = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+        retry = sql_common.Retry.begin(sql_common.RetryKey)
+        try:
+            retry.check()
+            sql_common.SqlDB.insert_bulk(frame=frame, table_name=table_name, schema=schema,
+                                         **batch[0][1]['kwargs'])
+        except retrypolicy.CircuitOpenError:
+            return 0
+        except Exception as e:
+            self._count('replay_failures')
+            # Only a database that can not be reached counts as unavailable,
+            # NoSuchTableError and other request errors are the entry's fault
+            if isinstance(e, exc.DisconnectionError) or \
+                    (isinstance(e, exc.SQLAlchemyError) and sql_common._resource_error(e)):
+                retry.failed(retry=False)
+                self._mark(ids, str(e))
+                self.logger.warning("Replay of %s spooled %s rows for %s table %s failed, "
+                                    "database still unavailable: %s", len(ids), len(frame),
+                                    instance, table_name, e)
+                raise
+            retry.failed(retry=False, trip=False)
+            if len(batch) > 1:
+                #Replay the entries one by one so only the failing ones are dead
+                return sum(self._replay(sql_common, [item]) for item in batch)
+            self._mark(ids, str(e), dead=True)
+            self._count('dead', len(ids))
+            self.logger.error("Replay of spooled entry %s for %s table %s failed with %s, "
+                              "entry marked dead", ids[0], instance, table_name, e,
+                              exc_info=True)
+            return 0
+
+        retry.succeeded()
+        with self._db_lock:
+            self._db.executemany("DELETE FROM spool WHERE id = ?", [(i,) for i in ids])
+            self._db.commit()
+        self._count('replayed_entries', len(ids))
+        self._count('replayed_rows', len(frame))
+        self.logger.info("Replayed %s spooled rows into %s table %s", len(frame), instance,
+                         table_name)
+        return len(frame)
+
+    def _drain(self, sql_common):
+        while not self._stop.wait(self.interval):
+            if default_timer() < self._next_attempt:
+                continue
+            try:
+                while not self._stop.is_set() and self.drain_once(sql_common):
+                    pass
+            except Exception:
+                self._failures += 1
+                self._next_attempt = default_timer() + self.backoff.delay(self._failures - 1)
+            else:
+                self._failures = 0
+
+    def start(self, sql_common):
+        """Start the background drainer replaying into sql_common"""
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._drain, args=(sql_common,),
+                                        name='SQLSpool-drainer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the drainer, entries left in the spool are kept"""
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self):
+        """doc string"""
+
+        self.stop()
+        self.flush()
+        with self._db_lock:
+            self._db.close()
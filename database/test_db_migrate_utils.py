@@ -0,0 +1,244 @@
+# Author: Dustin Doubet
+# Description:
+# db_migrate_utils dump transform tests
+
+#Import Python standard libraries
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+#
+import db_migrate_utils
+
+
+def _transform(dump, **kwargs):
+    """Output of a BatchInsertWriter transform of the dump text"""
+
+    outFile = StringIO()
+    writer = db_migrate_utils.BatchInsertWriter(outFile, 'old', 'new', verbose=False, **kwargs)
+    db_migrate_utils.transform_dump(StringIO(dump), writer)
+    return outFile.getvalue()
+
+
+class SQLDumpTokenizerTest(unittest.TestCase):
+    """Statements are split on the ; ending them, not on ones in literals"""
+
+    dump = ("-- c; INSERT INTO x VALUES (1);\nSET a=1;\n"
+            "INSERT INTO \"s\".\"t\" (a, \"b\") VALUES (1, 'x;\nINSERT INTO y VALUES (2)'), "
+            "(2, $q$a;b$q$);\n/* ; */INSERT INTO t VALUES (E'\\';', 3);\n")
+
+    def events(self, dump, **kwargs):
+        # A small buffer, so statements and strings span reads
+        return list(db_migrate_utils.SQLDumpTokenizer(StringIO(dump), buffer_size=7, **kwargs))
+
+    def test_events(self):
+        events = self.events(self.dump)
+        self.assertEqual(''.join(event.text for event in events), self.dump)
+        inserts = [event for event in events 
+                   if type(event) is db_migrate_utils.InsertStatement]
+        self.assertEqual([(stmt.table, stmt.columns) for stmt in inserts],
+                         [(('s', 't'), ('a', 'b')), (('t',), None)])
+        self.assertEqual(inserts[0].rows(), [('1', "'x;\nINSERT INTO y VALUES (2)'"), 
+                                             ('2', '$q$a;b$q$')])
+        self.assertEqual(inserts[1].rows(), [("E'\\';'", '3')])
+        self.assertEqual(self.dump[inserts[1].start:inserts[1].end], inserts[1].text)
+
+    def test_backslash_escapes(self):
+        events = self.events("INSERT INTO t VALUES ('a\\';b');\n", backslash_escapes=True)
+        self.assertEqual(events[0].rows(), [("'a\\';b'",)])
+
+    def test_incomplete(self):
+        tokenizer = db_migrate_utils.SQLDumpTokenizer(StringIO("INSERT INTO t VALUES ('abc"))
+        self.assertEqual([event.text for event in tokenizer], ["INSERT INTO t VALUES ('abc"])
+        self.assertFalse(tokenizer.complete)
+
+
+class BatchInsertWriterTest(unittest.TestCase):
+    """Inserts are merged per table and the checks restored after it"""
+
+    dump = ("INSERT INTO old.parent (a) VALUES (1);\n"
+            "INSERT INTO old.parent (a) VALUES (2);\n"
+            "INSERT INTO old.child (a, p) VALUES (1, 9);\n")
+
+    def test_batches(self):
+        self.assertEqual(_transform(self.dump),
+                         "INSERT INTO new.parent (`a`) VALUES(1),(2);\n"
+                         "INSERT INTO new.child (`a`,`p`) VALUES(1, 9);\n")
+
+    def test_batch_bytes(self):
+        output = _transform(self.dump, max_batch_bytes=40)
+        self.assertEqual(output.count("INSERT INTO new.parent"), 2)
+
+    def test_transactions(self):
+        output = _transform(self.dump, transaction_batches=5)
+        self.assertEqual(output.count("START TRANSACTION;"), 2)
+        self.assertEqual(output.count("COMMIT;"), 2)
+
+    def test_checks_restored(self):
+        output = _transform(self.dump, disable_checks=['parent'])
+        self.assertEqual(output,
+                         "SET @OLD_UC=@@UNIQUE_CHECKS, UNIQUE_CHECKS=0;\n"
+                         "SET @OLD_FK=@@FOREIGN_KEY_CHECKS, FOREIGN_KEY_CHECKS=0;\n"
+                         "INSERT INTO new.parent (`a`) VALUES(1),(2);\n"
+                         "SET UNIQUE_CHECKS=@OLD_UC, FOREIGN_KEY_CHECKS=@OLD_FK;\n"
+                         "INSERT INTO new.child (`a`,`p`) VALUES(1, 9);\n")
+
+    def test_file_checks_stay_off(self):
+        outFile = StringIO()
+        db_migrate_utils.x_form_insert(StringIO(self.dump), outFile, None, 'old', 'new', None,
+                                       fk_cks_off=True, batch_bytes=1 << 20,
+                                       batch_disable_checks=['parent'])
+        output = outFile.getvalue()
+        # Only the end of the file turns the foreign key checks back on
+        self.assertEqual(output.count("FOREIGN_KEY_CHECKS=1"), 1)
+        self.assertTrue(output.index("INSERT INTO new.child") <
+                        output.index("FOREIGN_KEY_CHECKS=1"))
+
+
+class ParallelTransformTest(unittest.TestCase):
+    """A parallel transform writes what the serial one does"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.inputPath = os.path.join(self.tmpdir, 'dump.sql')
+        with open(self.inputPath, 'w') as inputFile:
+            inputFile.write("SET a=1;\n")
+            for i in range(200):
+                inputFile.write("INSERT INTO old.t (a, b) VALUES (%d, E'v%d');\n"%(i, i))
+                if i == 100:
+                    # Range boundaries inside a string, those ranges are redone serially
+                    inputFile.write("INSERT INTO old.t (a, b) VALUES (0, 'x;\n" + 
+                                    "INSERT INTO old.t (a, b) VALUES (1, 2);\n" * 100 + "');\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def transform(self, name, workers):
+        outPath = os.path.join(self.tmpdir, name)
+        with open(outPath, 'w') as outFile:
+            db_migrate_utils.transform_dump_parallel(self.inputPath, outFile, 
+                            db_migrate_utils.MySQLInsertWriter, 
+                            dict(oldDBName='old', newDBName='new', verbose=False), 
+                            workers=workers, min_range=256)
+        with open(outPath) as outFile:
+            return outFile.read()
+
+    def test_ranges(self):
+        ranges = db_migrate_utils.dump_ranges(self.inputPath, 8)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], os.path.getsize(self.inputPath))
+        self.assertTrue(len(ranges) > 1)
+        with open(self.inputPath) as inputFile:
+            dump = inputFile.read()
+        for start, end in ranges[1:]:
+            self.assertEqual(dump[start - 2:start], ';\n')
+            self.assertTrue(dump[start:].startswith('INSERT INTO '))
+        self.assertEqual(''.join(dump[start:end] for start, end in ranges), dump)
+
+    def test_same_as_serial(self):
+        self.assertEqual(self.transform('parallel.sql', 3), self.transform('serial.sql', 1))
+
+
+class _Crash(Exception):
+    pass
+
+
+class _CrashingCheckpoint(db_migrate_utils.DumpCheckpoint):
+    """DumpCheckpoint that writes junk past the checkpoint and dies after crash_after saves"""
+
+    crash_after = None
+
+    def __init__(self, *args, **kwargs):
+        super(_CrashingCheckpoint, self).__init__(*args, **kwargs)
+        self.saves = 0
+
+    def save(self, state, outFile, statements=None):
+        super(_CrashingCheckpoint, self).save(state, outFile, statements)
+        self.saves += 1
+        if self.saves == self.crash_after:
+            outFile.write('JUNK AFTER THE CHECKPOINT')
+            outFile.flush()
+            raise _Crash()
+
+
+class DumpCheckpointTest(unittest.TestCase):
+    """A run resumed from its checkpoint writes what an uninterrupted run does"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.inputPath = os.path.join(self.tmpdir, 'dump.sql')
+        with open(self.inputPath, 'w') as inputFile:
+            inputFile.write("SET a=1;\n")
+            for table in range(3):
+                for i in range(300):
+                    inputFile.write("INSERT INTO old.t%d (a, b) VALUES (%d, E'v;%d');\n"
+                                    %(table, i, i))
+                inputFile.write("CREATE INDEX i%d ON t%d (a);\n"%(table, table))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def run_transform(self, name, checkpoint_class=None, **kwargs):
+        """Output of the transform of the dump, resumed after every crash"""
+
+        outPath = os.path.join(self.tmpdir, name)
+        crashes = 0
+        while True:
+            checkpoint = None
+            if checkpoint_class is not None:
+                checkpoint = checkpoint_class(outPath + '.ckpt', self.inputPath, outPath,
+                                              every_statements=50, every_seconds=None)
+            mode = 'r+' if checkpoint is not None and checkpoint.resuming else 'w'
+            try:
+                with open(outPath, mode) as outFile, open(self.inputPath) as inputFile:
+                    db_migrate_utils.x_form_insert(inputFile, outFile, None, 'old', 'new', None,
+                                                   checkpoint=checkpoint, **kwargs)
+            except _Crash:
+                crashes += 1
+                # A checkpoint that never moves forward would crash forever
+                self.assertTrue(crashes < 100, "No progress between checkpoints")
+                continue
+            if checkpoint is not None:
+                checkpoint.clear()
+            with open(outPath) as outFile:
+                return outFile.read(), crashes, checkpoint
+
+    def assert_resumes(self, **kwargs):
+        expected = self.run_transform('serial.sql', **kwargs)[0]
+        _CrashingCheckpoint.crash_after = 3
+        try:
+            output, crashes, checkpoint = self.run_transform('resumed.sql', _CrashingCheckpoint,
+                                                             **kwargs)
+        finally:
+            _CrashingCheckpoint.crash_after = None
+        self.assertTrue(crashes > 2)
+        self.assertEqual(output, expected)
+
+    def test_resume(self):
+        self.assert_resumes()
+
+    def test_resume_batches(self):
+        self.assert_resumes(batch_bytes=2000, batch_transactions=2, batch_disable_checks=True)
+
+    def test_pending_batch_saves(self):
+        # A batch pending over many inserts does not make every insert a checkpoint
+        checkpoint = self.run_transform('batch.sql', _CrashingCheckpoint, 
+                                        batch_bytes=1 << 20)[2]
+        self.assertTrue(checkpoint.saves <= 900 // 50)
+
+    def test_other_input(self):
+        outPath = os.path.join(self.tmpdir, 'out.sql')
+        open(outPath, 'w').close()
+        checkpoint = db_migrate_utils.DumpCheckpoint(outPath + '.ckpt', self.inputPath, outPath)
+        with open(outPath, 'r+') as outFile:
+            checkpoint.save({'input_offset': 0, 'output_position': 0, 'statements': 0,
+                             'writer': None}, outFile)
+        with open(self.inputPath, 'a') as inputFile:
+            inputFile.write("SET b=1;\n")
+        self.assertRaises(ValueError, db_migrate_utils.DumpCheckpoint, outPath + '.ckpt',
+                          self.inputPath, outPath)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,581 @@
+# Author: Dustin Doubet
+# Description:
+# pandas_sql tests against in memory SQLite databases
+
+#Import Python standard libraries
+import os
+import decimal
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, date
+
+import numpy as np
+import pandas.core.common as com
+from pandas.core.api import DataFrame, Series
+from pandas.util.testing import assert_frame_equal
+#
+from sqlalchemy import create_engine, inspect, MetaData, Table, Column, Float, Text
+from sqlalchemy.types import SmallInteger, Integer, BigInteger
+#
+import pandas_sql
+
+
+class ColumnarReadTest(unittest.TestCase):
+    """The columnar read path types columns as DataFrame.from_records does"""
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        self.sql_db = pandas_sql.SQLDatabase(self.engine)
+        self._fetch_size = pandas_sql._COLUMNAR_FETCH_SIZE
+        # Small batches, so later batches hold types the first one did not
+        pandas_sql._COLUMNAR_FETCH_SIZE = 2
+
+    def tearDown(self):
+        pandas_sql._COLUMNAR_FETCH_SIZE = self._fetch_size
+
+    def assert_matches_from_records(self, rows):
+        self.engine.execute("CREATE TABLE mixed (a, b, c, d)")
+        self.engine.execute("INSERT INTO mixed VALUES (?, ?, ?, ?)", rows)
+        sql = "SELECT a, b, c, d FROM mixed"
+
+        expected = DataFrame.from_records(self.engine.execute(sql).fetchall(),
+                                          columns=['a', 'b', 'c', 'd'])
+        assert_frame_equal(self.sql_db.read_query(sql, columnar=True), expected)
+
+    def test_int_then_float(self):
+        self.assert_matches_from_records([(1, 1, 'x', 1), (2, 2, 'y', 2),
+                                          (3.5, 3, 'z', 2.25), (4, 4, 'w', 5)])
+
+    def test_int_then_null_and_text(self):
+        self.assert_matches_from_records([(1, 1, 1, 1), (2, 2, 2, 2),
+                                          (None, 'x', 3.5, None), (4, 4, 'y', 5)])
+
+    def test_float_then_text(self):
+        self.assert_matches_from_records([(1.5, 1.5, 1, 1), (2.5, 2.5, 2, 2),
+                                          (3, 'x', 3, 3), (None, 4.5, 4, 4)])
+
+    def test_dates(self):
+        # Typed values back, as from drivers other than sqlite3
+        engine = create_engine('sqlite://', connect_args={'detect_types': sqlite3.PARSE_DECLTYPES})
+        self.sql_db = pandas_sql.SQLDatabase(engine)
+        engine.execute("CREATE TABLE dates (a DATE, b TIMESTAMP)")
+        engine.execute("INSERT INTO dates VALUES (?, ?)", 
+                       [(date(2016, 1, 1), datetime(2016, 1, 1, 12)),
+                        (date(2016, 1, 2), datetime(2016, 1, 2))])
+        sql = "SELECT a, b FROM dates"
+        
+        expected = DataFrame.from_records(engine.execute(sql).fetchall(),
+                                          columns=['a', 'b'])
+        frame = self.sql_db.read_query(sql, columnar=True)
+        self.assertEqual(frame['a'].dtype, object)
+        self.assertEqual(frame['b'].dtype.kind, 'M')
+        assert_frame_equal(frame, expected)
+
+    def test_chunked_read_keeps_values(self):
+        self.engine.execute("CREATE TABLE mixed (a)")
+        self.engine.execute("INSERT INTO mixed VALUES (?)", [(1,), (2,), (3.5,), (4,)])
+        chunks = list(self.sql_db.read_query("SELECT a FROM mixed", chunksize=2, columnar=True))
+        self.assertEqual(list(chunks[1]['a']), [3.5, 4.0])
+
+    def test_buffer_widening(self):
+        buf = pandas_sql._ColumnBuffer('i', 2)
+        buf.extend((1, 2))
+        buf.extend((decimal.Decimal('2.5'), 3))
+        self.assertEqual(buf.finish().dtype, np.float64)
+        self.assertEqual(list(buf.finish()), [1.0, 2.0, 2.5, 3.0])
+
+        buf = pandas_sql._ColumnBuffer('b', 2)
+        buf.extend((True, False))
+        buf.extend((2, None))
+        self.assertEqual(list(buf.finish()), [True, False, 2, None])
+
+        buf = pandas_sql._ColumnBuffer('M', 2)
+        buf.extend((datetime(2016, 1, 1), None))
+        buf.extend(('2016-01-02',))
+        self.assertEqual(buf.finish().dtype, object)
+
+
+class SchemaCacheTest(unittest.TestCase):
+    """Tables created or altered outside of pandas_sql are seen at once"""
+
+    def setUp(self):
+        pandas_sql.clear_schema_cache()
+        self.engine = create_engine('sqlite://')
+        self.sql_db = pandas_sql.SQLDatabase(self.engine)
+
+    def test_created_after_missing(self):
+        self.assertFalse(self.sql_db.has_table('later'))
+        self.assertIsNone(self.sql_db.get_table('later'))
+        # Raw DDL on the engine, not through this module
+        self.engine.execute("CREATE TABLE later (a INTEGER)")
+        self.assertTrue(self.sql_db.has_table('later'))
+        self.sql_db.insert_bulk(DataFrame({'a': [1, 2]}), 'later')
+        self.assertEqual(len(self.sql_db.read_table('later')), 2)
+
+    def test_altered_elsewhere(self):
+        self.sql_db.execute("CREATE TABLE altered (a INTEGER)")
+        self.sql_db.insert_bulk(DataFrame({'a': [1]}), 'altered')
+        self.engine.execute("ALTER TABLE altered ADD COLUMN b INTEGER")
+        self.sql_db.insert_bulk(DataFrame({'a': [2], 'b': [3]}), 'altered')
+        frame = self.sql_db.read_table('altered', columns=['a', 'b'])
+        self.assertEqual(list(frame['b'].fillna(0)), [0, 3])
+
+    def test_ddl_through_execute(self):
+        self.sql_db.execute("CREATE TABLE altered (a INTEGER)")
+        self.assertEqual(list(self.sql_db.read_table('altered').columns), ['a'])
+        self.sql_db.execute("ALTER TABLE altered ADD COLUMN b INTEGER")
+        self.assertEqual(list(self.sql_db.read_table('altered').columns), ['a', 'b'])
+
+    def test_passed_meta_types(self):
+        self.engine.execute("CREATE TABLE typed (a INTEGER, b TEXT)")
+        self.engine.execute("INSERT INTO typed VALUES (1, 'x'), (2, 'y')")
+        self.assertEqual(self.sql_db.read_table('typed')['a'].dtype, np.int64)
+        
+        # The same table typed otherwise by a passed MetaData gets its own plan
+        meta = MetaData(self.engine)
+        Table('typed', meta, Column('a', Float), Column('b', Text))
+        frame = pandas_sql.read_sql_table('typed', self.engine, meta=meta)
+        self.assertEqual(frame['a'].dtype, np.float64)
+        self.assertEqual(self.sql_db.read_table('typed')['a'].dtype, np.int64)
+
+    def test_ddl_drops_only_its_table(self):
+        self.sql_db.execute("CREATE TABLE one (a INTEGER)")
+        self.sql_db.execute("CREATE TABLE two (a INTEGER)")
+        self.assertTrue(self.sql_db.has_table('one') and self.sql_db.has_table('two'))
+        self.sql_db.execute("CREATE INDEX one_a ON one (a)")
+        cache = pandas_sql._SCHEMA_CACHE
+        self.assertIsNone(cache.get(cache.key(self.engine, 'one')))
+        self.assertIsNotNone(cache.get(cache.key(self.engine, 'two')))
+
+    def test_ddl_keeps_passed_meta(self):
+        from sqlalchemy import MetaData, Table, Column, Integer
+        meta = MetaData(self.engine)
+        Table('defined', meta, Column('a', Integer))
+        sql_db = pandas_sql.SQLDatabase(self.engine, meta=meta)
+        sql_db.execute("CREATE TABLE defined (a INTEGER)")
+        sql_db.execute("CREATE TABLE other (a INTEGER)")
+        self.assertEqual(list(meta.tables), ['defined'])
+
+    def test_ddl_tables(self):
+        self.assertEqual(pandas_sql.ddl_tables('DROP TABLE IF EXISTS a, "s"."B"'), ['a', 'B'])
+        self.assertEqual(pandas_sql.ddl_tables('RENAME TABLE a TO b'), ['a', 'b'])
+        self.assertEqual(pandas_sql.ddl_tables('CREATE UNIQUE INDEX i ON s.t (a)'), ['t'])
+        self.assertEqual(pandas_sql.ddl_tables('DROP INDEX i'), [])
+        self.assertIsNone(pandas_sql.ddl_tables('DELETE FROM t'))
+
+    def assert_calls(self, error, calls, **kwargs):
+        made = []
+        def call():
+            made.append(1)
+            if len(made) == 1:
+                raise error
+        try:
+            self.sql_db._with_fresh_schema('t', None, call, **kwargs)
+        except type(error):
+            pass
+        self.assertEqual(len(made), calls)
+
+    def test_retries(self):
+        from sqlalchemy import exc
+        stale = exc.OperationalError('SELECT b FROM t', {}, Exception('no such column: b'))
+        syntax = exc.OperationalError('SELEC', {}, Exception('near "SELEC": syntax error'))
+        self.assert_calls(stale, 2)
+        self.assert_calls(KeyError('b'), 2)
+        self.assert_calls(syntax, 1)
+        self.assert_calls(stale, 1, conn=self.engine.connect())
+        self.assert_calls(exc.CompileError('b'), 1, executed=lambda: True)
+
+
+class QueryResultCacheTest(unittest.TestCase):
+    """Cached read_query results are served until stale"""
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        self.sql_db = pandas_sql.SQLDatabase(self.engine, result_cache=True)
+        self.cache = self.sql_db.result_cache
+        self.engine.execute("CREATE TABLE cached (a INTEGER)")
+        self.engine.execute("CREATE TABLE other (a INTEGER)")
+        self.engine.execute("INSERT INTO cached VALUES (1), (2)")
+        self.engine.execute("INSERT INTO other VALUES (1)")
+
+    def read(self, table_name='cached'):
+        return len(self.sql_db.read_query("SELECT a FROM %s"%table_name))
+
+    def test_hit_and_miss(self):
+        self.assertEqual(self.read(), 2)
+        # Behind the cache's back, so only a hit still says 2
+        self.engine.execute("DELETE FROM cached")
+        self.assertEqual(self.read(), 2)
+        self.assertEqual(len(self.sql_db.read_query("SELECT  a\nFROM cached")), 2)
+        self.assertEqual(len(self.sql_db.read_query("SELECT a FROM cached", use_cache=False)), 0)
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (2, 1, 1))
+
+    def test_copies(self):
+        frame = self.sql_db.read_query("SELECT a FROM cached")
+        frame['a'] = 0
+        self.assertEqual(list(self.sql_db.read_query("SELECT a FROM cached")['a']), [1, 2])
+
+    def test_ttl(self):
+        self.cache.ttl = 0
+        self.assertEqual(self.read(), 2)
+        self.engine.execute("DELETE FROM cached")
+        self.assertEqual(self.read(), 0)
+        self.assertEqual(self.cache.stats()['hits'], 0)
+
+    def test_execute_invalidates_written_table(self):
+        self.assertEqual((self.read(), self.read('other')), (2, 1))
+        self.sql_db.execute("DELETE FROM cached WHERE a = 1")
+        self.sql_db.execute("SELECT a FROM other")
+        self.assertEqual(self.cache.stats()['entries'], 1)
+        self.assertEqual(self.read(), 1)
+        
+        self.sql_db.execute('INSERT INTO "Other" VALUES (2)')
+        self.assertEqual(self.read('other'), 2)
+        table = Table('cached', MetaData(), Column('a', Float))
+        self.sql_db.execute(table.delete())
+        self.assertEqual(self.read(), 0)
+
+    def test_execute_ddl_and_unknown(self):
+        self.assertEqual((self.read(), self.read('other')), (2, 1))
+        self.sql_db.execute("DROP TABLE other")
+        self.assertEqual(self.cache.stats()['entries'], 1)
+        # What a statement writes is not known, nothing cached is kept
+        self.sql_db.execute("WITH t AS (SELECT 1) DELETE FROM cached")
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_insert_invalidates(self):
+        self.assertEqual(self.read(), 2)
+        self.sql_db.insert_bulk(DataFrame({'a': [3]}), 'cached')
+        self.assertEqual(self.read(), 3)
+
+
+class InsertCopyTest(unittest.TestCase):
+    """Native bulk loads and their fallback round trip text, nulls and numbers"""
+
+    def setUp(self):
+        pandas_sql.clear_schema_cache()
+        self.engine = create_engine('sqlite://')
+        self.sql_db = pandas_sql.SQLDatabase(self.engine)
+        self.sql_db.execute("CREATE TABLE loaded (a INTEGER, b TEXT, c FLOAT)")
+        self.frame = DataFrame({'a': [1, None, 3, 4],
+                                'b': ['NULL', '\\N', None, 'x,"y"'],
+                                'c': [0.1, 2.5, None, 1e-20]}, columns=['a', 'b', 'c'])
+
+    def assert_round_trip(self):
+        frame = self.sql_db.read_query("SELECT a, b, c FROM loaded ORDER BY rowid")
+        self.assertEqual(list(frame['a'].fillna(-1)), [1, -1, 3, 4])
+        self.assertEqual(list(frame['b']), ['NULL', '\\N', None, 'x,"y"'])
+        self.assertEqual(list(frame['c'].fillna(-1)), [0.1, 2.5, -1, 1e-20])
+
+    def test_executemany(self):
+        stats = self.sql_db.insert_copy(self.frame, 'loaded', chunksize=3)
+        self.assert_round_trip()
+        self.assertEqual((stats['method'], stats['path'], stats['rows'], stats['chunks']),
+                         ('copy', 'native', 4, 2))
+        self.assertTrue(stats['rows_per_sec'] > 0)
+
+    def test_fallback(self):
+        native_loader = pandas_sql.SQLTable._native_loader
+        pandas_sql.SQLTable._native_loader = lambda self, conn: None
+        try:
+            stats = self.sql_db.insert_copy(self.frame, 'loaded', chunksize=3)
+        finally:
+            pandas_sql.SQLTable._native_loader = native_loader
+        self.assert_round_trip()
+        self.assertEqual((stats['method'], stats['path'], stats['rows'], stats['chunks']),
+                         ('bulk', 'fallback', 4, 2))
+
+    def test_empty(self):
+        stats = self.sql_db.insert_copy(self.frame.iloc[:0], 'loaded')
+        self.assertEqual((stats['path'], stats['rows']), ('native', 0))
+
+    def test_csv_null_sentinel(self):
+        stream = pandas_sql._FrameCSVStream(self.frame, 3, '\\N')
+        self.assertEqual(stream.read().splitlines(),
+                         ['1.0,"NULL",0.1', '\\N,"\\N",2.5', 
+                          '3.0,\\N,\\N', '4.0,"x,""y""",1e-20'])
+
+
+class UpsertTest(unittest.TestCase):
+    """Frame rows sharing conflict keys are reduced before chunking"""
+
+    def setUp(self):
+        pandas_sql.clear_schema_cache()
+        self.engine = create_engine('sqlite://')
+        self.sql_db = pandas_sql.SQLDatabase(self.engine)
+        self.sql_db.execute("CREATE TABLE keyed (k INTEGER PRIMARY KEY, v TEXT)")
+        self.sql_db.insert_bulk(DataFrame({'k': [1], 'v': ['old']}), 'keyed')
+        self.frame = DataFrame({'k': [1, 2, 1, 2, 3], 'v': ['a', 'b', 'c', 'd', 'e']})
+
+    def values(self):
+        return list(self.sql_db.read_query("SELECT v FROM keyed ORDER BY k")['v'])
+
+    def test_update_keeps_last(self):
+        stats = self.sql_db.insert_bulk(self.frame, 'keyed', chunksize=4, on_conflict='update')
+        self.assertEqual(stats['rows'], 3)
+        self.assertEqual(self.values(), ['c', 'd', 'e'])
+
+    def test_ignore_keeps_first(self):
+        self.sql_db.insert_bulk(self.frame, 'keyed', chunksize=4, on_conflict='ignore')
+        self.assertEqual(self.values(), ['old', 'b', 'e'])
+
+    def test_keys(self):
+        table = pandas_sql.SQLTable('keyed', self.sql_db, frame=self.frame, index=False)
+        data_list, nrows = table._dedupe_conflict_rows(['k', 'v'], [[1, 2, 1], ['a', 'b', 'c']],
+                                                       3, 'update')
+        self.assertEqual((data_list, nrows), ([[2, 1], ['b', 'c']], 2))
+
+
+class PositionalInsertTest(unittest.TestCase):
+    """Positionally bound inserts write what the dict bound ones do"""
+
+    def setUp(self):
+        pandas_sql.clear_schema_cache()
+        self.engine = create_engine('sqlite://')
+        self.sql_db = pandas_sql.SQLDatabase(self.engine)
+        self.frame = DataFrame({'a': [1, None, 3, 4, 5], 'b': ['x', None, 'z', 'w', 'v'],
+                                'c': [0.5, 1.5, None, 2.5, 3.5]}, columns=['a', 'b', 'c'])
+
+    def written(self, table_name, **kwargs):
+        self.engine.execute("CREATE TABLE %s (a INTEGER, b TEXT, c FLOAT)"%table_name)
+        stats = self.sql_db.insert_bulk(self.frame, table_name, chunksize=2, **kwargs)
+        rows = self.engine.execute("SELECT a, b, c FROM %s ORDER BY rowid"%table_name).fetchall()
+        return stats, rows
+
+    def test_bulk(self):
+        stats, rows = self.written('positional', positional=True)
+        self.assertEqual((stats['method'], stats['rows'], stats['chunks']), 
+                         ('bulk_positional', 5, 3))
+        self.assertEqual(rows, self.written('named')[1])
+        self.assertEqual(rows[1], (None, None, 1.5))
+
+    def test_many(self):
+        self.engine.execute("CREATE TABLE positional (a INTEGER, b TEXT, c FLOAT)")
+        stats = self.sql_db.insert_many(self.frame, 'positional', positional=True)
+        self.assertEqual((stats['method'], stats['rows']), ('many_positional', 5))
+        rows = self.engine.execute("SELECT a, b, c FROM positional ORDER BY rowid").fetchall()
+        self.assertEqual(rows, self.written('named')[1])
+
+    def test_numeric_markers(self):
+        engine = create_engine('sqlite:///:memory:', paramstyle='numeric')
+        table = pandas_sql.SQLTable('numbered', pandas_sql.SQLDatabase(engine), 
+                                    frame=DataFrame({'a': [1], 'b': [2]}), index=False, 
+                                    table_setup=True)
+        conn = engine.connect()
+        try:
+            self.assertEqual(table._positional_insert_stmt(conn, ['a', 'b'], 2),
+                             "INSERT INTO numbered (a, b) VALUES (:1, :2), (:3, :4)")
+        finally:
+            conn.close()
+
+
+class AdaptiveChunkerTest(unittest.TestCase):
+    """Chunk sizes follow the statement latency within the limits"""
+
+    def test_limits(self):
+        chunker = pandas_sql._AdaptiveChunker(10000, 10, 10, 1000)
+        self.assertEqual((chunker.max_rows, chunker.size), (99, 99))
+        chunker = pandas_sql._AdaptiveChunker(10000, 10, 10, 1000, bulk=False, initial=50)
+        self.assertEqual((chunker.max_rows, chunker.size), (9900, 50))
+        # 80% of the packet limit, at 10 bytes a row
+        chunker = pandas_sql._AdaptiveChunker(10000, 10, 10, 1000, max_bytes=800)
+        self.assertEqual(chunker.max_rows, 64)
+
+    def test_resize(self):
+        chunker = pandas_sql._AdaptiveChunker(10000, 1, 10, 10000, bulk=False, initial=100,
+                                              target_time=1.0)
+        # Fast statements grow the size by growth at most
+        chunker.record(100, 0.01)
+        self.assertEqual(chunker.size, 200)
+        chunker.record(200, 0.5)
+        self.assertEqual(chunker.size, 400)
+        # Slow ones shrink it, damped the same way
+        chunker.record(400, 100.0)
+        self.assertEqual(chunker.size, 200)
+        chunker.record(200, 0.4)
+        self.assertEqual(chunker.size, 400)
+        # A partial last chunk and a zero timing leave it as it is
+        chunker.record(10, 100.0)
+        chunker.record(400, 0.0)
+        self.assertEqual(chunker.size, 400)
+        self.assertEqual(chunker.sizes, [100, 200, 400, 200, 10, 400])
+        self.assertEqual(chunker.bytes[0], 1000)
+
+    def test_ranges(self):
+        chunker = pandas_sql._AdaptiveChunker(1000, 1, 10, 100000, bulk=False, initial=10,
+                                              target_time=1.0)
+        ranges = []
+        for start, end in chunker:
+            ranges.append((start, end))
+            chunker.record(end - start, 0.001)
+        self.assertEqual(ranges[0], (0, 10))
+        self.assertEqual(ranges[1], (10, 30))
+        self.assertEqual(ranges[-1][1], 1000)
+        self.assertTrue(all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])))
+
+    def test_insert_remembers_size(self):
+        pandas_sql.clear_schema_cache()
+        engine = create_engine('sqlite://')
+        sql_db = pandas_sql.SQLDatabase(engine)
+        engine.execute("CREATE TABLE tuned (a INTEGER)")
+        frame = DataFrame({'a': range(500)})
+        
+        stats = sql_db.insert_bulk(frame, 'tuned', chunksize=20, adaptive=True)
+        self.assertEqual(sum(stats['chunk_sizes']), 500)
+        self.assertEqual(stats['chunk_sizes'][0], 20)
+        key = (str(engine.url), 'tuned', stats['method'])
+        with pandas_sql._ADAPTIVE_CHUNKSIZES_LOCK:
+            tuned = pandas_sql._ADAPTIVE_CHUNKSIZES[key]
+        self.assertEqual(tuned, stats['chunksize'])
+        
+        stats = sql_db.insert_bulk(frame, 'tuned', chunksize=20, adaptive=True)
+        self.assertEqual(stats['chunk_sizes'][0], min(tuned, 500))
+        self.assertEqual(engine.execute("SELECT COUNT(*) FROM tuned").scalar(), 1000)
+
+
+class InferTypesTest(unittest.TestCase):
+    """Created tables are typed from the values with infer_types, or by dtype"""
+
+    def setUp(self):
+        pandas_sql.clear_schema_cache()
+        self.engine = create_engine('sqlite://')
+        self.sql_db = pandas_sql.SQLDatabase(self.engine)
+        self.frame = DataFrame({'s': [1, -5], 'i': [0, 2**20], 'b': [0, 2**40]}, 
+                               columns=['s', 'i', 'b'])
+
+    def column_types(self, table_name):
+        return [(col['name'], str(col['type'])) 
+                for col in inspect(self.engine).get_columns(table_name)]
+
+    def table(self, frame):
+        return pandas_sql.SQLTable('sized', self.sql_db, frame=frame, index=False, 
+                                   table_setup=True, infer_types=True)
+
+    def test_integers(self):
+        self.sql_db.table_from_frame(self.frame, 'sized', infer_types=True)
+        self.assertEqual(self.column_types('sized'), 
+                         [('s', 'SMALLINT'), ('i', 'INTEGER'), ('b', 'BIGINT')])
+        self.sql_db.table_from_frame(self.frame, 'plain')
+        self.assertEqual([typ for name, typ in self.column_types('plain')], ['BIGINT'] * 3)
+
+    def test_integer_bounds(self):
+        table = self.table(self.frame)
+        self.assertTrue(table._integer_type(Series([-2**15, 2**15 - 1])) is SmallInteger)
+        self.assertTrue(table._integer_type(Series([2**15])) is Integer)
+        self.assertTrue(table._integer_type(Series([-2**31 - 1])) is BigInteger)
+        self.assertTrue(table._integer_type(Series([], dtype=np.int64)) is BigInteger)
+        numeric = table._integer_type(Series(np.array([2**63], dtype=np.uint64)))
+        self.assertEqual((numeric.precision, numeric.scale), (20, 0))
+
+    def test_dtype(self):
+        self.sql_db.table_from_frame(self.frame, 'typed', dtype={'s': Text}, infer_types=True)
+        self.assertEqual(self.column_types('typed')[:2], [('s', 'TEXT'), ('i', 'INTEGER')])
+        self.assertRaises(ValueError, self.sql_db.table_from_frame, self.frame, 'bad', 
+                          dtype={'s': 'TEXT'})
+
+    @unittest.skipUnless(hasattr(com, '_ensure_object'), "object columns need pandas < 0.19")
+    def test_strings(self):
+        table = self.table(self.frame)
+        self.assertEqual(table._string_type(Series(['ab', None, 'abcd'])).length, 4)
+        self.assertTrue(table._string_type(Series([None, None])) is Text)
+        self.assertTrue(table._string_type(Series(['x' * 4001])) is Text)
+
+    @unittest.skipUnless(hasattr(com, '_ensure_object'), "object columns need pandas < 0.19")
+    def test_decimals(self):
+        table = self.table(self.frame)
+        numeric = table._numeric_type(Series([decimal.Decimal('123.45'), 
+                                              decimal.Decimal('-0.001'), None]))
+        self.assertEqual((numeric.precision, numeric.scale), (6, 3))
+        self.assertIsNone(table._numeric_type(Series([decimal.Decimal('1'), 1.5])))
+        self.assertIsNone(table._numeric_type(Series([decimal.Decimal('NaN')])))
+
+
+class _RecordingConnection(object):
+    """Stand in for a psycopg2 connection that records the SQL it is given"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.dialect = engine.dialect
+        self.connection = type('DBAPIConnection', (object,), {'info': {}})()
+        self.statements = []
+
+    def execute(self, statement, *args):
+        self.statements.append(statement)
+        return self.engine.execute("SELECT 1")
+
+
+class PreparedStatementTest(unittest.TestCase):
+    """Server side prepared inserts are redone once the table cache is cleared"""
+
+    def setUp(self):
+        pandas_sql.clear_schema_cache()
+        self.engine = create_engine('sqlite://')
+        self.sql_db = pandas_sql.SQLDatabase(self.engine)
+        self.sql_db.execute("CREATE TABLE prepared (a INTEGER)")
+        self.table = pandas_sql.SQLTable('prepared', self.sql_db, 
+                                         frame=DataFrame({'a': [1]}), index=False)
+        self.conn = _RecordingConnection(self.engine)
+
+    def test_deallocated_after_clear(self):
+        first = self.table._prepared_insert_stmt(self.conn, ['a'], 2)
+        self.assertEqual(self.table._prepared_insert_stmt(self.conn, ['a'], 2), first)
+        self.assertEqual(len(self.conn.statements), 1)
+
+        self.sql_db.execute("ALTER TABLE prepared ADD COLUMN b INTEGER")
+        self.table._prepared_insert_stmt(self.conn, ['a'], 2)
+        self.assertEqual(self.conn.statements[1:], ['DEALLOCATE pandas_sql_ins_0',
+                         self.conn.statements[0].replace('ins_0', 'ins_1')])
+
+    def test_least_recently_used_deallocated(self):
+        size = pandas_sql._PREPARED_STATEMENTS_SIZE
+        pandas_sql._PREPARED_STATEMENTS_SIZE = 2
+        try:
+            for nrows in (1, 2, 1, 3):
+                self.table._prepared_insert_stmt(self.conn, ['a'], nrows)
+        finally:
+            pandas_sql._PREPARED_STATEMENTS_SIZE = size
+        self.assertEqual(self.conn.statements[2], 'DEALLOCATE pandas_sql_ins_1')
+        self.assertEqual(len(self.conn.connection.info['pandas_sql_prepared']), 2)
+
+
+class ParallelStagingTest(unittest.TestCase):
+    """The staging table of a parallel insert never outlives the insert"""
+
+    def setUp(self):
+        pandas_sql.clear_schema_cache()
+        self.tmpdir = tempfile.mkdtemp()
+        # Workers need connections of their own, so a file not :memory:
+        self.engine = create_engine('sqlite:///' + os.path.join(self.tmpdir, 'parallel.db'))
+        self.sql_db = pandas_sql.SQLDatabase(self.engine)
+        self.sql_db.execute("CREATE TABLE target (a INTEGER NOT NULL)")
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmpdir)
+
+    def staging_tables(self):
+        return [name for name in self.engine.table_names() 
+                if name.startswith('pandas_staging_')]
+
+    def test_dropped_after_swap(self):
+        self.sql_db.insert_bulk(DataFrame({'a': range(10)}), 'target', chunksize=2,
+                                workers=2, transaction='staging')
+        self.assertEqual(len(self.sql_db.read_table('target')), 10)
+        self.assertEqual(self.staging_tables(), [])
+        # Nothing cached for a table that is gone
+        self.assertEqual([key for key in pandas_sql._STATEMENT_CACHE 
+                          if key[2].startswith('pandas_staging_')], [])
+
+    def test_dropped_after_failed_swap(self):
+        frame = DataFrame({'a': [1, 2, None, 4]}, dtype=object)
+        self.assertRaises(Exception, self.sql_db.insert_bulk, frame, 'target', 
+                          chunksize=1, workers=2, transaction='staging')
+        self.assertEqual(len(self.sql_db.read_table('target')), 0)
+        self.assertEqual(self.staging_tables(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# Author: Dustin Doubet
+# Description:
+# sqlmetrics histogram, operation metrics and logger setup tests
+
+#Import Python standard libraries
+import os
+import shutil
+import logging
+import tempfile
+import unittest
+#
+import sqlmetrics
+
+
+class HistogramTest(unittest.TestCase):
+    """Observations land in the first bucket bounding them"""
+
+    def test_cumulative(self):
+        histogram = sqlmetrics.Histogram(buckets=(1.0, 0.1))
+        for value in (0.05, 0.1, 0.5, 1.0, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(0.1, 2), (1.0, 4), (float('inf'), 5)])
+        self.assertEqual(histogram.count, 5)
+        self.assertAlmostEqual(histogram.sum, 4.65)
+
+
+class _Timed(object):
+
+    def __init__(self, metrics):
+        self.Metrics = metrics
+
+    @sqlmetrics.timed('query')
+    def query(self, fail=False):
+        """Query docs"""
+        if fail:
+            raise ValueError("failed")
+        return 'rows'
+
+
+class OperationMetricsTest(unittest.TestCase):
+    """Calls are counted and timed per operation and exported"""
+
+    def setUp(self):
+        self.metrics = sqlmetrics.OperationMetrics(buckets=(0.1, 1.0), labels={'db': 'a"b'})
+
+    def test_as_dict(self):
+        self.metrics.observe('insert', 0.05)
+        self.metrics.observe('insert', 0.5, error=True)
+        self.metrics.count('insert', 'retries', 2)
+        self.metrics.count('update', 'queued')
+
+        stats = self.metrics.as_dict()
+        self.assertEqual(sorted(stats), ['insert', 'update'])
+        insert = stats['insert']
+        self.assertEqual((insert['calls'], insert['errors'], insert['retries'], insert['queued']),
+                         (2, 1, 2, 0))
+        self.assertAlmostEqual(insert['seconds_sum'], 0.55)
+        self.assertAlmostEqual(insert['seconds_mean'], 0.275)
+        self.assertEqual(insert['buckets'], [(0.1, 1), (1.0, 2), (float('inf'), 2)])
+        self.assertIsNone(stats['update']['seconds_mean'])
+
+        self.metrics.reset()
+        self.assertEqual(self.metrics.as_dict(), {})
+
+    def test_timed(self):
+        timed = _Timed(self.metrics)
+        self.assertEqual(timed.query(), 'rows')
+        self.assertRaises(ValueError, timed.query, fail=True)
+        self.assertEqual(timed.query.__doc__, "Query docs")
+
+        stats = self.metrics.as_dict()['query']
+        self.assertEqual((stats['calls'], stats['errors']), (2, 1))
+
+    def test_prometheus(self):
+        self.metrics.observe('insert', 0.05)
+        self.metrics.count('insert', 'retries')
+        lines = self.metrics.prometheus(namespace='test').splitlines()
+
+        self.assertIn('# TYPE test_operation_seconds histogram', lines)
+        self.assertIn('test_operation_seconds_bucket{db="a\\"b",operation="insert",le="0.1"} 1',
+                      lines)
+        self.assertIn('test_operation_seconds_bucket{db="a\\"b",operation="insert",le="+Inf"} 1',
+                      lines)
+        self.assertIn('test_operation_seconds_count{db="a\\"b",operation="insert"} 1', lines)
+        self.assertIn('# TYPE test_operation_retries_total counter', lines)
+        self.assertIn('test_operation_retries_total{db="a\\"b",operation="insert"} 1', lines)
+        self.assertIn('test_operation_errors_total{db="a\\"b",operation="insert"} 0', lines)
+
+
+class ConfigureLoggerTest(unittest.TestCase):
+    """Configuring a logger again does not add handlers"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.logger = logging.getLogger('test_sqlmetrics')
+
+    def tearDown(self):
+        for hdlr in list(self.logger.handlers):
+            self.logger.removeHandler(hdlr)
+            hdlr.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_file_handler(self):
+        path = os.path.join(self.tmpdir, 'metrics.log')
+        for i in range(3):
+            logger = sqlmetrics.configure_logger('test_sqlmetrics', hdlr_path=path,
+                                                 log_level='debug')
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertEqual(logger.level, logging.DEBUG)
+
+        # Another file is another handler
+        sqlmetrics.configure_logger('test_sqlmetrics', hdlr_path=path + '.2')
+        self.assertEqual(len(logger.handlers), 2)
+        self.assertEqual(logger.level, logging.INFO)
+
+    def test_stream_handler(self):
+        for i in range(3):
+            logger = sqlmetrics.configure_logger('test_sqlmetrics', log_to_file=False)
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertTrue(type(logger.handlers[0]) is logging.StreamHandler)
+
+
+if __name__ == '__main__':
+    unittest.main()
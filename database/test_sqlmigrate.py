@@ -0,0 +1,71 @@
+# Author: Dustin Doubet
+# Description:
+# DirectMigration tests between SQLite databases
+
+#Import Python standard libraries
+import os
+import shutil
+import tempfile
+import unittest
+#
+from sqlalchemy import create_engine
+#
+import pandas_sql
+import sqlmigrate
+
+
+def _table(columns, pk, nullable):
+    """pg_ddl_parser style table definition of integer and text columns"""
+    
+    return {'columns': [col for col, dtype in columns], 
+            'dtypes': [dtype for col, dtype in columns],
+            'pk': pk, 'nullable': nullable, 'auto_incr': [False] * len(columns)}
+
+
+class DirectMigrationTest(unittest.TestCase):
+    """run() creates the missing target tables and copies into them"""
+
+    def setUp(self):
+        pandas_sql.clear_schema_cache()
+        self.tmpdir = tempfile.mkdtemp()
+        self.source = create_engine('sqlite:///' + os.path.join(self.tmpdir, 'source.db'))
+        self.target = create_engine('sqlite:///' + os.path.join(self.tmpdir, 'target.db'))
+        self.source.execute("CREATE TABLE parent (id INTEGER PRIMARY KEY, name TEXT)")
+        self.source.execute("CREATE TABLE child (id INTEGER PRIMARY KEY, "
+                            "parent_id INTEGER NOT NULL REFERENCES parent (id))")
+        self.source.execute("INSERT INTO parent VALUES (?, ?)", 
+                            [(i, 'p%d'%i) for i in range(1, 6)])
+        self.source.execute("INSERT INTO child VALUES (?, ?)", 
+                            [(i, i % 5 + 1) for i in range(1, 12)])
+        self.ddlDict = {'db': {'tables': {
+            'child': _table([('id', 'integer'), ('parent_id', 'integer')], 
+                            [True, False], [False, False]),
+            'parent': _table([('id', 'integer'), ('name', 'text')], 
+                             [True, False], [False, True])}}}
+
+    def tearDown(self):
+        self.source.dispose()
+        self.target.dispose()
+        shutil.rmtree(self.tmpdir)
+
+    def test_run_into_empty_target(self):
+        target_db = pandas_sql.SQLDatabase(self.target)
+        # Looked up as missing before the migration creates it
+        self.assertFalse(target_db.has_table('parent'))
+
+        migration = sqlmigrate.DirectMigration(self.source, self.target, self.ddlDict, 
+                            dtype_map={'integer': 'INTEGER', 'text': 'TEXT'},
+                            chunksize=4, workers=1)
+        with migration:
+            self.assertEqual(migration.copy_order(), ['parent', 'child'])
+            stats = migration.run()
+
+        self.assertEqual(list(stats), ['parent', 'child'])
+        self.assertEqual((stats['parent']['rows'], stats['child']['rows']), (5, 11))
+        self.assertEqual(self.target.execute("SELECT COUNT(*) FROM child").scalar(), 11)
+        self.assertEqual(self.target.execute("SELECT name FROM parent WHERE id = 3").scalar(), 
+                         'p3')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+# Author: Dustin Doubet
+# Description:
+# sqlpool checkout ping and pool statistics tests against SQLite files
+
+#Import Python standard libraries
+import os
+import shutil
+import tempfile
+import unittest
+import threading
+#
+from sqlalchemy import create_engine
+#
+import sqlpool
+
+
+class PoolMonitorTest(unittest.TestCase):
+    """Checkouts are counted, pinged when asked to and waits timed"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.url = 'sqlite:///' + os.path.join(self.tmpdir, 'pool.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def pooled_engine(self, **kwargs):
+        return sqlpool.create_pooled_engine(self.url, pool_size=1, max_overflow=0, **kwargs)
+
+    def close_pooled_connection(self, engine):
+        """Close the connection kept in the pool underneath it"""
+
+        conn = engine.connect()
+        raw = conn.connection.connection
+        conn.close()
+        raw.close()
+
+    def test_ping_replaces_closed_connection(self):
+        engine = self.pooled_engine()
+        pool_monitor = sqlpool.monitor(engine)
+        self.assertTrue(pool_monitor.pre_ping)
+
+        self.close_pooled_connection(engine)
+        conn = engine.connect()
+        self.assertEqual(conn.execute("SELECT 2").scalar(), 2)
+        conn.close()
+
+        stats = pool_monitor.stats()
+        self.assertEqual(stats['ping_failures'], 1)
+        self.assertEqual(stats['invalidations'], 1)
+        self.assertEqual(stats['connects'], 2)
+        self.assertEqual(stats['checkouts'], stats['checkins'] + 1)
+        self.assertEqual(stats['pool_size'], 1)
+
+    def test_passed_engine_not_pinged(self):
+        engine = create_engine(self.url)
+        pool_monitor = sqlpool.monitor(engine)
+        self.assertFalse(pool_monitor.pre_ping)
+
+        self.close_pooled_connection(engine)
+        engine.connect().invalidate()
+        self.assertEqual(pool_monitor.counters['ping_failures'], 0)
+        self.assertEqual(pool_monitor.counters['checkouts'], 2)
+
+    def test_ping_turned_off(self):
+        engine = self.pooled_engine()
+        self.assertTrue(sqlpool.monitor(engine).pre_ping)
+        # None keeps the setting, False turns the ping off for the engine
+        self.assertTrue(sqlpool.monitor(engine, pre_ping=None).pre_ping)
+        pool_monitor = sqlpool.monitor(engine, pre_ping=False)
+        self.assertFalse(pool_monitor.pre_ping)
+        self.assertTrue(sqlpool.monitor(engine) is pool_monitor)
+
+        self.close_pooled_connection(engine)
+        engine.connect().invalidate()
+        self.assertEqual(pool_monitor.counters['ping_failures'], 0)
+
+    def test_waits(self):
+        engine = self.pooled_engine(pool_timeout=5)
+        pool_monitor = sqlpool.monitor(engine)
+        pool_monitor.connect().close()
+        self.assertEqual(pool_monitor.counters['waits'], 0)
+
+        held = pool_monitor.connect()
+        timer = threading.Timer(0.2, held.close)
+        timer.start()
+        try:
+            # Every connection is out, this one waits for the timer
+            pool_monitor.connect().close()
+        finally:
+            timer.join()
+
+        stats = pool_monitor.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertTrue(0.1 <= stats['wait_seconds'] < 5)
+        self.assertEqual(stats['max_wait_seconds'], stats['wait_seconds'])
+        self.assertEqual(stats['checked_out'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
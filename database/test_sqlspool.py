@@ -0,0 +1,117 @@
+# Author: Dustin Doubet
+# Description:
+# sqlspool put and replay tests against SQLite files, run with the utils
+# directory on the path for retrypolicy
+
+#Import Python standard libraries
+import os
+import shutil
+import tempfile
+import unittest
+
+from pandas.core.api import DataFrame
+#
+from sqlalchemy import create_engine, exc
+#
+import retrypolicy
+import pandas_sql
+import sqlspool
+
+
+class _SQLCommon(object):
+    """The parts of SQLCommonClass a spool replays through"""
+
+    def __init__(self, engine):
+        self.SqlDB = pandas_sql.SQLDatabase(engine)
+        self.Retry = retrypolicy.RetryPolicy(base=0.0)
+        self.RetryKey = 'sql:%r'%engine.url
+
+    def _resource_error(self, e):
+        return isinstance(e, (exc.OperationalError, exc.InterfaceError, exc.TimeoutError))
+
+
+class SQLSpoolTest(unittest.TestCase):
+    """Spooled writes are replayed once, and bad entries put aside"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.engine = create_engine('sqlite:///' + os.path.join(self.tmpdir, 'db.sqlite'))
+        self.engine.execute("CREATE TABLE target (a INTEGER PRIMARY KEY, b TEXT DEFAULT 'd')")
+        self.sql_common = _SQLCommon(self.engine)
+        retrypolicy.reset(self.sql_common.RetryKey)
+        self.spool = sqlspool.SQLSpool(os.path.join(self.tmpdir, 'spool.sqlite'))
+
+    def tearDown(self):
+        self.spool.close()
+        retrypolicy.reset(self.sql_common.RetryKey)
+        shutil.rmtree(self.tmpdir)
+
+    def rows(self):
+        return self.engine.execute("SELECT a, b FROM target ORDER BY a").fetchall()
+
+    def drain(self):
+        replayed = []
+        while True:
+            rows = self.spool.drain_once(self.sql_common)
+            if not rows and not self.spool.pending():
+                return replayed
+            replayed.append(rows)
+
+    def test_put_and_replay(self):
+        self.spool.put_frame('db', 'target', DataFrame({'a': [1, 2], 'b': ['x', 'y']}))
+        self.spool.put_rows('db', 'target', [{'a': 3, 'b': 'z'}])
+        self.spool.put_rows('db', 'target', [{'a': 4}])
+        self.assertEqual(self.spool.pending(), 3)
+
+        # Entries with other columns are replayed apart, so b gets its default
+        self.assertEqual(self.drain(), [3, 1])
+        self.assertEqual(self.rows(), [(1, 'x'), (2, 'y'), (3, 'z'), (4, 'd')])
+        stats = self.spool.stats()
+        self.assertEqual((stats['spooled'], stats['replayed_entries'], stats['replayed_rows'],
+                          stats['pending']), (3, 3, 4, 0))
+
+    def test_buffered_puts(self):
+        self.spool.flush_rows = 10
+        self.spool.put_rows('db', 'target', [{'a': 1, 'b': 'x'}])
+        self.assertEqual(self.spool.pending(), 1)
+        self.assertEqual(self.drain(), [1])
+        self.assertEqual(self.rows(), [(1, 'x')])
+
+    def test_failing_entry_dead(self):
+        self.engine.execute("INSERT INTO target VALUES (2, 'old')")
+        for a in (1, 2, 3):
+            self.spool.put_rows('db', 'target', [{'a': a, 'b': 'new'}])
+
+        # The duplicate key fails the batch, then only its own entry
+        self.assertEqual(self.drain(), [2])
+        self.assertEqual(self.rows(), [(1, 'new'), (2, 'old'), (3, 'new')])
+        stats = self.spool.stats()
+        self.assertEqual((stats['dead'], stats['dead_entries'], stats['replay_failures']),
+                         (1, 1, 2))
+        # Failures of the entries do not count against the database
+        self.assertEqual(retrypolicy.stats(self.sql_common.RetryKey)['state'], retrypolicy.CLOSED)
+
+    def test_unreadable_entry_dead(self):
+        for a in (1, 2):
+            self.spool.put_rows('db', 'target', [{'a': a, 'b': 'x'}])
+        self.spool._db.execute("UPDATE spool SET payload = ? WHERE id = 1",
+                               (buffer('not a pickle'),))
+        self.spool._db.commit()
+
+        self.assertEqual(self.drain(), [1])
+        self.assertEqual(self.rows(), [(2, 'x')])
+        self.assertEqual(self.spool.stats()['dead_entries'], 1)
+
+    def test_unavailable(self):
+        self.spool.put_rows('db', 'target', [{'a': 1, 'b': 'x'}])
+        # A database file that can not be opened
+        sql_common = _SQLCommon(create_engine('sqlite:///' + 
+                                              os.path.join(self.tmpdir, 'missing', 'db.sqlite')))
+        self.assertRaises(exc.OperationalError, self.spool.drain_once, sql_common)
+        self.assertEqual(self.spool.pending(), 1)
+        self.assertEqual(self.spool.stats()['dead'], 0)
+        self.assertEqual(self.drain(), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,6 +13,8 @@ from contextlib import contextmanager
 import requests
 import pywebhdfs
 from pywebhdfs.webhdfs import PyWebHdfsClient
+#
+import retrypolicy
 
 STRING_TYPES = [str,unicode]
  
@@ -90,9 +92,14 @@ class HadoopHTTPRequests:
      
     def __init__(self, oozie_url=None, web_hdfs_host=None, web_hdfs_port=None, username=None,
                        job_tracker=None, name_node=None, timeout=5, wf_logger=None, log_to_file=True, 
-                                                                      log_level=None, hdlr_path=None):
+                                                   log_level=None, hdlr_path=None, retry_policy=None):
          
-        """doc string"""
+        """
+        Requests to WebHDFS and Oozie are retried by retry_policy, a 
+        retrypolicy.RetryPolicy, with 3 attempts and exponential backoff from
+        3 seconds by default. Each WebHDFS host and Oozie URL has its own
+        circuit breaker and retry budget.
+        """
          
         if wf_logger == None:
             self.loggerName = 'HadoopHTTPRequests'
@@ -127,7 +134,11 @@ class HadoopHTTPRequests:
              
         #/////////////////////////////////////////////////////////////////////////////
          
-        self.RETRIES      = 3
+        if retry_policy is None:
+            retry_policy = retrypolicy.RetryPolicy(attempts=3, base=3.0, cap=30.0)
+             
+        self.Retry        = retry_policy
+        self.RETRIES      = self.Retry.attempts
         self.username     = username
         self.nameNode     = name_node
         self.timeout      = timeout
@@ -176,6 +187,13 @@ class HadoopHTTPRequests:
         return client
      
      
+    def _webhdfs_key(self, client):
+        """Retry policy resource key of the WebHDFS host of the client"""
+         
+        return 'webhdfs:%s:%s'%(getattr(client, 'host', self.webHDFSHost), 
+                                getattr(client, 'port', self.webHDFSPort))
+     
+     
     def hdfs_create_file(self, filename, file_content, hdfs_file_path, overwrite=False, 
                                                                 client=None, **kwargs):
         """doc string"""
@@ -222,31 +240,34 @@ class HadoopHTTPRequests:
              
         self.logger.info("Submitting request for HDFS path '%s' removal"%path)
          
-        for i in range(self.RETRIES):
+        retry = self.Retry.begin(self._webhdfs_key(client))
+        for i in retry:
             try:
+                retry.check()
                 client.delete_file_dir(path=path.lstrip('/'), recursive=recursive)
  
+            except retrypolicy.CircuitOpenError as e:
+                self.logger.error("WebHDFS request not made. %s"%e)
+                raise ResourceError("WebHDFS error during delete_file_dir. HDFS path '%s' was not "
+                                    "removed"%path)
+
             except Exception as e:
                 self.logger.debug("In method, hdfs_remove")
                 self.logger.error("Received '%s' while removing HDFS path "
                                   "'%s'"%(e,path),exc_info=True)
                  
-                if i+1 != self.RETRIES:
-                    if isinstance(e, IOError):
-                        traceback.print_exc(file=sys.stderr)
+                if isinstance(e, IOError):
+                    traceback.print_exc(file=sys.stderr)
+                    if retry.failed():
                         self.logger.warning("Resubmitting request for HDFS path removal")
-                        time.sleep(i*3)
                     else:
-                        raise
-                     
-                elif isinstance(e, IOError):
-                    traceback.print_exc(file=sys.stderr)
-                    #ConnectionError, ConnectionRefusedError,...etc. 
-                    raise ResourceError("WebHDFS error during delete_file_dir. HDFS path '%s' was not "
-                                        "removed"%path)
+                        #ConnectionError, ConnectionRefusedError,...etc. 
+                        raise ResourceError("WebHDFS error during delete_file_dir. HDFS path '%s' was not "
+                                            "removed"%path)
                 else:
                     raise
             else:
+                retry.succeeded()
                 self.logger.debug("In method, hdfs_remove")
                 self.logger.debug("HDFS path '%s' successfully removed"%path)
                 break
@@ -266,32 +287,35 @@ class HadoopHTTPRequests:
              
         self.logger.info("Creating directory at HDFS location '%s'"%directory)
          
-        for i in range(self.RETRIES):
+        retry = self.Retry.begin(self._webhdfs_key(client))
+        for i in retry:
             try:
+                retry.check()
                 client.make_dir(directory.lstrip('/'), permission=permission, **kwargs)
  
+            except retrypolicy.CircuitOpenError as e:
+                self.logger.error("WebHDFS request not made. %s"%e)
+                raise ResourceError("WebHDFS error during make_dir. Directory '%s' was not "
+                                    "created in HDFS"%directory)
+
             except Exception as e:
                 self.logger.debug("In method, hdfs_mkdir")
                 self.logger.error("Received '%s' while creating directory at HDFS location "
                                   "'%s'"%(e,directory),exc_info=True)
                  
-                if i+1 != self.RETRIES:
-                    if isinstance(e, IOError):
-                        traceback.print_exc(file=sys.stderr)
+                if isinstance(e, IOError):
+                    traceback.print_exc(file=sys.stderr)
+                    if retry.failed():
                         self.logger.warning("Resubmitting request for directory creation")
-                        time.sleep(i*3)
                     else:
-                        raise
-                     
-                elif isinstance(e, IOError):
-                    traceback.print_exc(file=sys.stderr)
-                    #ConnectionError, ConnectionRefusedError,...etc. Need to confirm that all
-                    #connection type errors are an instance of IOError
-                    raise ResourceError("WebHDFS error during make_dir. Directory '%s' was not "
-                                        "created in HDFS"%directory)
+                        #ConnectionError, ConnectionRefusedError,...etc. Need to confirm that all
+                        #connection type errors are an instance of IOError
+                        raise ResourceError("WebHDFS error during make_dir. Directory '%s' was not "
+                                            "created in HDFS"%directory)
                 else:
                     raise
             else:
+                retry.succeeded()
                 self.logger.debug("In method, hdfs_mkdir")
                 self.logger.debug("Directory '%s' successfully created in HDFS"%directory)
                 break
@@ -321,32 +345,34 @@ class HadoopHTTPRequests:
         self.logger.debug("Listing '%s' entry types at HDFS location '%s'"
                          %(entry_type,directory))
          
-        for i in range(self.RETRIES):
+        retry = self.Retry.begin(self._webhdfs_key(client))
+        for i in retry:
             try:
+                retry.check()
                 #The lstrip is required for pywebhdfs- Ex: home/data/
                 status = client.list_dir(directory.lstrip('/'))
  
+            except retrypolicy.CircuitOpenError as e:
+                self.logger.error("WebHDFS request not made. %s"%e)
+                raise ResourceError("WebHDFS error during list_dir on path '%s'"%directory)
+
             except Exception as e:
                 self.logger.debug("In method, hdfs_listdir")
                 self.logger.error("Received '%s' while listing directory for '%s'"
                                   %(e,directory),exc_info=True)
  
-                if i+1 != self.RETRIES:
-                    if isinstance(e, IOError):
-                        traceback.print_exc(file=sys.stderr)
+                if isinstance(e, IOError):
+                    traceback.print_exc(file=sys.stderr)
+                    if retry.failed():
                         self.logger.warning("Resubmitting request for directory listing")
-                        time.sleep(i*3)
                     else:
-                        raise
-                         
-                elif isinstance(e, IOError):
-                    traceback.print_exc(file=sys.stderr)
-                    #ConnectionError, ConnectionRefusedError,...etc. Need to confirm that all
-                    #connection type errors are an instance of IOError
-                    raise ResourceError("WebHDFS error during list_dir on path '%s'"%directory) 
+                        #ConnectionError, ConnectionRefusedError,...etc. Need to confirm that all
+                        #connection type errors are an instance of IOError
+                        raise ResourceError("WebHDFS error during list_dir on path '%s'"%directory)
                 else:
                     raise
             else:
+                retry.succeeded()
                 self.logger.debug("In method, hdfs_listdir")
                 self.logger.debug("Successful HDFS directory listing")
                 if entry_type == 'all':
@@ -428,29 +454,31 @@ class HadoopHTTPRequests:
              
         directory = file_dir
          
-        for i in range(self.RETRIES):
+        retry = self.Retry.begin(self._webhdfs_key(client))
+        for i in retry:
             try:
+                retry.check()
                 status = client.get_file_dir_status(file_dir.lstrip('/'))
  
+            except retrypolicy.CircuitOpenError as e:
+                self.logger.error("WebHDFS request not made. %s"%e)
+                raise ResourceError("WebHDFS error during get_file_dir_status")
+
             except Exception as e:
                 self.logger.debug("In method, hdfs_status")
                 self.logger.error("Received '%s' while requesting status for '%s'"
                                   %(e,file_dir))
-                if i+1 != self.RETRIES:
-                    if isinstance(e, IOError):
-                        traceback.print_exc(file=sys.stderr)
+                if isinstance(e, IOError):
+                    traceback.print_exc(file=sys.stderr)
+                    if retry.failed():
                         self.logger.warning("Resubmitting request for file/directory status")
-                        time.sleep(i*3)
                     else:
-                        raise e
-                     
-                elif isinstance(e, IOError):
-                    traceback.print_exc(file=sys.stderr)
-                    #ConnectionError, ConnectionRefusedError,...etc.
-                    raise ResourceError("WebHDFS error during get_file_dir_status")  
+                        #ConnectionError, ConnectionRefusedError,...etc.
+                        raise ResourceError("WebHDFS error during get_file_dir_status")
                 else:
                     raise e
             else:
+                retry.succeeded()
                 self.logger.debug("In method, hdfs_status")
                 self.logger.debug("HDFS file/directory status retrieved successfully")
                 break
@@ -527,24 +555,27 @@ class HadoopHTTPRequests:
                     #Stand alone use only
                     log_trans, log_conn = None, None
                      
-                for i in range(self.RETRIES):
+                retry = self.Retry.begin(self._webhdfs_key(client))
+                for i in retry:
                     try:
+                        retry.check()
                         #Might have had an issue with a connection on first try so try again
                         self.hdfs_create_file(filename=filename, file_content=fileContent, 
                                               hdfs_file_path=hdfsFilePath, client=client, **kwargs)
  
-                    except ResourceError:
+                    except (ResourceError, retrypolicy.CircuitOpenError) as e:
                         #Errors and traceback are logged in the hdfs_create_file method
                         self.logger.debug("In method, hdfs_file_from_frame")
-                        if i+1 != self.RETRIES:
+                        if isinstance(e, ResourceError) and retry.failed():
                             self.logger.info("Resubmitting request for WebHDFS file transfer")
-                            time.sleep(3*i)
                         else:
                             if log_trans is not None:
                                 log_trans.rollback()
                                 self.logger.warning("Rolling back any inserts or updates to FILE_STATUS "
                                                     "and FILE_LOCATION tables")
                             #Issue remains so re-raise the ResourceError
+                            if isinstance(e, retrypolicy.CircuitOpenError):
+                                raise ResourceError("WebHDFS request not made. %s"%e)
                             raise
                         #Possible file content problem. Will have to test for other failure cases. 
                         #Will have to verify condition for when a file already exists in HDFS location.
@@ -558,6 +589,7 @@ class HadoopHTTPRequests:
                                                 "and FILE_LOCATION tables")
                         raise   
                     else:
+                        retry.succeeded()
                         if log_trans is not None:
                             log_trans.commit()
                         self.logger.debug("In method, hdfs_file_from_frame")
@@ -614,8 +646,10 @@ class HadoopHTTPRequests:
             ingest_config_xml = config_xml
    
      
-        for i in range(self.RETRIES):
+        retry = self.Retry.begin('oozie:%s'%oozieHttpUrl)
+        for i in retry:
             try:
+                retry.check()
                 if start_job:
                     #Standard Job Submission
                     url = oozieHttpUrl + '/jobs?action=start'
@@ -684,15 +718,18 @@ class HadoopHTTPRequests:
                     else:
                         response.raise_for_status()
              
+            except retrypolicy.CircuitOpenError as e:
+                self.logger.error("Oozie request not made. %s"%e)
+                raise ResourceError("Oozie web services not available. %s"%e)
+             
             except requests.exceptions.RequestException as e:
                 traceback.print_exc(file=sys.stderr)
                 self.logger.error("Received '%s' while submitting Oozie request"
                                   %e,exc_info=True)
                  
                 if type(e) in REQEXC:
-                    if i+1 != self.RETRIES:
+                    if retry.failed():
                         self.logger.warning("Resubmitting Oozie request")
-                        time.sleep(2)
                     else:
                         raise ResourceError("Oozie web services not available. %s"
                                             %e.message)
@@ -700,6 +737,7 @@ class HadoopHTTPRequests:
                     raise FileIngestionError("Oozie REST API error %s"%e.message)
  
             else:
+                retry.succeeded()
                 self.logger.debug("Successful Oozie server request. Submitted url '%s'"
                                   %url)
                 break
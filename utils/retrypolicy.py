@@ -0,0 +1,356 @@
+# Author: Dustin Doubet
+# Description:
+# Retry policy shared by SQLCommonClass and HadoopHTTPRequests. Exponential
+# backoff with jitter, a total deadline, and per resource (database, WebHDFS
+# host, Oozie URL) a circuit breaker and a retry budget, so a flapping backend
+# sheds load instead of every worker piling on retries.
+#
+# retry = policy.begin('webhdfs:namenode:50070')
+# for i in retry:
+#     try:
+#         retry.check()
+#         result = call()
+#     except IOError:
+#         if retry.failed():
+#             continue
+#         raise
+#     else:
+#         retry.succeeded()
+#         break
+
+#Import Python standard libraries
+import time
+import random
+import threading
+from timeit import default_timer
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Resource state is per process, shared by every policy and class instance
+# calling the same resource
+_RESOURCES = {}
+_RESOURCES_LOCK = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """The circuit of the resource is open and the call was not made"""
+
+    def __init__(self, message, resource=None):
+        super(CircuitOpenError, self).__init__(message)
+        self.resource = resource
+
+
+class Backoff(object):
+    """
+    Exponential backoff with jitter. Retry n waits between half and all of
+    min(cap, base * 2**n) seconds, so the first retry is never immediate
+    and workers that failed together do not retry together.
+    """
+
+    def __init__(self, base=1.0, cap=30.0):
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt):
+        """Seconds to wait before retry number attempt (0 based)"""
+
+        ceiling = min(self.cap, self.base * 2 ** attempt)
+        return ceiling / 2.0 + random.uniform(0, ceiling / 2.0)
+
+    def sleep(self, attempt):
+        """doc string"""
+
+        seconds = self.delay(attempt)
+        time.sleep(seconds)
+        return seconds
+
+
+class CircuitBreaker(object):
+    """
+    failure_threshold failures in a row open the circuit, and calls are then
+    rejected without touching the resource. After reset_timeout seconds one
+    probe call is let through (half open). Its success closes the circuit
+    and its failure opens it again. A probe released without either, after
+    an error that says nothing about the resource, lets the next call probe
+    at once. A probe that never reports back lets the next probe through
+    after another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opens = 0
+        self._changed = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True when a call may be made now"""
+
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = default_timer()
+            if now - self._changed < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+            self._changed = now
+            return True
+
+    def success(self):
+        """doc string"""
+
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def failure(self):
+        """doc string"""
+
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and
+                                           self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self._changed = default_timer()
+                self.opens += 1
+
+    def release(self):
+        """The half open probe ended without telling whether the resource is healthy"""
+
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._changed = default_timer() - self.reset_timeout
+
+
+class RetryBudget(object):
+    """
+    Retries as a share of calls. Every call deposits ratio of a token and
+    every retry withdraws one. The balance starts at, and is capped at,
+    reserve. A healthy resource keeps the budget full; when every call
+    fails, retries drop to about ratio of the calls instead of multiplying
+    the load by the number of attempts.
+    """
+
+    def __init__(self, ratio=0.2, reserve=10):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.balance = float(reserve)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """doc string"""
+
+        with self._lock:
+            self.balance = min(float(self.reserve), self.balance + self.ratio)
+
+    def withdraw(self):
+        """Take a token for a retry, False when the budget is spent"""
+
+        with self._lock:
+            if self.balance < 1.0:
+                return False
+            self.balance -= 1.0
+            return True
+
+
+class _Resource(object):
+    """Breaker, budget and counters of one resource key"""
+
+    def __init__(self, key, failure_threshold, reset_timeout, budget_ratio, budget_reserve):
+        self.key = key
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.budget = RetryBudget(budget_ratio, budget_reserve)
+        self.counters = {'calls': 0, 'attempts': 0, 'successes': 0, 'failures': 0,
+                         'retries': 0, 'rejected': 0, 'attempts_exhausted': 0,
+                         'deadline_exceeded': 0, 'budget_denied': 0, 'circuit_open': 0,
+                         'sleep_seconds': 0.0}
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def stats(self):
+        """doc string"""
+
+        with self._lock:
+            stats = dict(self.counters)
+        stats.update(state=self.breaker.state, circuit_opens=self.breaker.opens,
+                     consecutive_failures=self.breaker.failures,
+                     budget_balance=self.budget.balance)
+        return stats
+
+
+def stats(key=None):
+    """Counters and circuit state of one resource key, or of all by key"""
+
+    with _RESOURCES_LOCK:
+        resources = dict(_RESOURCES)
+
+    if key is not None:
+        if key not in resources:
+            return None
+        return resources[key].stats()
+    return dict((k, r.stats()) for k, r in resources.iteritems())
+
+
+def reset(key=None):
+    """Forget the state of one resource key, or of all"""
+
+    with _RESOURCES_LOCK:
+        if key is None:
+            _RESOURCES.clear()
+        else:
+            _RESOURCES.pop(key, None)
+
+
+class RetryPolicy(object):
+    """
+    Parameters
+    ----------
+    attempts : int, default 3
+        Calls made in total, the first one included.
+    base : float, default 1.0
+        Backoff of the first retry in seconds, doubling per retry.
+    cap : float, default 30.0
+        Longest backoff in seconds.
+    deadline : float, default None
+        Seconds from the first attempt after which no retry is started.
+    failure_threshold : int, default 5
+        Failures in a row on a resource that open its circuit.
+    reset_timeout : float, default 30.0
+        Seconds an open circuit rejects calls before a probe.
+    budget_ratio : float, default 0.2
+        Retries allowed per call once the budget reserve is spent.
+    budget_reserve : int, default 10
+        Retries available to a resource before budget_ratio applies.
+
+    Breaker and budget settings take effect for a resource key the first
+    time any policy uses it.
+    """
+
+    def __init__(self, attempts=3, base=1.0, cap=30.0, deadline=None, failure_threshold=5,
+                              reset_timeout=30.0, budget_ratio=0.2, budget_reserve=10):
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+
+        self.attempts = attempts
+        self.deadline = deadline
+        self.backoff = Backoff(base=base, cap=cap)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.budget_ratio = budget_ratio
+        self.budget_reserve = budget_reserve
+
+    def resource(self, key):
+        """The shared state of a resource key, created on first use"""
+
+        with _RESOURCES_LOCK:
+            resource = _RESOURCES.get(key)
+            if resource is None:
+                resource = _RESOURCES[key] = _Resource(key, self.failure_threshold,
+                                                       self.reset_timeout, self.budget_ratio,
+                                                       self.budget_reserve)
+        return resource
+
+    def begin(self, key):
+        """RetryState for one call on the resource key"""
+
+        resource = self.resource(key)
+        resource.count('calls')
+        resource.budget.deposit()
+
+        return RetryState(self, resource)
+
+    def stats(self, key):
+        """doc string"""
+
+        return self.resource(key).stats()
+
+
+class RetryState(object):
+    """
+    Attempts of one call. Iterating yields the attempt numbers, check() is
+    made at the start of every attempt and every attempt ends in
+    succeeded() or failed().
+    """
+
+    REASONS = {'attempts': 'attempts_exhausted', 'deadline': 'deadline_exceeded',
+               'budget': 'budget_denied', 'circuit': 'circuit_open'}
+
+    def __init__(self, policy, resource):
+        self.policy = policy
+        self.resource = resource
+        self.attempt = 0
+        self.reason = None
+        self.start = default_timer()
+
+    def __iter__(self):
+        self.attempt = 0
+        while self.attempt < self.policy.attempts:
+            yield self.attempt
+            self.attempt += 1
+
+    @property
+    def key(self):
+        return self.resource.key
+
+    def check(self):
+        """Raise CircuitOpenError when the circuit rejects the attempt"""
+
+        if not self.resource.breaker.allow():
+            self.resource.count('rejected')
+            self.reason = 'circuit'
+            raise CircuitOpenError("Circuit open for '%s', call not made"%self.key,
+                                   resource=self.key)
+        self.resource.count('attempts')
+
+    def succeeded(self):
+        """doc string"""
+
+        self.resource.count('successes')
+        self.resource.breaker.success()
+
+    def failed(self, retry=True, trip=True):
+        """
+        Record a failed attempt. trip counts it against the circuit, leave it
+        False for errors that say nothing about the health of the resource;
+        such a failure of the half open probe lets the next call probe.
+        With retry, wait out the backoff and return True when another attempt
+        may be made. Otherwise return False with the reason in self.reason:
+        'attempts', 'deadline', 'budget' or 'circuit'.
+        """
+
+        resource = self.resource
+        resource.count('failures')
+        if trip:
+            resource.breaker.failure()
+        else:
+            resource.breaker.release()
+        if not retry:
+            return False
+
+        if self.attempt + 1 >= self.policy.attempts:
+            self.reason = 'attempts'
+        elif resource.breaker.state == OPEN:
+            self.reason = 'circuit'
+        else:
+            delay = self.policy.backoff.delay(self.attempt)
+            if (self.policy.deadline is not None and
+                    default_timer() - self.start + delay > self.policy.deadline):
+                self.reason = 'deadline'
+            elif not resource.budget.withdraw():
+                self.reason = 'budget'
+            else:
+                resource.count('retries')
+                resource.count('sleep_seconds', delay)
+                time.sleep(delay)
+                return True
+
+        resource.count(self.REASONS[self.reason])
+        return False
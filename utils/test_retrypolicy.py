@@ -0,0 +1,163 @@
+# Author: Dustin Doubet
+# Description:
+# retrypolicy backoff, circuit breaker and retry budget tests
+
+#Import Python standard libraries
+import time
+import unittest
+#
+import retrypolicy
+
+
+class BackoffTest(unittest.TestCase):
+    """Delays grow to the cap and keep half of it at least"""
+
+    def test_delay(self):
+        backoff = retrypolicy.Backoff(base=0.5, cap=4.0)
+        for attempt in range(8):
+            ceiling = min(4.0, 0.5 * 2 ** attempt)
+            for i in range(20):
+                delay = backoff.delay(attempt)
+                self.assertTrue(ceiling / 2.0 <= delay <= ceiling)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    """Failures in a row open the circuit and one probe tries to close it"""
+
+    def setUp(self):
+        self.breaker = retrypolicy.CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+
+    def open_circuit(self):
+        for i in range(3):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.failure()
+        self.assertEqual(self.breaker.state, retrypolicy.OPEN)
+        self.assertFalse(self.breaker.allow())
+        time.sleep(0.06)
+        # The probe, and no other call while it runs
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, retrypolicy.HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_success_resets_failures(self):
+        for i in range(10):
+            self.breaker.failure()
+            self.breaker.failure()
+            self.breaker.success()
+        self.assertEqual(self.breaker.state, retrypolicy.CLOSED)
+        self.assertEqual(self.breaker.opens, 0)
+
+    def test_probe_success(self):
+        self.open_circuit()
+        self.breaker.success()
+        self.assertEqual(self.breaker.state, retrypolicy.CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_probe_failure(self):
+        self.open_circuit()
+        self.breaker.failure()
+        self.assertEqual(self.breaker.state, retrypolicy.OPEN)
+        self.assertEqual(self.breaker.opens, 2)
+        self.assertFalse(self.breaker.allow())
+
+    def test_probe_released(self):
+        self.open_circuit()
+        self.breaker.release()
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.opens, 1)
+
+    def test_release_when_closed(self):
+        self.breaker.release()
+        self.assertEqual(self.breaker.state, retrypolicy.CLOSED)
+
+
+class RetryBudgetTest(unittest.TestCase):
+    """Retries beyond the reserve come from what calls deposit"""
+
+    def test_withdraw(self):
+        budget = retrypolicy.RetryBudget(ratio=0.5, reserve=2)
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+    def test_capped(self):
+        budget = retrypolicy.RetryBudget(ratio=0.5, reserve=2)
+        for i in range(10):
+            budget.deposit()
+        self.assertEqual(budget.balance, 2.0)
+
+
+class RetryStateTest(unittest.TestCase):
+    """Attempts end for the reasons the policy gives"""
+
+    key = 'test:retrypolicy'
+
+    def setUp(self):
+        retrypolicy.reset(self.key)
+
+    def tearDown(self):
+        retrypolicy.reset(self.key)
+
+    def policy(self, **kwargs):
+        kwargs.setdefault('base', 0.0)
+        return retrypolicy.RetryPolicy(**kwargs)
+
+    def failures(self, retry, **kwargs):
+        """Attempts made by a call failing every time, and why it stopped"""
+
+        made = 0
+        for i in retry:
+            retry.check()
+            made += 1
+            if not retry.failed(**kwargs):
+                break
+        return made, retry.reason
+
+    def test_attempts(self):
+        policy = self.policy(attempts=3)
+        self.assertEqual(self.failures(policy.begin(self.key)), (3, 'attempts'))
+        stats = policy.stats(self.key)
+        self.assertEqual((stats['attempts'], stats['retries'], stats['attempts_exhausted']),
+                         (3, 2, 1))
+
+    def test_budget(self):
+        policy = self.policy(attempts=5, budget_reserve=2, failure_threshold=100)
+        self.assertEqual(self.failures(policy.begin(self.key)), (3, 'budget'))
+        self.assertEqual(policy.stats(self.key)['budget_denied'], 1)
+
+    def test_deadline(self):
+        policy = self.policy(attempts=5, base=10.0, deadline=1.0)
+        self.assertEqual(self.failures(policy.begin(self.key)), (1, 'deadline'))
+
+    def test_circuit(self):
+        policy = self.policy(attempts=5, failure_threshold=2, reset_timeout=60)
+        self.assertEqual(self.failures(policy.begin(self.key)), (2, 'circuit'))
+        retry = policy.begin(self.key)
+        self.assertRaises(retrypolicy.CircuitOpenError, retry.check)
+        self.assertEqual(retry.reason, 'circuit')
+        self.assertEqual(policy.stats(self.key)['rejected'], 1)
+
+    def test_not_tripping(self):
+        policy = self.policy(attempts=5, failure_threshold=2)
+        self.assertEqual(self.failures(policy.begin(self.key), trip=False), (5, 'attempts'))
+        self.assertEqual(policy.stats(self.key)['state'], retrypolicy.CLOSED)
+
+    def test_probe_not_tripping(self):
+        policy = self.policy(attempts=1, failure_threshold=1, reset_timeout=0.05)
+        self.failures(policy.begin(self.key))
+        time.sleep(0.06)
+        # The probe fails on something the resource is not to blame for
+        self.failures(policy.begin(self.key), trip=False)
+        retry = policy.begin(self.key)
+        retry.check()
+        retry.succeeded()
+        self.assertEqual(policy.stats(self.key)['state'], retrypolicy.CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()